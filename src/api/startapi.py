@@ -4,16 +4,21 @@ from dataclasses import dataclass, asdict
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 
-from src.core.mediainfo import get_media_info
+from src.core.comparison import format_comparisons, get_comparison
+from src.core.crop import crop_to_dict
+from src.core.job import create_job, get_job
+from src.core.mediainfo import analyze_media, get_media_info
 from src.core.picturebed import upload_picture
+from src.core.preview_clip import get_preview_clip
 from src.core.ptgen import get_pt_gen_description
 from src.core.rename import get_video_info, get_pt_gen_info, get_name_from_template, rename_file, rename_folder, \
     move_file_to_folder, create_hard_link
-from src.core.screenshot import get_screenshot, get_thumbnail
+from src.core.screenshot import get_screenshot, get_season_screenshot, get_thumbnail, parse_output_specs
 from src.core.tool import check_path_and_find_video, get_settings, make_torrent, delete_season_number, \
     get_video_files, update_combo_box_data, update_settings, \
     get_playlet_description, get_combo_box_data, get_settings_json, update_settings_json, combine_directories, \
     get_data_from_pt_gen_description, validate_and_convert_to_int
+from src.core.video_session import VideoSession
 
 api = Flask(__name__)
 CORS(api)
@@ -36,9 +41,23 @@ def convert_to_camel_case(data_class_instance):
     return {to_camel_case(key): value for key, value in original_dict.items()}
 
 
+def request_job():
+    """请求带有jobId参数时创建对应的任务，之后可通过/api/getJob查询进度、/api/cancelJob取消；没有时返回None"""
+    job_id = request.args.get('jobId', default='', type=str)
+    if job_id == '':
+        return None
+    return create_job(job_id)
+
+
+def finish_job(job, success, message=''):
+    if job is not None:
+        job.finish(success, message)
+
+
 @api.route('/api/getScreenshot', methods=['GET'])
 # 用于获取MediaInfo，传入一个文件地址或者一个文件夹地址，返回视频文件路径和MediaInfo
 def api_get_screenshot():
+    session = None
     try:
         # 从请求URL中获取参数
         path = request.args.get('path', default='', type=str)  # 必须信息
@@ -120,29 +139,151 @@ def api_get_screenshot():
         else:
             screenshot_min_interval_percentage = float(screenshot_min_interval_percentage)
 
+        screenshot_workers = request.args.get('screenshotWorkers', default=get_settings('screenshot_workers'),
+                                              type=str)
+
+        if screenshot_workers == '':
+            screenshot_workers = int(get_settings('screenshot_workers'))
+        else:
+            screenshot_workers = int(screenshot_workers)
+
+        screenshot_oversample = request.args.get('screenshotOversample', default=get_settings('screenshot_oversample'),
+                                                 type=str)
+
+        if screenshot_oversample == '':
+            screenshot_oversample = int(get_settings('screenshot_oversample'))
+        else:
+            screenshot_oversample = int(screenshot_oversample)
+
+        # 指定随机种子后，相同参数会得到相同的截图
+        screenshot_seed = request.args.get('screenshotSeed', default='', type=str)
+
+        if screenshot_seed == '':
+            screenshot_seed = None
+        else:
+            screenshot_seed = int(screenshot_seed)
+
+        screenshot_format = request.args.get('screenshotFormat', default=get_settings('screenshot_format'), type=str)
+
+        if screenshot_format == '':
+            screenshot_format = get_settings('screenshot_format')
+
+        screenshot_quality = request.args.get('screenshotQuality', default=get_settings('screenshot_quality'),
+                                              type=str)
+
+        if screenshot_quality == '':
+            screenshot_quality = int(get_settings('screenshot_quality'))
+        else:
+            screenshot_quality = int(screenshot_quality)
+
+        screenshot_png_compression = request.args.get('screenshotPngCompression',
+                                                      default=get_settings('screenshot_png_compression'), type=str)
+
+        if screenshot_png_compression == '':
+            screenshot_png_compression = int(get_settings('screenshot_png_compression'))
+        else:
+            screenshot_png_compression = int(screenshot_png_compression)
+
+        # 取帧后端：opencv或ffmpeg
+        screenshot_backend = request.args.get('screenshotBackend', default=get_settings('screenshot_backend'),
+                                              type=str)
+
+        if screenshot_backend == '':
+            screenshot_backend = get_settings('screenshot_backend')
+
+        # 与已选截图的感知哈希距离不超过该值的候选帧视为重复
+        screenshot_dedup_distance = request.args.get('screenshotDedupDistance',
+                                                     default=get_settings('screenshot_dedup_distance'), type=str)
+
+        if screenshot_dedup_distance == '':
+            screenshot_dedup_distance = int(get_settings('screenshot_dedup_distance'))
+        else:
+            screenshot_dedup_distance = int(screenshot_dedup_distance)
+
+        screenshot_hash = request.args.get('screenshotHash', default=get_settings('screenshot_hash'), type=str)
+
+        if screenshot_hash == '':
+            screenshot_hash = get_settings('screenshot_hash')
+
+        # 大于0时按候选帧复杂度的百分位数自动确定阈值
+        screenshot_threshold_percentile = request.args.get('screenshotThresholdPercentile',
+                                                           default=get_settings('screenshot_threshold_percentile'),
+                                                           type=str)
+
+        if screenshot_threshold_percentile == '':
+            screenshot_threshold_percentile = float(get_settings('screenshot_threshold_percentile'))
+        else:
+            screenshot_threshold_percentile = float(screenshot_threshold_percentile)
+
+        # 多种输出规格，如'0x0:png,640x0:jpg:80'，每帧只解码一次，同时输出原尺寸PNG和宽640的JPEG
+        output_specs = parse_output_specs(request.args.get('outputSpecs', default='', type=str))
+
+        # 路径为剧集（短剧）文件夹时把截图分配到各集，而不是只截第一集；为true或false，缺省时使用设置
+        season_sampling = request.args.get('seasonSampling', default='', type=str)
+
+        if season_sampling == '':
+            season_sampling = bool(get_settings('screenshot_season_sampling'))
+        else:
+            season_sampling = season_sampling.lower() in ('true', '1')
+
+        # 为true时跳过结果缓存重新截图
+        bypass_cache = request.args.get('bypassCache', default='', type=str).lower() in ('true', '1')
+
         if screenshot_number > 0:
             if screenshot_number < 6:
                 if 0 < screenshot_start_percentage < 1 and 0 < screenshot_end_percentage < 1:
                     if screenshot_start_percentage < screenshot_end_percentage:
-                        is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+                        # 截图和黑边检测共用同一个VideoSession，黑边只检测一次
+                        session = VideoSession(path)
+                        is_video_path, response = session.check()  # 视频资源的路径
                         if is_video_path == 1 or is_video_path == 2:
                             video_path = response
-                            screenshot_success, response = get_screenshot(video_path, screenshot_storage_path,
-                                                                          screenshot_number,
-                                                                          screenshot_threshold,
-                                                                          screenshot_start_percentage,
-                                                                          screenshot_end_percentage,
-                                                                          screenshot_min_interval_percentage)
+                            job = request_job()
+                            auto_crop = bool(get_settings('screenshot_auto_crop'))
+                            # 整季截图时每集各自检测黑边，没有统一的裁剪区域
+                            season_sampling = season_sampling and is_video_path == 2
+                            screenshot_options = dict(screenshot_workers=screenshot_workers,
+                                                      screenshot_oversample=screenshot_oversample,
+                                                      screenshot_seed=screenshot_seed,
+                                                      screenshot_format=screenshot_format,
+                                                      screenshot_quality=screenshot_quality,
+                                                      screenshot_png_compression=screenshot_png_compression,
+                                                      use_cache=not bypass_cache,
+                                                      tone_mapping=bool(get_settings('screenshot_tone_mapping')),
+                                                      screenshot_backend=screenshot_backend,
+                                                      screenshot_dedup_distance=screenshot_dedup_distance,
+                                                      screenshot_hash=screenshot_hash,
+                                                      screenshot_threshold_percentile=screenshot_threshold_percentile,
+                                                      job=job,
+                                                      auto_crop=auto_crop,
+                                                      output_specs=output_specs)
+                            if season_sampling:
+                                screenshot_success, response = get_season_screenshot(
+                                    os.path.dirname(video_path), screenshot_storage_path, screenshot_number,
+                                    screenshot_threshold, screenshot_start_percentage, screenshot_end_percentage,
+                                    screenshot_min_interval_percentage,
+                                    season_workers=int(get_settings('screenshot_season_workers')),
+                                    **screenshot_options)
+                            else:
+                                screenshot_success, response = get_screenshot(
+                                    video_path, screenshot_storage_path, screenshot_number, screenshot_threshold,
+                                    screenshot_start_percentage, screenshot_end_percentage,
+                                    screenshot_min_interval_percentage, session=session, **screenshot_options)
+                            finish_job(job, screenshot_success, '' if screenshot_success else response[0])
 
                             if screenshot_success:
-
-                                [imagePath.replace(media_path, '') for imagePath in response]
+                                # screenshotPath为第一个规格的截图，screenshotVariants为按规格分组的全部截图
+                                variants = [[imagePath.replace(media_path, '') for imagePath in images] for images in
+                                            (response if output_specs else [response])]
 
                                 return jsonify({
                                     'data': {
-                                        'screenshotNumber': str(len(response)),
-                                        'screenshotPath': [imagePath.replace(media_path, '') for imagePath in response],
-                                        'videoPath': video_path
+                                        'screenshotNumber': str(len(variants[0])),
+                                        'screenshotPath': variants[0],
+                                        'screenshotVariants': variants,
+                                        'videoPath': video_path,
+                                        'crop': crop_to_dict(session.crop(screenshot_backend))
+                                        if auto_crop and not season_sampling else None
                                     },
                                     'message': '获取截图成功。',
                                     'statusCode': 'OK'
@@ -217,11 +358,170 @@ def api_get_screenshot():
             'message': f'获取截图失败：{e}',
             'statusCode': 'GENERAL_ERROR'
         }), 500
+    finally:
+        if session is not None:
+            session.close()
+
+
+@api.route('/api/getComparison', methods=['GET'])
+# 用于生成源和压制的对比图，传入源和压制的路径，按PTS对齐后截取同一时间点的画面，返回图片路径
+def api_get_comparison():
+    try:
+        # 从请求URL中获取参数
+        path = request.args.get('path', default='', type=str)  # 必须信息，源
+        encode_path = request.args.get('encodePath', default='', type=str)  # 必须信息，压制
+        if path == '' or encode_path == '':
+            return jsonify({
+                'data': {
+                    'comparisonNumber': '0',
+                    'comparisonPath': '',
+                    'sourcePath': '',
+                    'encodePath': ''
+                },
+                'message': '缺少源或压制的路径。',
+                'statusCode': 'MISSING_REQUIRED_PARAMETER'
+            }), 422
+
+        media_path = combine_directories('media')
+        path = os.path.abspath(os.path.join(media_path, path))
+        encode_path = os.path.abspath(os.path.join(media_path, encode_path))
+
+        # 为了保证安全，确认绝对路径为media目录
+        if not path.startswith(media_path) or not encode_path.startswith(media_path):
+            return jsonify({
+                'data': {},
+                'message': '无权访问此路径下的视频文件，请把视频文件储存在media目录下。',
+                'statusCode': 'UNAUTHORIZED_ACCESS_ERROR'
+            }), 401
+
+        video_paths = []
+        for video_path in (path, encode_path):
+            is_video_path, response = check_path_and_find_video(video_path)  # 视频资源的路径
+            if is_video_path != 1 and is_video_path != 2:
+                return jsonify({
+                    'data': {
+                        'comparisonNumber': '0',
+                        'comparisonPath': '',
+                        'sourcePath': '',
+                        'encodePath': ''
+                    },
+                    'message': f'获取视频路径失败：{response}',
+                    'statusCode': 'FILE_PATH_ERROR'
+                }), 422
+            video_paths.append(response)
+
+        screenshot_storage_path = request.args.get('screenshotStoragePath',
+                                                   default=get_settings('screenshot_storage_path'), type=str)
+        if screenshot_storage_path == '':
+            screenshot_storage_path = get_settings('screenshot_storage_path')
+
+        comparison_number = request.args.get('comparisonNumber', default=get_settings('comparison_number'), type=str)
+        if comparison_number == '':
+            comparison_number = int(get_settings('comparison_number'))
+        else:
+            comparison_number = int(comparison_number)
+
+        screenshot_start_percentage = request.args.get('screenshotStartPercentage',
+                                                       default=get_settings('screenshot_start_percentage'), type=str)
+        if screenshot_start_percentage == '':
+            screenshot_start_percentage = float(get_settings('screenshot_start_percentage'))
+        else:
+            screenshot_start_percentage = float(screenshot_start_percentage)
+
+        screenshot_end_percentage = request.args.get('screenshotEndPercentage',
+                                                     default=get_settings('screenshot_end_percentage'), type=str)
+        if screenshot_end_percentage == '':
+            screenshot_end_percentage = float(get_settings('screenshot_end_percentage'))
+        else:
+            screenshot_end_percentage = float(screenshot_end_percentage)
+
+        # pair：源和压制分别输出；side_by_side：左右拼成一张
+        comparison_mode = request.args.get('comparisonMode', default=get_settings('comparison_mode'), type=str)
+        if comparison_mode == '':
+            comparison_mode = get_settings('comparison_mode')
+
+        comparison_workers = request.args.get('comparisonWorkers', default=get_settings('comparison_workers'),
+                                              type=str)
+        if comparison_workers == '':
+            comparison_workers = int(get_settings('comparison_workers'))
+        else:
+            comparison_workers = int(comparison_workers)
+
+        # 压制相对源的额外帧偏移
+        encode_offset = request.args.get('encodeOffset', default='0', type=str)
+        if encode_offset == '':
+            encode_offset = 0
+        else:
+            encode_offset = int(encode_offset)
+
+        if comparison_number < 1 or not 0 <= screenshot_start_percentage < screenshot_end_percentage <= 1:
+            return jsonify({
+                'data': {
+                    'comparisonNumber': '0',
+                    'comparisonPath': '',
+                    'sourcePath': video_paths[0],
+                    'encodePath': video_paths[1]
+                },
+                'message': '对比数量不能小于1，起止点需在0-1之间且起始点小于终止点。',
+                'statusCode': 'VALUE_RANGE_ERROR'
+            }), 422
+
+        job = request_job()
+        comparison_success, response = get_comparison(video_paths[0], video_paths[1], screenshot_storage_path,
+                                                       comparison_number, screenshot_start_percentage,
+                                                       screenshot_end_percentage,
+                                                       comparison_mode=comparison_mode,
+                                                       comparison_workers=comparison_workers,
+                                                       encode_offset=encode_offset,
+                                                       screenshot_format=get_settings('screenshot_format'),
+                                                       screenshot_quality=int(get_settings('screenshot_quality')),
+                                                       screenshot_png_compression=int(
+                                                           get_settings('screenshot_png_compression')),
+                                                       tone_mapping=bool(get_settings('screenshot_tone_mapping')),
+                                                       screenshot_backend=get_settings('screenshot_backend'),
+                                                       auto_crop=bool(get_settings('screenshot_auto_crop')),
+                                                       job=job)
+        finish_job(job, comparison_success, '' if comparison_success else response[0])
+
+        if comparison_success:
+            return jsonify({
+                'data': {
+                    'comparisonNumber': str(len(response)),
+                    'comparisonPath': [image_path.replace(media_path, '') for image_path in response],
+                    'sourcePath': video_paths[0],
+                    'encodePath': video_paths[1]
+                },
+                'message': '获取对比图成功。',
+                'statusCode': 'OK'
+            })
+        else:
+            return jsonify({
+                'data': {
+                    'comparisonNumber': '0',
+                    'comparisonPath': '',
+                    'sourcePath': video_paths[0],
+                    'encodePath': video_paths[1]
+                },
+                'message': f'获取对比图失败：{response[0]}',
+                'statusCode': 'BACKEND_PROCESSING_ERROR'
+            }), 400
+    except Exception as e:
+        return jsonify({
+            'data': {
+                'comparisonNumber': '0',
+                'comparisonPath': '',
+                'sourcePath': '',
+                'encodePath': ''
+            },
+            'message': f'获取对比图失败：{e}',
+            'statusCode': 'GENERAL_ERROR'
+        }), 500
 
 
 @api.route('/api/getThumbnail', methods=['GET'])
 # 用于获取缩略图，传入相关参数，返回缩略图路径
 def api_get_thumbnail():
+    session = None
     try:
         # 从请求URL中获取参数
         path = request.args.get('path', default='', type=str)  # 必须信息
@@ -288,23 +588,50 @@ def api_get_thumbnail():
         else:
             screenshot_end_percentage = float(screenshot_end_percentage)
 
+        screenshot_backend = request.args.get('screenshotBackend', default=get_settings('screenshot_backend'),
+                                              type=str)
+        if screenshot_backend == '':
+            screenshot_backend = get_settings('screenshot_backend')
+
+        output_specs = parse_output_specs(request.args.get('outputSpecs', default='', type=str))
+
+        # 为true时跳过结果缓存重新生成缩略图
+        bypass_cache = request.args.get('bypassCache', default='', type=str).lower() in ('true', '1')
+
         if thumbnail_rows > 0 and thumbnail_cols > 0:
             if 0 < screenshot_start_percentage < 1 and 0 < screenshot_end_percentage < 1:
                 if screenshot_start_percentage < screenshot_end_percentage:
-                    is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+                    session = VideoSession(path)
+                    is_video_path, response = session.check()  # 视频资源的路径
                     if is_video_path == 1 or is_video_path == 2:
                         video_path = response
+                        job = request_job()
+                        auto_crop = bool(get_settings('screenshot_auto_crop'))
                         get_thumbnail_success, response = get_thumbnail(video_path, screenshot_storage_path,
                                                                         thumbnail_rows,
                                                                         thumbnail_cols, screenshot_start_percentage,
-                                                                        screenshot_end_percentage)
+                                                                        screenshot_end_percentage,
+                                                                        use_cache=not bypass_cache,
+                                                                        tone_mapping=bool(
+                                                                            get_settings('screenshot_tone_mapping')),
+                                                                        screenshot_backend=screenshot_backend,
+                                                                        keyframe_only=bool(get_settings('thumbnail_keyframe_only')),
+                                                                        job=job,
+                                                                        session=session,
+                                                                        auto_crop=auto_crop,
+                                                                        output_specs=output_specs)
+                        finish_job(job, get_thumbnail_success, '' if get_thumbnail_success else response)
 
                         if get_thumbnail_success:
-                            thumbnail_path = response
+                            # thumbnailPath为第一个规格的缩略图，thumbnailVariants为全部规格的缩略图
+                            thumbnail_variants = response if output_specs else [response]
+                            thumbnail_path = thumbnail_variants[0]
                             return jsonify({
                                 'data': {
                                     'thumbnailPath': thumbnail_path,
-                                    'videoPath': video_path
+                                    'thumbnailVariants': thumbnail_variants,
+                                    'videoPath': video_path,
+                                    'crop': crop_to_dict(session.crop(screenshot_backend)) if auto_crop else None
                                 },
                                 'message': '获取截图成功。',
                                 'statusCode': 'OK'
@@ -363,6 +690,183 @@ def api_get_thumbnail():
             'message': f'获取截图失败：{e}',
             'statusCode': 'GENERAL_ERROR'
         }), 500
+    finally:
+        if session is not None:
+            session.close()
+
+
+@api.route('/api/getPreviewClip', methods=['GET'])
+# 用于获取动图预览，截取一小段视频抽帧、缩小后编码为WebP（GIF）动图，返回动图路径
+def api_get_preview_clip():
+    session = None
+    try:
+        # 从请求URL中获取参数
+        path = request.args.get('path', default='', type=str)  # 必须信息
+        media_path = combine_directories('media')
+        path = os.path.abspath(os.path.join(media_path, path))
+
+        # 为了保证安全，确认绝对路径为media目录
+        if not path.startswith(media_path):
+            return jsonify({
+                'data': {},
+                'message': '无权访问此路径下的视频文件，请把视频文件储存在media目录下。',
+                'statusCode': 'UNAUTHORIZED_ACCESS_ERROR'
+            }), 401
+
+        if path == '':
+            return jsonify({
+                'data': {
+                    'previewPath': '',
+                    'videoPath': ''
+                },
+                'message': '缺少资源路径。',
+                'statusCode': 'MISSING_REQUIRED_PARAMETER'
+            }), 422
+
+        if not os.path.exists(path):
+            return jsonify({
+                'data': {
+                    'previewPath': '',
+                    'videoPath': ''
+                },
+                'message': '您提供的文件路径不存在。',
+                'statusCode': 'FILE_PATH_ERROR'
+            }), 422
+
+        screenshot_storage_path = request.args.get('screenshotStoragePath',
+                                                   default=get_settings('screenshot_storage_path'), type=str)
+
+        if screenshot_storage_path == '':
+            screenshot_storage_path = get_settings('screenshot_storage_path')
+
+        # 片段起点在视频中的占比
+        preview_position = request.args.get('previewPosition', default=get_settings('preview_position'), type=str)
+        if preview_position == '':
+            preview_position = float(get_settings('preview_position'))
+        else:
+            preview_position = float(preview_position)
+
+        # 片段时长（秒）
+        preview_duration = request.args.get('previewDuration', default=get_settings('preview_duration'), type=str)
+        if preview_duration == '':
+            preview_duration = float(get_settings('preview_duration'))
+        else:
+            preview_duration = float(preview_duration)
+
+        preview_fps = request.args.get('previewFps', default=get_settings('preview_fps'), type=str)
+        if preview_fps == '':
+            preview_fps = float(get_settings('preview_fps'))
+        else:
+            preview_fps = float(preview_fps)
+
+        preview_width = request.args.get('previewWidth', default=get_settings('preview_width'), type=str)
+        if preview_width == '':
+            preview_width = int(get_settings('preview_width'))
+        else:
+            preview_width = int(preview_width)
+
+        # webp或gif
+        preview_format = request.args.get('previewFormat', default=get_settings('preview_format'), type=str)
+        if preview_format == '':
+            preview_format = get_settings('preview_format')
+
+        preview_quality = request.args.get('previewQuality', default=get_settings('preview_quality'), type=str)
+        if preview_quality == '':
+            preview_quality = int(get_settings('preview_quality'))
+        else:
+            preview_quality = int(preview_quality)
+
+        # 动图大小上限（KB），为0时不限制
+        preview_max_size = request.args.get('previewMaxSize', default=get_settings('preview_max_size'), type=str)
+        if preview_max_size == '':
+            preview_max_size = int(get_settings('preview_max_size'))
+        else:
+            preview_max_size = int(preview_max_size)
+
+        screenshot_backend = request.args.get('screenshotBackend', default=get_settings('screenshot_backend'),
+                                              type=str)
+        if screenshot_backend == '':
+            screenshot_backend = get_settings('screenshot_backend')
+
+        if preview_duration > 0 and preview_fps > 0:
+            if 0 <= preview_position < 1:
+                session = VideoSession(path)
+                is_video_path, response = session.check()  # 视频资源的路径
+                if is_video_path == 1 or is_video_path == 2:
+                    video_path = response
+                    job = request_job()
+                    get_preview_clip_success, response = get_preview_clip(video_path, screenshot_storage_path,
+                                                                          preview_position, preview_duration,
+                                                                          preview_fps, preview_width,
+                                                                          preview_format, preview_quality,
+                                                                          preview_max_size * 1024,
+                                                                          tone_mapping=bool(
+                                                                              get_settings('screenshot_tone_mapping')),
+                                                                          screenshot_backend=screenshot_backend,
+                                                                          session=session,
+                                                                          auto_crop=bool(
+                                                                              get_settings('screenshot_auto_crop')),
+                                                                          job=job)
+                    finish_job(job, get_preview_clip_success, '' if get_preview_clip_success else response)
+
+                    if get_preview_clip_success:
+                        return jsonify({
+                            'data': {
+                                'previewPath': response,
+                                'previewSize': os.path.getsize(response),
+                                'videoPath': video_path
+                            },
+                            'message': '获取预览成功。',
+                            'statusCode': 'OK'
+                        })
+                    else:
+                        return jsonify({
+                            'data': {
+                                'previewPath': '',
+                                'videoPath': video_path
+                            },
+                            'message': f'获取预览失败：{response}',
+                            'statusCode': 'BACKEND_PROCESSING_ERROR'
+                        }), 400
+                else:
+                    return jsonify({
+                        'data': {
+                            'previewPath': '',
+                            'videoPath': ''
+                        },
+                        'message': f'获取视频路径失败：{response}',
+                        'statusCode': 'BACKEND_PROCESSING_ERROR'
+                    }), 400
+            else:
+                return jsonify({
+                    'data': {
+                        'previewPath': '',
+                        'videoPath': ''
+                    },
+                    'message': '预览起点不能小于0或大于等于1。',
+                    'statusCode': 'VALUE_RANGE_ERROR'
+                }), 422
+        else:
+            return jsonify({
+                'data': {
+                    'previewPath': '',
+                    'videoPath': ''
+                },
+                'message': '预览时长和帧率均需要大于0。',
+                'statusCode': 'VALUE_RANGE_ERROR'
+            }), 422
+    except Exception as e:
+        return jsonify({
+            'data': {
+                'previewPath': '',
+                'videoPath': ''
+            },
+            'message': f'获取预览失败：{e}',
+            'statusCode': 'GENERAL_ERROR'
+        }), 500
+    finally:
+        if session is not None:
+            session.close()
 
 
 @api.route('/api/uploadPicture', methods=['POST'])
@@ -466,10 +970,13 @@ def api_get_media_info():
                 'statusCode': 'FILE_PATH_ERROR'
             }), 422
 
+        # 为true时跳过MediaInfo缓存重新解析文件
+        bypass_cache = request.args.get('bypassCache', default='', type=str).lower() in ('true', '1')
+
         is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
         if is_video_path == 1 or is_video_path == 2:
             video_path = response
-            get_media_info_success, response = get_media_info(video_path)
+            get_media_info_success, response = get_media_info(video_path, use_cache=not bypass_cache)
             if get_media_info_success:
                 media_info = response
                 return jsonify({
@@ -558,10 +1065,13 @@ def api_get_video_info():
                 'statusCode': 'FILE_PATH_ERROR'
             }), 422
 
+        # 为true时跳过MediaInfo缓存重新解析文件
+        bypass_cache = request.args.get('bypassCache', default='', type=str).lower() in ('true', '1')
+
         is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
         if is_video_path == 1 or is_video_path == 2:
             video_path = response
-            get_video_info_success, response = get_video_info(video_path)
+            get_video_info_success, response = get_video_info(video_path, use_cache=not bypass_cache)
             if get_video_info_success:
                 print('获取到关键参数：' + str(response))
                 video_format = response[0]
@@ -637,6 +1147,117 @@ def api_get_video_info():
         }), 500
 
 
+@api.route('/api/getMediaAnalysis', methods=['GET'])
+# 用于一次获取MediaInfo文本、视频关键参数和结构化的轨道信息，传入一个文件地址或者一个文件夹地址，只解析一次
+def api_get_media_analysis():
+    try:
+        # 从请求URL中获取path
+        path = request.args.get('path', default='', type=str)  # 必须信息
+        media_path = combine_directories('media')
+        path = os.path.abspath(os.path.join(media_path, path))
+        # 为了安全，确认绝对路径media目录
+        if not path.startswith(media_path):
+            return jsonify({
+                'data': {},
+                'message': '无权访问此文件。',
+                'statusCode': 'UNAUTHORIZED_ACCESS_ERROR'
+            }), 401
+        if path == '':
+            return jsonify({
+                'data': {
+                    'mediaInfo': '',
+                    'videoInfo': {},
+                    'fields': {},
+                    'videoPath': ''
+                },
+                'message': '缺少资源路径。',
+                'statusCode': 'MISSING_REQUIRED_PARAMETER'
+            }), 422
+
+        if not os.path.exists(path):
+            return jsonify({
+                'data': {
+                    'mediaInfo': '',
+                    'videoInfo': {},
+                    'fields': {},
+                    'videoPath': ''
+                },
+                'message': '您提供的资源路径不存在。',
+                'statusCode': 'FILE_PATH_ERROR'
+            }), 422
+
+        # 为true时跳过MediaInfo缓存重新解析文件
+        bypass_cache = request.args.get('bypassCache', default='', type=str).lower() in ('true', '1')
+
+        is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+        if is_video_path == 1 or is_video_path == 2:
+            video_path = response
+            analyze_media_success, response = analyze_media(video_path, use_cache=not bypass_cache)
+            if analyze_media_success:
+                video_info = response['video_info']
+                fields = response['fields']
+                return jsonify({
+                    'data': {
+                        'mediaInfo': response['media_info'],
+                        # 与/api/getVideoInfo相同的关键参数
+                        'videoInfo': {
+                            'videoFormat': video_info[0],
+                            'videoCodec': video_info[1],
+                            'bitDepth': video_info[2],
+                            'hdrFormat': video_info[3],
+                            'frameRate': video_info[4],
+                            'audioCodec': video_info[5],
+                            'channels': video_info[6],
+                            'audioNum': video_info[7],
+                            'tags': video_info[8]
+                        },
+                        'fields': {
+                            'general': {to_camel_case(key): value for key, value in fields['general'].items()},
+                            'video': [{to_camel_case(key): value for key, value in track.items()}
+                                      for track in fields['video']],
+                            'audio': [{to_camel_case(key): value for key, value in track.items()}
+                                      for track in fields['audio']]
+                        },
+                        'videoPath': video_path
+                    },
+                    'message': '获取媒体分析成功。',
+                    'statusCode': 'OK'
+                })
+            else:
+                return jsonify({
+                    'data': {
+                        'mediaInfo': '',
+                        'videoInfo': {},
+                        'fields': {},
+                        'videoPath': video_path
+                    },
+                    'message': f'获取视频路径成功，但是分析媒体信息失败，错误：{response}。',
+                    'statusCode': 'BACKEND_PROCESSING_ERROR'
+                }), 400
+        else:
+            return jsonify({
+                'data': {
+                    'mediaInfo': '',
+                    'videoInfo': {},
+                    'fields': {},
+                    'videoPath': ''
+                },
+                'message': f'获取视频路径失败：{response}。',
+                'statusCode': 'BACKEND_PROCESSING_ERROR'
+            }), 400
+    except Exception as e:
+        return jsonify({
+            'data': {
+                'mediaInfo': '',
+                'videoInfo': {},
+                'fields': {},
+                'videoPath': ''
+            },
+            'message': f'获取媒体分析失败，错误：{e}。',
+            'statusCode': 'GENERAL_ERROR'
+        }), 500
+
+
 @api.route('/api/getPtGenDescription', methods=['GET'])
 # 用于获取PT-Gen简介，传入一个豆瓣链接，返回PT-Gen简介
 def api_get_pt_gen_description():
@@ -829,7 +1450,9 @@ def api_make_torrent():
         if torrent_storage_path == '':
             torrent_storage_path = get_settings('torrent_storage_path')
 
-        make_torrent_success, response = make_torrent(path, torrent_storage_path)
+        job = request_job()
+        make_torrent_success, response = make_torrent(path, torrent_storage_path, job=job)
+        finish_job(job, make_torrent_success, '' if make_torrent_success else response)
         if make_torrent_success:
             return jsonify({
                 'data': {
@@ -856,6 +1479,73 @@ def api_make_torrent():
         }), 500
 
 
+@api.route('/api/getJob', methods=['GET'])
+# 用于查询任务进度，任务在调用截图、缩略图、制作种子等接口时通过jobId参数创建
+def api_get_job():
+    try:
+        job_id = request.args.get('jobId', default='', type=str)  # 必须信息
+        if job_id == '':
+            return jsonify({
+                'data': {},
+                'message': '缺少任务ID。',
+                'statusCode': 'MISSING_REQUIRED_PARAMETER'
+            }), 422
+
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({
+                'data': {},
+                'message': f'任务不存在：{job_id}。',
+                'statusCode': 'BACKEND_PROCESSING_ERROR'
+            }), 404
+
+        return jsonify({
+            'data': {to_camel_case(key): value for key, value in job.as_dict().items()},
+            'message': '获取任务进度成功。',
+            'statusCode': 'OK'
+        })
+    except Exception as e:
+        return jsonify({
+            'data': {},
+            'message': f'获取任务进度失败：{e}。',
+            'statusCode': 'GENERAL_ERROR'
+        }), 500
+
+
+@api.route('/api/cancelJob', methods=['POST'])
+# 用于取消正在进行的任务，任务在下一帧（或下一批数据）处理完后停止
+def api_cancel_job():
+    try:
+        job_id = request.args.get('jobId', default='', type=str)  # 必须信息
+        if job_id == '':
+            return jsonify({
+                'data': {},
+                'message': '缺少任务ID。',
+                'statusCode': 'MISSING_REQUIRED_PARAMETER'
+            }), 422
+
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({
+                'data': {},
+                'message': f'任务不存在：{job_id}。',
+                'statusCode': 'BACKEND_PROCESSING_ERROR'
+            }), 404
+
+        job.cancel()
+        return jsonify({
+            'data': {to_camel_case(key): value for key, value in job.as_dict().items()},
+            'message': '已请求取消任务。',
+            'statusCode': 'OK'
+        })
+    except Exception as e:
+        return jsonify({
+            'data': {},
+            'message': f'取消任务失败：{e}。',
+            'statusCode': 'GENERAL_ERROR'
+        }), 500
+
+
 @api.route('/api/getNameFromTemplate', methods=['GET'])
 # 用于通过模板数据获取命名，关键参数和模板，返回获取到的命名
 def api_get_name_from_template():
@@ -1853,6 +2543,8 @@ def convert_size(size_bytes):
 @api.route('/api/autoHandleVideo', methods=['GET'])
 # 用于获取MediaInfo，传入一个文件地址或者一个文件夹地址，返回视频文件路径和MediaInfo
 def api_auto_handle_movie():
+    session = None
+    job = None
     try:
         resource_url = request.args.get('resourceUrl', default='', type=str)  # 必须信息
         path = request.args.get('path', default='', type=str)  # 必须信息
@@ -1861,6 +2553,10 @@ def api_auto_handle_movie():
         category = request.args.get('category', default='', type=str)  # 必须信息
         season = request.args.get('season', default='1', type=str)
         episodes_start_number = request.args.get('episodesStartNumber', default='1', type=str)
+        # 可选，压制所用的源，提供时生成对比图并填入comparisons
+        comparison_source_path = request.args.get('comparisonSourcePath', default='', type=str)
+        # 为true时跳过截图和缩略图的结果缓存重新生成
+        bypass_cache = request.args.get('bypassCache', default='', type=str).lower() in ('true', '1')
 
         if season == '':
             season = '1'
@@ -1872,7 +2568,10 @@ def api_auto_handle_movie():
         # 为了保证安全，只能访问media目录下的资源
         media_path = combine_directories('media')
         path = os.path.abspath(os.path.join(media_path, path))
-        if not path.startswith(media_path):
+        if comparison_source_path != '':
+            comparison_source_path = os.path.abspath(os.path.join(media_path, comparison_source_path))
+        if not path.startswith(media_path) or (comparison_source_path != '' and
+                                               not comparison_source_path.startswith(media_path)):
             return jsonify({
                 'data': {},
                 'message': '无权访问此路径下的视频文件，请把视频文件储存在media目录下。',
@@ -1929,6 +2628,8 @@ def api_auto_handle_movie():
             category: str
             '''声道数'''
             channels: str
+            '''对比图，auto_feed的comparisons字段'''
+            comparisons: str
             '''简介'''
             description: str
             '''豆瓣链接'''
@@ -1969,6 +2670,7 @@ def api_auto_handle_movie():
             bit_depth='',
             category='',
             channels='',
+            comparisons='',
             description='',
             douban_url='',
             file_name='',
@@ -2002,6 +2704,18 @@ def api_auto_handle_movie():
         screenshot_start_percentage = float(get_settings('screenshot_start_percentage'))
         screenshot_end_percentage = float(get_settings('screenshot_end_percentage'))
         screenshot_min_interval_percentage = 0.01
+        screenshot_workers = int(get_settings('screenshot_workers'))
+        screenshot_oversample = int(get_settings('screenshot_oversample'))
+        screenshot_format = get_settings('screenshot_format')
+        screenshot_quality = int(get_settings('screenshot_quality'))
+        screenshot_png_compression = int(get_settings('screenshot_png_compression'))
+        screenshot_tone_mapping = bool(get_settings('screenshot_tone_mapping'))
+        screenshot_backend = get_settings('screenshot_backend')
+        thumbnail_keyframe_only = bool(get_settings('thumbnail_keyframe_only'))
+        screenshot_dedup_distance = int(get_settings('screenshot_dedup_distance'))
+        screenshot_hash = get_settings('screenshot_hash')
+        screenshot_threshold_percentile = float(get_settings('screenshot_threshold_percentile'))
+        screenshot_auto_crop = bool(get_settings('screenshot_auto_crop'))
         picture_bed_api_url = get_settings('picture_bed_api_url')
         picture_bed_api_token = get_settings('picture_bed_api_token')
         thumbnail_rows = int(get_settings('thumbnail_rows'))
@@ -2009,6 +2723,10 @@ def api_auto_handle_movie():
         do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
         delete_screenshot = bool(get_settings('delete_screenshot'))
 
+        # 各步骤共用同一个VideoSession：路径只解析一次，MediaInfo只解析一次，截图和缩略图共用一个取帧后端
+        session = VideoSession(path)
+        job = request_job()
+
         # 获取pt_gen简介
         get_pt_gen_description_success, response = get_pt_gen_description(pt_gen_api_url, resource_url)
         if not get_pt_gen_description_success:
@@ -2025,7 +2743,7 @@ def api_auto_handle_movie():
             if screenshot_number < 6:
                 if 0 < screenshot_start_percentage < 1 and 0 < screenshot_end_percentage < 1:
                     if screenshot_start_percentage < screenshot_end_percentage:
-                        is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+                        is_video_path, response = session.check()  # 视频资源的路径
                         if is_video_path == 1 or is_video_path == 2:
                             video_path = response
                             screenshot_success, response = get_screenshot(video_path, screenshot_storage_path,
@@ -2033,34 +2751,42 @@ def api_auto_handle_movie():
                                                                           screenshot_threshold,
                                                                           screenshot_start_percentage,
                                                                           screenshot_end_percentage,
-                                                                          screenshot_min_interval_percentage)
+                                                                          screenshot_min_interval_percentage,
+                                                                          screenshot_workers=screenshot_workers,
+                                                                          screenshot_oversample=screenshot_oversample,
+                                                                          screenshot_format=screenshot_format,
+                                                                          screenshot_quality=screenshot_quality,
+                                                                          screenshot_png_compression=screenshot_png_compression,
+                                                                          in_memory=delete_screenshot,
+                                                                          use_cache=not bypass_cache,
+                                                                          tone_mapping=screenshot_tone_mapping,
+                                                                          screenshot_backend=screenshot_backend,
+                                                                          session=session,
+                                                                          job=job,
+                                                                          screenshot_dedup_distance=screenshot_dedup_distance,
+                                                                          screenshot_hash=screenshot_hash,
+                                                                          screenshot_threshold_percentile=screenshot_threshold_percentile,
+                                                                          auto_crop=screenshot_auto_crop)
 
                             if screenshot_success:
-                                # 获取截图成功了
-                                picture_paths = response
-                                for picture_path in picture_paths:
+                                # 获取截图成功了，不保留截图时截图只存在于内存中，直接上传
+                                pictures = response if delete_screenshot else [(picture_path, None) for picture_path
+                                                                               in response]
+                                for picture_path, picture_data in pictures:
                                     # 开始逐个上传截图
                                     upload_picture_success, response = upload_picture(picture_bed_api_url,
                                                                                       picture_bed_api_token,
-                                                                                      picture_path)
+                                                                                      picture_path, picture_data)
                                     if not upload_picture_success:
                                         # 一次不成功，再试一次
                                         upload_picture_success, response = upload_picture(picture_bed_api_url,
                                                                                           picture_bed_api_token,
-                                                                                          picture_path)
+                                                                                          picture_path, picture_data)
                                         if not upload_picture_success:
                                             raise RuntimeError(f'上传图片到图床失败：{response}')
                                     # 上传截图成功，把截图bbs_url粘贴到简介后面
                                     picture_bbs_url = response
                                     data_instance.description += '\n' + picture_bbs_url
-                                    # 是否删除截图
-                                    if delete_screenshot:
-                                        if os.path.exists(picture_path):
-                                            # 删除文件
-                                            os.remove(picture_path)
-                                            print(f'文件 {picture_path} 已被删除。')
-                                        else:
-                                            print(f'文件 {picture_path} 不存在。')
                             else:
                                 raise RuntimeError(f'截图失败：{response[0]}')
                         else:
@@ -2081,36 +2807,36 @@ def api_auto_handle_movie():
             if thumbnail_rows > 0 and thumbnail_cols > 0:
                 if 0 < screenshot_start_percentage < 1 and 0 < screenshot_end_percentage < 1:
                     if screenshot_start_percentage < screenshot_end_percentage:
-                        is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+                        is_video_path, response = session.check()  # 视频资源的路径
                         if is_video_path == 1 or is_video_path == 2:
                             video_path = response
                             get_thumbnail_success, response = get_thumbnail(video_path, screenshot_storage_path,
                                                                             thumbnail_rows,
                                                                             thumbnail_cols, screenshot_start_percentage,
-                                                                            screenshot_end_percentage)
+                                                                            screenshot_end_percentage,
+                                                                            in_memory=delete_screenshot,
+                                                                            use_cache=not bypass_cache,
+                                                                            tone_mapping=screenshot_tone_mapping,
+                                                                            screenshot_backend=screenshot_backend,
+                                                                            keyframe_only=thumbnail_keyframe_only,
+                                                                            auto_crop=screenshot_auto_crop,
+                                                                            session=session,
+                                                                            job=job)
                             if get_thumbnail_success:
-                                thumbnail_path = response
+                                thumbnail_path, thumbnail_data = response if delete_screenshot else (response, None)
                                 upload_picture_success, response = upload_picture(picture_bed_api_url,
                                                                                   picture_bed_api_token,
-                                                                                  thumbnail_path)
+                                                                                  thumbnail_path, thumbnail_data)
                                 if not upload_picture_success:
                                     # 一次不成功，再试一次
                                     upload_picture_success, response = upload_picture(picture_bed_api_url,
                                                                                       picture_bed_api_token,
-                                                                                      thumbnail_path)
+                                                                                      thumbnail_path, thumbnail_data)
                                     if not upload_picture_success:
                                         raise RuntimeError(f'上传图片到图床失败：{response}')
                                 # 上传截图成功，把缩略图bbs_url粘贴到简介后面
                                 thumbnail_bbs_url = response
                                 data_instance.description += '\n' + thumbnail_bbs_url
-                                # 是否删除截图
-                                if delete_screenshot:
-                                    if os.path.exists(thumbnail_path):
-                                        # 删除文件
-                                        os.remove(thumbnail_path)
-                                        print(f'文件 {thumbnail_path} 已被删除。')
-                                    else:
-                                        print(f'文件 {thumbnail_path} 不存在。')
                             else:
                                 raise RuntimeError(f'生成缩略图失败：{response}')
                         else:
@@ -2124,11 +2850,47 @@ def api_auto_handle_movie():
             else:
                 raise ValueError(f'缩略图的行列数均需要大于0，您设置的行数为{thumbnail_rows}，列数为{thumbnail_cols}')
 
+        if comparison_source_path != '':
+            # 生成源和压制的对比图，逐对上传后整理为comparisons字段
+            is_video_path, response = check_path_and_find_video(comparison_source_path)  # 源的路径
+            if is_video_path != 1 and is_video_path != 2:
+                raise ValueError(f'源的路径不正确：{response}')
+            comparison_success, response = get_comparison(response, session.video_path, screenshot_storage_path,
+                                                           int(get_settings('comparison_number')),
+                                                           screenshot_start_percentage, screenshot_end_percentage,
+                                                           comparison_workers=int(get_settings('comparison_workers')),
+                                                           screenshot_format=screenshot_format,
+                                                           screenshot_quality=screenshot_quality,
+                                                           screenshot_png_compression=screenshot_png_compression,
+                                                           in_memory=delete_screenshot,
+                                                           tone_mapping=screenshot_tone_mapping,
+                                                           screenshot_backend=screenshot_backend,
+                                                           auto_crop=screenshot_auto_crop,
+                                                           job=job)
+            if not comparison_success:
+                raise RuntimeError(f'生成对比图失败：{response[0]}')
+            picture_urls = []
+            pictures = response if delete_screenshot else [(picture_path, None) for picture_path in response]
+            for picture_path, picture_data in pictures:
+                upload_picture_success, response = upload_picture(picture_bed_api_url, picture_bed_api_token,
+                                                                  picture_path, picture_data)
+                if not upload_picture_success:
+                    # 一次不成功，再试一次
+                    upload_picture_success, response = upload_picture(picture_bed_api_url, picture_bed_api_token,
+                                                                      picture_path, picture_data)
+                    if not upload_picture_success:
+                        raise RuntimeError(f'上传图片到图床失败：{response}')
+                picture_urls.append(response)
+            data_instance.comparisons = format_comparisons(picture_urls)
+
+        # 取帧的步骤已经完成，释放打开的视频（保留已解析的MediaInfo）。Windows下文件被打开时无法移动和重命名
+        session.close()
+
         # 获取VideoInfo
-        is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+        is_video_path, response = session.check()  # 视频资源的路径
         if is_video_path == 1 or is_video_path == 2:
             video_path = response
-            get_video_info_success, response = get_video_info(video_path)
+            get_video_info_success, response = get_video_info(video_path, session.media_info)
             if get_video_info_success:
                 print('获取到VideoInfo：' + str(response))
                 data_instance.video_format = response[0]
@@ -2177,7 +2939,7 @@ def api_auto_handle_movie():
         total_episodes = ''
         episodes_num = 0
         if category == 'TV':
-            is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+            is_video_path, response = session.check()  # 视频资源的路径
             if is_video_path == 2:  # 视频路径是文件夹
                 get_video_files_success, video_files = get_video_files(path)  # 获取文件夹内部的所有文件
                 if get_video_files_success:
@@ -2241,7 +3003,7 @@ def api_auto_handle_movie():
 
         if category == 'Movie':
             # 给文件或者文件夹重命名
-            is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+            is_video_path, response = session.check()  # 视频资源的路径
             if is_video_path == 1 or is_video_path == 2:
                 file_path = response
                 if is_video_path == 1:
@@ -2259,7 +3021,7 @@ def api_auto_handle_movie():
                     if rename_success:
                         new_folder_path = response
                         print(f'新的文件夹路径：{new_folder_path}')
-                        is_video_path, response = check_path_and_find_video(new_folder_path)  # 视频资源的路径
+                        is_video_path, response = session.relocate(new_folder_path)  # 视频资源的路径
                         if is_video_path == 2:
                             file_path = response
                     else:
@@ -2282,7 +3044,7 @@ def api_auto_handle_movie():
                 raise ValueError(f'影片资源的路径不正确：{response}')
         if category == 'TV':
             # 给剧集重命名
-            is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
+            is_video_path, response = session.check()  # 视频资源的路径
             if is_video_path == 2:  # 视频路径是文件夹
                 get_video_files_success, video_files = get_video_files(path)  # 获取文件夹内部的所有文件
                 i = episodes_start_number
@@ -2314,11 +3076,11 @@ def api_auto_handle_movie():
             else:
                 raise ValueError(f'剧集资源的路径不正确，必须是文件夹：{response}')
 
-        # 获取MediaInfo
-        is_video_path, response = check_path_and_find_video(path)  # 资源的路径
+        # 获取MediaInfo，文件已被重命名，重新解析路径；仍是同一个文件时沿用已解析的MediaInfo
+        is_video_path, response = session.relocate(path)  # 资源的路径
         if is_video_path == 1 or is_video_path == 2:
             video_path = response
-            get_media_info_success, response = get_media_info(video_path)
+            get_media_info_success, response = get_media_info(video_path, session.media_info)
             if get_media_info_success:
                 data_instance.media_info = response
                 # print(f'成功获取MediaInfo：\n{data_instance.media_info}')
@@ -2341,7 +3103,7 @@ def api_auto_handle_movie():
         # 开始制作种子
         torrent_storage_path = get_settings('torrent_storage_path')
 
-        make_torrent_success, response = make_torrent(path, torrent_storage_path)
+        make_torrent_success, response = make_torrent(path, torrent_storage_path, job=job)
         if make_torrent_success:
             torrent_path = response
             # 动态生成文件下载链接
@@ -2351,6 +3113,8 @@ def api_auto_handle_movie():
         else:
             raise RuntimeError(f'制作种子失败：{response}')
 
+        finish_job(job, True)
+
         return jsonify({
             'data': convert_to_camel_case(data_instance),
             'message': '获取成功。',
@@ -2358,6 +3122,7 @@ def api_auto_handle_movie():
         }), 200
 
     except ValueError as e:
+        finish_job(job, False, str(e))
         return jsonify({
             'data': {},
             'message': f'您提供的参数有误：{str(e)}。',
@@ -2365,6 +3130,7 @@ def api_auto_handle_movie():
         }), 422
 
     except RuntimeError as e:
+        finish_job(job, False, str(e))
         return jsonify({
             'data': {},
             'message': f'自动处理视频资源失败：{str(e)}。',
@@ -2372,8 +3138,13 @@ def api_auto_handle_movie():
         }), 500
 
     except Exception as e:
+        finish_job(job, False, str(e))
         return jsonify({
             'data': {},
             'message': f'自动处理视频文件时发生了意外错误：{str(e)}。',
             'statusCode': 'GENERAL_ERROR'
         }), 500
+
+    finally:
+        if session is not None:
+            session.close()
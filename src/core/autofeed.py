@@ -4,8 +4,9 @@ from urllib.parse import quote
 from src.core.tool import get_settings, base64encoding, get_data_from_pt_gen_description
 
 
+# comparisons：对比图，format_comparisons()生成的[comparison=...]...[/comparison]，填入{对比图}
 def get_auto_feed_link(main_title, second_title, description, media_info, file_name, team, source, category,
-                       torrent_url):
+                       torrent_url, comparisons=''):
     auto_feed_link = str(get_settings('auto_feed_link'))
     torrent_name = f'{file_name}.torrent'  # 种子名称
     print('变量初始化完成')
@@ -49,6 +50,7 @@ def get_auto_feed_link(main_title, second_title, description, media_info, file_n
     auto_feed_link = auto_feed_link.replace('{媒介}', quote(medium_sel))
     auto_feed_link = auto_feed_link.replace('{小组}', quote(team))
     auto_feed_link = auto_feed_link.replace('{种子链接}', quote(torrent_url))
+    auto_feed_link = auto_feed_link.replace('{对比图}', quote(comparisons))
     # auto_feed_link = auto_feed_link.replace('%', '%25')
     # auto_feed_link = auto_feed_link.replace('　', '%E3%80%80')
     # auto_feed_link = auto_feed_link.replace(' ', '%20')
@@ -0,0 +1,240 @@
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from src.core.crop import apply_crop, detect_crop
+from src.core.keyframe import get_keyframe_index
+from src.core.media_info_cache import parse_media_info
+from src.core.screenshot import FRAME_SOURCE_BACKENDS, IMAGE_FORMATS, JOB_POLL_INTERVAL, get_video_hdr_transfer, \
+    open_frame_source, probe_frame_rate_and_count, write_image
+from src.core.tone_map import get_tone_mapper
+
+# pair：每个时间点输出源和压制各一张；side_by_side：左右拼成一张，压制缩放到源的尺寸
+COMPARISON_MODES = ('pair', 'side_by_side')
+COMPARISON_LABELS = ('Source', 'Encode')
+# 左右拼接时标签文字的高度占画面高度的比例
+COMPARISON_LABEL_RATIO = 0.04
+
+
+def probe_start_time(video_path, media_info=None):
+    """第一条视频轨第一帧的PTS（秒），取自MediaInfo的Delay；TS/M2TS常见非零的起始时间，没有时为0"""
+    if media_info is None:
+        media_info = parse_media_info(video_path)
+    for track in media_info.video_tracks:
+        try:
+            return float(track.delay or 0) / 1000
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+def comparison_timestamps(source_range, encode_range, count, start, end):
+    """
+    在两个文件PTS的重叠范围内，于[start, end]占比区间均匀取count个时间点（取每段的中点）。
+
+    参数:
+    source_range、encode_range (tuple): 各文件的(起始PTS, 结束PTS)，单位秒
+
+    返回:
+    list[float]: 升序的PTS，重叠范围为空时为[]
+    """
+    overlap_start = max(source_range[0], encode_range[0])
+    overlap_end = min(source_range[1], encode_range[1])
+    if count <= 0 or overlap_end <= overlap_start:
+        return []
+    low = overlap_start + (overlap_end - overlap_start) * start
+    high = overlap_start + (overlap_end - overlap_start) * end
+    return [low + (high - low) * (i + 0.5) / count for i in range(count)]
+
+
+def pts_to_frame_number(timestamp, fps, start_time, total_frames, offset=0):
+    """PTS对应的帧号：按帧率换算为距第一帧的帧数并取最近的一帧，offset为额外的帧偏移"""
+    frame_number = int(round((timestamp - start_time) * fps)) + offset
+    return min(max(frame_number, 0), total_frames - 1)
+
+
+def _read_frames(video_path, backend, frame_numbers, keyframe_index=None):
+    # 子进程入口，每个进程打开自己的取帧后端，关键帧索引由父进程读取后传入；对比图要求两边是同一帧，不对齐到关键帧
+    source = open_frame_source(video_path, backend, keyframe_index)
+    try:
+        frames = []
+        for frame_number in frame_numbers:
+            ret, frame = source.read(frame_number)
+            frames.append(frame if ret else None)
+        return frames
+    finally:
+        source.close()
+
+
+def _read_both(videos, backend, workers, job=None):
+    """
+    读取两个文件各自的帧。workers大于1时每个文件的帧号切成workers//2段（至少1段），交给进程池并行解码，
+    源和压制同时进行；结果按原顺序拼接。每个文件的关键帧索引只在父进程读取一次，各子进程不再重复扫描。
+
+    参数:
+    videos (list[tuple]): [(视频路径, 帧号列表)]
+
+    返回:
+    list[list]: 与videos对应的帧列表，读取失败的为None
+    """
+    keyframe_indexes = [get_keyframe_index(video_path) for video_path, _ in videos]
+    if workers <= 1:
+        results = []
+        for (video_path, frame_numbers), keyframe_index in zip(videos, keyframe_indexes):
+            results.append(_read_frames(video_path, backend, frame_numbers, keyframe_index))
+            if job is not None:
+                job.advance(len(frame_numbers))
+        return results
+
+    parts = max(1, workers // 2)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = []
+        for (video_path, frame_numbers), keyframe_index in zip(videos, keyframe_indexes):
+            chunks = [chunk.tolist() for chunk in np.array_split(frame_numbers, min(parts, len(frame_numbers)))]
+            futures.append([(executor.submit(_read_frames, video_path, backend, chunk, keyframe_index), len(chunk))
+                            for chunk in chunks])
+        if job is not None:
+            chunk_sizes = {future: size for video_futures in futures for future, size in video_futures}
+            pending = set(chunk_sizes)
+            while pending:
+                done, pending = wait(pending, timeout=JOB_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if done:
+                    job.advance(sum(chunk_sizes[future] for future in done))
+                else:
+                    job.check()
+        return [[frame for future, _ in video_futures for frame in future.result()] for video_futures in futures]
+    finally:
+        # 任务被取消时不等待正在运行的子进程
+        executor.shutdown(wait=job is None or not job.cancelled, cancel_futures=True)
+
+
+def draw_label(image, text):
+    """在左上角写上标签，白字黑边，任何画面上都清晰可见"""
+    scale = max(0.5, image.shape[0] * COMPARISON_LABEL_RATIO / 22)
+    thickness = max(1, int(round(scale * 2)))
+    origin = (int(10 * scale), int(32 * scale))
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thickness * 3, cv2.LINE_AA)
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+    return image
+
+
+def side_by_side(source_frame, encode_frame, labels=COMPARISON_LABELS):
+    """
+    左右拼接源和压制，两侧写上标签。压制按自己的宽高比缩放到源的高度（放大用Lanczos，缩小用区域插值），
+    两边裁剪不同（如源带黑边、压制已裁掉）时画面不会被拉伸，只是宽度不同。
+    """
+    height = source_frame.shape[0]
+    if encode_frame.shape[0] != height:
+        width = max(1, int(round(encode_frame.shape[1] * height / encode_frame.shape[0])))
+        interpolation = cv2.INTER_LANCZOS4 if encode_frame.shape[0] < height else cv2.INTER_AREA
+        encode_frame = cv2.resize(encode_frame, (width, height), interpolation=interpolation)
+    return np.hstack([draw_label(source_frame.copy(), labels[0]), draw_label(encode_frame.copy(), labels[1])])
+
+
+def format_comparisons(picture_urls, labels=COMPARISON_LABELS):
+    """
+    把按(源, 压制)顺序排列的图片链接整理为auto_feed的comparisons字段，即[comparison=Source, Encode]...[/comparison]。
+    图床返回的[img]BBCode会先还原为链接。
+    """
+    urls = [re.sub(r'^\[img\](.*)\[/img\]$', r'\1', url.strip(), flags=re.IGNORECASE) for url in picture_urls]
+    rows = [' '.join(urls[i:i + len(labels)]) for i in range(0, len(urls), len(labels))]
+    return f'[comparison={", ".join(labels)}]\n' + '\n'.join(rows) + '\n[/comparison]'
+
+
+# 参数：source_path：源（原盘、WEB-DL等）路径；encode_path：压制成品路径；screenshot_path：输出图片路径；
+# comparison_number：对比的时间点数量；screenshot_start、screenshot_end：在两个文件重叠时间范围内的起止占比
+# comparison_mode：pair或side_by_side
+# comparison_workers：并行解码的进程数，1为单进程，大于1时源和压制在不同进程中同时解码
+# encode_offset：压制相对源的额外帧偏移，压制剪掉或多出片头帧时使用
+# auto_crop：两边各自裁掉黑边，源未裁剪而压制已裁剪时画面才能对齐
+# job：Job，报告已解码的帧数，被取消时停止解码并返回失败
+# 返回：(True, 图片路径列表)，pair模式按[源1, 压制1, 源2, 压制2, ...]排列；in_memory时元素为(文件名, bytes)
+def get_comparison(source_path, encode_path, screenshot_path, comparison_number, screenshot_start, screenshot_end,
+                   comparison_mode='pair', comparison_workers=2, encode_offset=0, screenshot_format='png',
+                   screenshot_quality=90, screenshot_png_compression=3, in_memory=False, tone_mapping=False,
+                   screenshot_backend='opencv', auto_crop=False, job=None):
+    if comparison_mode not in COMPARISON_MODES:
+        print(f'不支持的对比模式：{comparison_mode}')
+        return False, [f'不支持的对比模式：{comparison_mode}']
+    if screenshot_format.lower() not in IMAGE_FORMATS:
+        print(f'不支持的截图格式：{screenshot_format}')
+        return False, [f'不支持的截图格式：{screenshot_format}']
+    if screenshot_backend not in FRAME_SOURCE_BACKENDS:
+        print(f'不支持的取帧后端：{screenshot_backend}')
+        return False, [f'不支持的取帧后端：{screenshot_backend}']
+
+    try:
+        if not in_memory and not os.path.exists(screenshot_path):
+            os.makedirs(screenshot_path)
+            print('已创建输出路径')
+    except Exception as e:
+        print(f'创建目录时出错：{e}')
+        return False, [f'创建目录时出错：{e}']
+
+    try:
+        # 两个文件的帧率、帧数和起始PTS都来自MediaInfo，帧率不同（如源29.97、压制23.976）时也按时间对齐
+        videos = []
+        for video_path in (source_path, encode_path):
+            media_info = parse_media_info(video_path)
+            fps, total_frames = probe_frame_rate_and_count(video_path, media_info)
+            start_time = probe_start_time(video_path, media_info)
+            videos.append((video_path, fps, total_frames, start_time))
+            print(f'{video_path}：{fps:.3f}fps，{total_frames}帧，起始PTS {start_time:.3f}秒')
+
+        timestamps = comparison_timestamps(*[(start_time, start_time + total_frames / fps)
+                                             for _, fps, total_frames, start_time in videos],
+                                           comparison_number, screenshot_start, screenshot_end)
+        if not timestamps:
+            return False, ['源和压制的时间范围没有重叠']
+        frame_numbers = [[pts_to_frame_number(timestamp, fps, start_time, total_frames, offset)
+                          for timestamp in timestamps]
+                         for (_, fps, total_frames, start_time), offset in zip(videos, (0, encode_offset))]
+        print(f'对比时间点：{[round(timestamp, 3) for timestamp in timestamps]}，'
+              f'源帧号：{frame_numbers[0]}，压制帧号：{frame_numbers[1]}')
+
+        if job is not None:
+            job.begin('读取对比帧', 2 * len(timestamps))
+        source_frames, encode_frames = _read_both([(source_path, frame_numbers[0]), (encode_path, frame_numbers[1])],
+                                                  screenshot_backend, comparison_workers, job)
+
+        # 对比的帧本身就是分布在整个范围内的样本，直接用于检测黑边
+        if auto_crop:
+            source_crop, encode_crop = detect_crop(source_frames), detect_crop(encode_frames)
+            source_frames = [apply_crop(frame, source_crop) if frame is not None else None for frame in source_frames]
+            encode_frames = [apply_crop(frame, encode_crop) if frame is not None else None for frame in encode_frames]
+
+        if tone_mapping:
+            source_mapper = get_tone_mapper(get_video_hdr_transfer(source_path))
+            encode_mapper = get_tone_mapper(get_video_hdr_transfer(encode_path))
+        else:
+            source_mapper, encode_mapper = None, None
+
+        image_options = {'image_format': screenshot_format, 'quality': screenshot_quality,
+                         'png_compression': screenshot_png_compression}
+        output_path = None if in_memory else screenshot_path
+        images = []
+        for timestamp, source_frame, encode_frame in zip(timestamps, source_frames, encode_frames):
+            if source_frame is None or encode_frame is None:
+                print(f'无法读取{timestamp:.3f}秒处的帧，跳过')
+                continue
+            if source_mapper is not None:
+                source_frame = source_mapper(source_frame)
+            if encode_mapper is not None:
+                encode_frame = encode_mapper(encode_frame)
+            if comparison_mode == 'side_by_side':
+                images.append(write_image(side_by_side(source_frame, encode_frame), output_path, **image_options))
+            else:
+                images.append(write_image(source_frame, output_path, **image_options))
+                images.append(write_image(encode_frame, output_path, **image_options))
+
+        if not images:
+            return False, ['没有可用于对比的帧']
+        print([image if isinstance(image, str) else image[0] for image in images])
+        return True, images
+    except Exception as e:
+        print(f'生成对比图出错：{e}')
+        return False, [f'生成对比图出错：{e}']
@@ -0,0 +1,125 @@
+import cv2
+import numpy as np
+
+# 行（列）平均亮度不超过该值时视为黑边；有限范围视频的黑色为16，留出压缩噪声的余量
+CROP_LUMA_THRESHOLD = 24
+# 用于检测黑边的抽样帧数，在CROP_SAMPLE_RANGE范围内均匀分布，避开片头片尾
+CROP_SAMPLE_FRAMES = 6
+CROP_SAMPLE_RANGE = (0.1, 0.9)
+# 某一方向的黑边合计不足画面的该比例时不裁剪，避免为几像素的边缘重新编码
+CROP_MIN_RATIO = 0.01
+# 裁剪后的面积小于画面的该比例时认为检测不可靠（抽样帧都是暗场），不裁剪
+CROP_MIN_AREA_RATIO = 0.25
+# 计算行（列）均值时每隔PROFILE_STEP列（行）取一个像素，黑边在整行上亮度一致，抽样不影响结果
+PROFILE_STEP = 8
+
+# BGR到亮度的权重（BT.601，与cv2.COLOR_BGR2GRAY相同）
+_LUMA_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def luma_profiles(frame, step=PROFILE_STEP):
+    """
+    计算帧每一行和每一列的平均亮度。亮度是BGR的线性组合，先用cv2.reduce求各通道的行列均值再加权，
+    不需要生成整帧的亮度平面；求均值的方向上每step个像素取一个，结果的方向上保留全部分辨率。
+
+    返回:
+    tuple: (行均值, 列均值)，一维浮点数组，长度分别为帧的高和宽
+    """
+    frame = frame if frame.ndim == 3 else frame[:, :, np.newaxis]
+    weights = _LUMA_WEIGHTS if frame.shape[2] == 3 else np.ones(1, dtype=np.float32)
+    row_pixels = np.ascontiguousarray(frame[:, ::step])
+    column_pixels = np.ascontiguousarray(frame[::step])
+    rows = cv2.reduce(row_pixels, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).reshape(frame.shape[0], -1) @ weights
+    columns = cv2.reduce(column_pixels, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S).reshape(frame.shape[1], -1) @ weights
+    return rows / row_pixels.shape[1], columns / column_pixels.shape[0]
+
+
+def _active_range(profiles, threshold):
+    # 任意一帧在该行（列）有画面即视为有效区域，单帧的暗场不会被误判为黑边
+    active = np.flatnonzero(np.max(profiles, axis=0) > threshold)
+    if len(active) == 0:
+        return None
+    length = profiles.shape[1]
+    start, end = int(active[0]), int(active[-1]) + 1
+    if length - (end - start) < length * CROP_MIN_RATIO:
+        return 0, length
+    # 对齐到偶数像素，4:2:0的色度平面和大多数编码器要求偶数的偏移和尺寸
+    start = start + start % 2
+    end = end - (end - start) % 2
+    return start, end
+
+
+def detect_crop(frames, threshold=CROP_LUMA_THRESHOLD):
+    """
+    从若干抽样帧中找出有效画面区域（去掉上下或左右的黑边）。
+
+    参数:
+    frames (list[ndarray]): 尺寸相同的BGR帧
+
+    返回:
+    tuple|None: (x, y, 宽, 高)；没有黑边、没有可用的帧或检测不可靠时返回None
+    """
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return None
+    height, width = frames[0].shape[:2]
+    profiles = [luma_profiles(frame) for frame in frames if frame.shape[:2] == (height, width)]
+    rows = _active_range(np.stack([row for row, _ in profiles]), threshold)
+    columns = _active_range(np.stack([column for _, column in profiles]), threshold)
+    if rows is None or columns is None:
+        return None
+    (y, bottom), (x, right) = rows, columns
+    crop_width, crop_height = right - x, bottom - y
+    if crop_width <= 0 or crop_height <= 0 or crop_width * crop_height < width * height * CROP_MIN_AREA_RATIO:
+        return None
+    if (crop_width, crop_height) == (width, height):
+        return None
+    return x, y, crop_width, crop_height
+
+
+def detect_video_crop(source, sample_frames=CROP_SAMPLE_FRAMES):
+    """
+    在视频CROP_SAMPLE_RANGE范围内均匀抽取sample_frames帧检测黑边，抽样帧对齐到关键帧附近以减少解码。
+
+    参数:
+    source: open_frame_source()返回的取帧后端
+
+    返回:
+    tuple|None: 原尺寸画面中的(x, y, 宽, 高)，不需要裁剪时为None
+    """
+    start_frame = int(source.total_frames * CROP_SAMPLE_RANGE[0])
+    end_frame = int(source.total_frames * CROP_SAMPLE_RANGE[1])
+    frame_numbers = np.linspace(start_frame, end_frame, sample_frames, endpoint=False).astype(int).tolist()
+    frames = []
+    for frame_number in sorted(set(source.snap_all(frame_numbers, start_frame, end_frame))):
+        ret, frame = source.read(frame_number)
+        if ret:
+            frames.append(frame)
+    crop = detect_crop(frames)
+    if crop is not None:
+        print(f'检测到黑边，有效画面：{crop[2]}x{crop[3]}，偏移({crop[0]}, {crop[1]})')
+    return crop
+
+
+def scale_crop(crop, scale_x, scale_y, width, height):
+    """把原尺寸画面中的裁剪区域换算到缩小后（宽width、高height）的画面中"""
+    x = min(width - 1, int(round(crop[0] * scale_x)))
+    y = min(height - 1, int(round(crop[1] * scale_y)))
+    right = max(x + 1, min(width, int(round((crop[0] + crop[2]) * scale_x))))
+    bottom = max(y + 1, min(height, int(round((crop[1] + crop[3]) * scale_y))))
+    return x, y, right - x, bottom - y
+
+
+def apply_crop(image, crop):
+    """裁剪图片，返回视图，不复制像素；crop为None时原样返回"""
+    if crop is None:
+        return image
+    x, y, width, height = crop
+    return image[y:y + height, x:x + width]
+
+
+def crop_to_dict(crop):
+    """转为API返回的字典，没有裁剪时为None"""
+    if crop is None:
+        return None
+    return {'x': crop[0], 'y': crop[1], 'width': crop[2], 'height': crop[3]}
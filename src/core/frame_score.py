@@ -0,0 +1,145 @@
+import cv2
+import numpy as np
+
+# 评分只在抽样后的亮度平面上进行，高度约为270像素，4K画面的计算量约为原来的1/200
+SCORE_HEIGHT = 270
+# 亮度直方图的分箱数，熵的最大值为log2(HISTOGRAM_BINS)
+HISTOGRAM_BINS = 32
+# 相邻像素亮度差超过该值时视为边缘
+EDGE_THRESHOLD = 16
+# 边缘像素占比达到该值时认为画面细节已足够丰富
+EDGE_DENSITY_REFERENCE = 0.05
+# 感知哈希的边长，哈希为HASH_SIZE×HASH_SIZE=64位
+HASH_SIZE = 8
+# pHash先缩小到该边长再做DCT，只保留左上角HASH_SIZE×HASH_SIZE的低频系数
+PHASH_SIZE = 32
+PERCEPTUAL_HASHES = ('dhash', 'phash')
+
+# 0-255每个字节中1的个数，用于计算汉明距离
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def decimate_luma(frame, target_height=SCORE_HEIGHT):
+    """
+    对BGR帧按行列等间隔抽样后转为亮度平面，只读取抽样到的像素。
+
+    返回:
+    ndarray: uint8的二维亮度数组
+    """
+    step = max(1, frame.shape[0] // target_height)
+    decimated = np.ascontiguousarray(frame[::step, ::step])
+    if decimated.ndim == 2:
+        return decimated
+    return cv2.cvtColor(decimated, cv2.COLOR_BGR2GRAY)
+
+
+def stack_lumas(lumas):
+    """把多个亮度平面堆叠为(N, H, W)数组；同一视频的帧尺寸一致，不一致时裁剪到最小尺寸"""
+    height = min(luma.shape[0] for luma in lumas)
+    width = min(luma.shape[1] for luma in lumas)
+    return np.stack([luma[:height, :width] for luma in lumas])
+
+
+def luma_histograms(stack, bins=HISTOGRAM_BINS):
+    """
+    批量计算归一化亮度直方图，bins需为2的幂。
+
+    返回:
+    ndarray: 形状为(N, bins)，每行之和为1
+    """
+    count = stack.shape[0]
+    # 给每一帧的分箱加上偏移，一次bincount得到所有帧的直方图
+    indices = (stack >> (8 - int(np.log2(bins)))).astype(np.int64)
+    indices += (np.arange(count) * bins)[:, None, None]
+    histogram = np.bincount(indices.ravel(), minlength=count * bins).reshape(count, bins)
+    return histogram / histogram.sum(axis=1, keepdims=True)
+
+
+def score_lumas(lumas):
+    """
+    批量计算亮度平面的复杂度指标，所有帧在一次NumPy运算中完成。
+
+    参数:
+    lumas (list[ndarray]): decimate_luma()的结果
+
+    返回:
+    dict: 每个键对应一个长度为len(lumas)的数组
+        std：亮度标准差（0-128）
+        edge_density：边缘像素占比（0-1）
+        entropy：亮度直方图的熵（0-log2(HISTOGRAM_BINS)比特）
+        complexity：综合复杂度，即std按熵和边缘占比折算后的值，与screenshot_threshold比较
+    """
+    if len(lumas) == 0:
+        empty = np.zeros(0, dtype=np.float64)
+        return {'std': empty, 'edge_density': empty, 'entropy': empty, 'complexity': empty}
+
+    stack = stack_lumas(lumas)
+    count = stack.shape[0]
+
+    std = stack.reshape(count, -1).std(axis=1)
+
+    signed = stack.astype(np.int16)
+    gradient_x = np.abs(np.diff(signed, axis=2))[:, :-1, :]
+    gradient_y = np.abs(np.diff(signed, axis=1))[:, :, :-1]
+    edge_density = ((gradient_x + gradient_y) > EDGE_THRESHOLD).mean(axis=(1, 2))
+
+    probability = luma_histograms(stack)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = np.nansum(probability * np.log2(1 / probability), axis=1)
+
+    normalized_entropy = entropy / np.log2(HISTOGRAM_BINS)
+    edge_factor = np.minimum(1.0, edge_density / EDGE_DENSITY_REFERENCE)
+    complexity = std * normalized_entropy * edge_factor
+
+    return {'std': std, 'edge_density': edge_density, 'entropy': entropy, 'complexity': complexity}
+
+
+def score_frames(frames):
+    return score_lumas([decimate_luma(frame) for frame in frames])
+
+
+def _dct_matrix(size):
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.sqrt(2 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def perceptual_hashes(lumas, method='dhash'):
+    """
+    批量计算亮度平面的64位感知哈希，画面越相似，哈希的汉明距离越小。
+    dhash：缩小到9×8，比较左右相邻像素的明暗；
+    phash：缩小到32×32，做二维DCT，比较8×8低频系数与其中位数（不含直流分量），对亮度和对比度变化更稳健。
+
+    返回:
+    ndarray: 形状为(N,)的uint64数组
+    """
+    if len(lumas) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    if method == 'dhash':
+        small = np.stack([cv2.resize(luma, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+                          for luma in lumas]).astype(np.int16)
+        bits = small[:, :, 1:] > small[:, :, :-1]
+    elif method == 'phash':
+        small = np.stack([cv2.resize(luma, (PHASH_SIZE, PHASH_SIZE), interpolation=cv2.INTER_AREA)
+                          for luma in lumas]).astype(np.float32)
+        dct = _dct_matrix(PHASH_SIZE)
+        low = (dct @ small @ dct.T)[:, :HASH_SIZE, :HASH_SIZE].reshape(len(lumas), -1)
+        bits = low > np.median(low[:, 1:], axis=1)[:, None]
+    else:
+        raise ValueError(f'不支持的感知哈希：{method}')
+    packed = np.packbits(bits.reshape(len(lumas), -1), axis=1)
+    return packed.view('>u8').ravel().astype(np.uint64)
+
+
+def hamming_distances(hashes):
+    """
+    两两计算哈希之间的汉明距离。
+
+    返回:
+    ndarray: 形状为(N, N)的整数数组
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    xor = np.ascontiguousarray(hashes[:, None] ^ hashes[None, :])
+    return _POPCOUNT[xor.view(np.uint8)].reshape(len(hashes), len(hashes), 8).sum(axis=2, dtype=np.int64)
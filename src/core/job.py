@@ -0,0 +1,97 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+# 保留最近的任务数，完成的任务在此之后仍可查询到最终状态
+JOB_HISTORY_SIZE = 100
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """任务被取消，由耗时循环中的Job.check()抛出"""
+
+    def __init__(self):
+        super().__init__('任务已取消')
+
+
+class Job:
+    """
+    可取消、可报告进度的任务。截图、缩略图和制作种子的耗时循环中每处理一帧（或一批数据）调用一次advance()或update()，
+    更新进度、调用回调并检查是否已被取消；另一个线程调用cancel()后，任务在下一次检查时抛出JobCancelled。
+
+    参数:
+    job_id (str): 任务ID，为None时自动生成
+    callback (callable): 进度回调，参数为Job本身，在执行任务的线程中调用
+    """
+
+    def __init__(self, job_id=None, callback=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.callback = callback
+        self.stage = ''
+        self.unit = ''
+        self.done = 0
+        self.total = 0
+        self.status = 'running'  # running、finished、failed、cancelled
+        self.message = ''
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def begin(self, stage, total, unit='帧'):
+        """开始新的阶段，进度从0计起"""
+        self.stage, self.total, self.unit, self.done = stage, total, unit, 0
+        self._notify()
+        self.check()
+
+    def advance(self, count=1):
+        self.done += count
+        self._notify()
+        self.check()
+
+    def update(self, done):
+        self.done = done
+        self._notify()
+        self.check()
+
+    def finish(self, success, message=''):
+        """记录任务结果，被取消的任务无论返回什么都记为cancelled"""
+        if self.cancelled:
+            self.status = 'cancelled'
+        else:
+            self.status = 'finished' if success else 'failed'
+        self.message = message
+
+    def as_dict(self):
+        return {'job_id': self.id, 'stage': self.stage, 'unit': self.unit, 'done': self.done, 'total': self.total,
+                'status': self.status, 'message': self.message}
+
+    def _notify(self):
+        if self.callback is not None:
+            self.callback(self)
+
+
+def create_job(job_id=None, callback=None):
+    """创建并登记任务，之后可以通过get_job()查询进度或取消；同一ID的旧任务被替换"""
+    job = Job(job_id, callback)
+    with _jobs_lock:
+        _jobs.pop(job.id, None)
+        _jobs[job.id] = job
+        while len(_jobs) > JOB_HISTORY_SIZE:
+            _jobs.popitem(last=False)
+    return job
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,531 @@
+import bisect
+import os
+import struct
+import threading
+
+import cv2
+
+# 关键帧索引缓存，键为(绝对路径, 文件大小, 修改时间)，值为升序排列的关键帧时间（秒）列表，None表示无法获取索引
+_keyframe_index_cache = {}
+_keyframe_index_lock = threading.Lock()
+
+# OpenCV的FFmpeg后端在跳转时会先回退16帧再向前逐帧解码，把目标对齐到关键帧之后16帧，可保证只从该关键帧开始解码
+OPENCV_SEEK_PREROLL = 16
+# 没有关键帧索引时假定的GOP长度（帧），即x264/x265的默认keyint
+DEFAULT_GOP_FRAMES = 250
+# 一次跳转除解码以外的固定开销（清空解码器、重新定位文件），折算为帧数
+SEEK_OVERHEAD_FRAMES = 8
+
+# TS/M2TS没有全局索引，只在文件中均匀抽取若干窗口扫描随机访问点，避免读完整个文件
+TS_SCAN_WINDOWS = 128
+TS_SCAN_WINDOW_SIZE = 256 * 1024
+
+# Matroska元素ID
+MKV_EBML = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_SEEK_HEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_INFO = 0x1549A966
+MKV_TIMESTAMP_SCALE = 0x2AD7B1
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_NUMBER = 0xD7
+MKV_TRACK_TYPE = 0x83
+MKV_CUES = 0x1C53BB6B
+MKV_CUE_POINT = 0xBB
+MKV_CUE_TIME = 0xB3
+MKV_CUE_TRACK_POSITIONS = 0xB7
+MKV_CUE_TRACK = 0xF7
+
+
+def get_keyframe_index(video_path):
+    """
+    获取视频的关键帧索引（秒），同一文件只扫描一次，之后直接返回缓存。
+
+    参数:
+    video_path (str): 视频文件路径
+
+    返回:
+    list[float] | None: 升序的关键帧时间列表，容器不支持或解析失败时返回None
+    """
+    try:
+        stat = os.stat(video_path)
+    except OSError as e:
+        print(f'读取视频文件信息失败：{e}')
+        return None
+    cache_key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+
+    with _keyframe_index_lock:
+        if cache_key in _keyframe_index_cache:
+            return _keyframe_index_cache[cache_key]
+
+    index = build_keyframe_index(video_path)
+
+    with _keyframe_index_lock:
+        _keyframe_index_cache[cache_key] = index
+    return index
+
+
+def clear_keyframe_index_cache():
+    with _keyframe_index_lock:
+        _keyframe_index_cache.clear()
+
+
+def build_keyframe_index(video_path):
+    extension = os.path.splitext(video_path)[1].lower()
+    try:
+        with open(video_path, 'rb') as file:
+            if extension in ('.mkv', '.webm'):
+                index = read_mkv_cues(file)
+            elif extension in ('.mp4', '.m4v', '.mov'):
+                index = read_mp4_sync_samples(file)
+            elif extension in ('.ts', '.m2ts', '.mts'):
+                index = scan_ts_random_access_points(file, os.path.getsize(video_path))
+            else:
+                index = None
+    except Exception as e:
+        # 文件损坏或不完整（如仍在下载）时不影响截图，退回普通跳转
+        print(f'读取关键帧索引失败：{e}')
+        index = None
+
+    if index:
+        index = sorted(set(index))
+        print(f'获取到{len(index)}个关键帧')
+        return index
+    print('未能获取到关键帧索引，将使用普通跳转')
+    return None
+
+
+def _read_vint(file, keep_marker):
+    first = file.read(1)
+    if not first:
+        raise ValueError('EBML数据意外结束')
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not (first & mask):
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError('EBML变长整数无效')
+    value = first if keep_marker else first & (mask - 1)
+    rest = file.read(length - 1)
+    for byte in rest:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length  # 未知长度
+    return value, length
+
+
+def _read_mkv_element_header(file):
+    element_id, id_length = _read_vint(file, True)
+    size, size_length = _read_vint(file, False)
+    return element_id, size, id_length + size_length
+
+
+def _iter_mkv_children(file, start, end):
+    position = start
+    while position < end:
+        file.seek(position)
+        element_id, size, header_length = _read_mkv_element_header(file)
+        data_start = position + header_length
+        if size is None:
+            size = end - data_start
+        yield element_id, position, data_start, size
+        position = data_start + size
+
+
+def _read_mkv_uint(file, start, size):
+    file.seek(start)
+    return int.from_bytes(file.read(size), 'big')
+
+
+def read_mkv_cues(file):
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+
+    file.seek(0)
+    element_id, size, header_length = _read_mkv_element_header(file)
+    if element_id != MKV_EBML:
+        raise ValueError('不是有效的Matroska文件')
+    file.seek(header_length + size)
+    segment_offset = header_length + size
+    element_id, segment_size, header_length = _read_mkv_element_header(file)
+    if element_id != MKV_SEGMENT:
+        raise ValueError('未找到Matroska Segment')
+    segment_start = segment_offset + header_length
+    segment_end = file_size if segment_size is None else min(file_size, segment_start + segment_size)
+
+    # 先通过SeekHead定位Info、Tracks和Cues，找不到时再顺序查找一级元素（遇到Cluster时只跳过，不读取）
+    positions = {}
+    for child_id, element_start, data_start, child_size in _iter_mkv_children(file, segment_start, segment_end):
+        if child_id == MKV_SEEK_HEAD:
+            for seek_id, _, seek_start, seek_size in _iter_mkv_children(file, data_start, data_start + child_size):
+                if seek_id != MKV_SEEK:
+                    continue
+                target_id, target_position = None, None
+                for entry_id, _, entry_start, entry_size in _iter_mkv_children(file, seek_start,
+                                                                               seek_start + seek_size):
+                    if entry_id == MKV_SEEK_ID:
+                        target_id = _read_mkv_uint(file, entry_start, entry_size)
+                    elif entry_id == MKV_SEEK_POSITION:
+                        target_position = _read_mkv_uint(file, entry_start, entry_size)
+                if target_id is not None and target_position is not None:
+                    positions.setdefault(target_id, segment_start + target_position)
+        elif child_id in (MKV_INFO, MKV_TRACKS, MKV_CUES):
+            positions.setdefault(child_id, element_start)
+        if MKV_CUES in positions and MKV_INFO in positions and MKV_TRACKS in positions:
+            break
+
+    if MKV_CUES not in positions:
+        return None
+
+    timestamp_scale = 1000000
+    if MKV_INFO in positions:
+        file.seek(positions[MKV_INFO])
+        _, info_size, info_header = _read_mkv_element_header(file)
+        info_start = positions[MKV_INFO] + info_header
+        for child_id, _, data_start, child_size in _iter_mkv_children(file, info_start, info_start + info_size):
+            if child_id == MKV_TIMESTAMP_SCALE:
+                timestamp_scale = _read_mkv_uint(file, data_start, child_size)
+
+    video_tracks = set()
+    if MKV_TRACKS in positions:
+        file.seek(positions[MKV_TRACKS])
+        _, tracks_size, tracks_header = _read_mkv_element_header(file)
+        tracks_start = positions[MKV_TRACKS] + tracks_header
+        for child_id, _, data_start, child_size in _iter_mkv_children(file, tracks_start, tracks_start + tracks_size):
+            if child_id != MKV_TRACK_ENTRY:
+                continue
+            track_number, track_type = None, None
+            for entry_id, _, entry_start, entry_size in _iter_mkv_children(file, data_start, data_start + child_size):
+                if entry_id == MKV_TRACK_NUMBER:
+                    track_number = _read_mkv_uint(file, entry_start, entry_size)
+                elif entry_id == MKV_TRACK_TYPE:
+                    track_type = _read_mkv_uint(file, entry_start, entry_size)
+            if track_type == 1 and track_number is not None:
+                video_tracks.add(track_number)
+
+    file.seek(positions[MKV_CUES])
+    element_id, cues_size, cues_header = _read_mkv_element_header(file)
+    if element_id != MKV_CUES:
+        return None
+    cues_start = positions[MKV_CUES] + cues_header
+    # Cues通常只有几百KB，整体读入内存后解析
+    file.seek(cues_start)
+    cues_data = file.read(cues_size)
+
+    index = []
+    for cue_id, cue_start, cue_size in _iter_ebml_buffer(cues_data, 0, len(cues_data)):
+        if cue_id != MKV_CUE_POINT:
+            continue
+        cue_time, cue_tracks = None, set()
+        for entry_id, entry_start, entry_size in _iter_ebml_buffer(cues_data, cue_start, cue_start + cue_size):
+            if entry_id == MKV_CUE_TIME:
+                cue_time = int.from_bytes(cues_data[entry_start:entry_start + entry_size], 'big')
+            elif entry_id == MKV_CUE_TRACK_POSITIONS:
+                for position_id, position_start, position_size in _iter_ebml_buffer(
+                        cues_data, entry_start, entry_start + entry_size):
+                    if position_id == MKV_CUE_TRACK:
+                        cue_tracks.add(int.from_bytes(cues_data[position_start:position_start + position_size],
+                                                      'big'))
+        if cue_time is None:
+            continue
+        if video_tracks and cue_tracks and not (cue_tracks & video_tracks):
+            continue
+        index.append(cue_time * timestamp_scale / 1e9)
+    return index
+
+
+def _iter_ebml_buffer(data, start, end):
+    # 元素头或数据超出范围（Cues被截断）时停止，只返回完整的元素
+    end = min(end, len(data))
+    position = start
+    while position < end:
+        first = data[position]
+        id_length = 1
+        mask = 0x80
+        while id_length <= 4 and not (first & mask):
+            mask >>= 1
+            id_length += 1
+        if id_length > 4 or position + id_length >= end:
+            return
+        element_id = int.from_bytes(data[position:position + id_length], 'big')
+        position += id_length
+        first = data[position]
+        size_length = 1
+        mask = 0x80
+        while size_length <= 8 and not (first & mask):
+            mask >>= 1
+            size_length += 1
+        if size_length > 8 or position + size_length > end:
+            return
+        size = first & (mask - 1)
+        for byte in data[position + 1:position + size_length]:
+            size = (size << 8) | byte
+        position += size_length
+        if position + size > end:
+            return
+        yield element_id, position, size
+        position += size
+
+
+def _iter_mp4_boxes(file, start, end):
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        size, box_type = struct.unpack('>I4s', file.read(8))
+        header_length = 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            header_length = 16
+        elif size == 0:
+            size = end - position
+        if size < header_length:
+            break
+        yield box_type, position + header_length, position + size
+        position += size
+
+
+def _find_mp4_box(file, start, end, box_type):
+    for child_type, data_start, data_end in _iter_mp4_boxes(file, start, end):
+        if child_type == box_type:
+            return data_start, data_end
+    return None
+
+
+def read_mp4_sync_samples(file):
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+    moov = _find_mp4_box(file, 0, file_size, b'moov')
+    if moov is None:
+        return None
+
+    for box_type, trak_start, trak_end in _iter_mp4_boxes(file, *moov):
+        if box_type != b'trak':
+            continue
+        mdia = _find_mp4_box(file, trak_start, trak_end, b'mdia')
+        if mdia is None:
+            continue
+        hdlr = _find_mp4_box(file, *mdia, b'hdlr')
+        if hdlr is None:
+            continue
+        file.seek(hdlr[0] + 8)
+        if file.read(4) != b'vide':
+            continue
+
+        mdhd = _find_mp4_box(file, *mdia, b'mdhd')
+        if mdhd is None:
+            return None
+        file.seek(mdhd[0])
+        version = file.read(1)[0]
+        file.seek(mdhd[0] + (20 if version == 1 else 12))
+        timescale = struct.unpack('>I', file.read(4))[0]
+
+        minf = _find_mp4_box(file, *mdia, b'minf')
+        stbl = _find_mp4_box(file, *minf, b'stbl') if minf else None
+        if stbl is None or not timescale:
+            return None
+        stss = _find_mp4_box(file, *stbl, b'stss')
+        stts = _find_mp4_box(file, *stbl, b'stts')
+        if stss is None or stts is None:
+            # 没有stss说明每一帧都是关键帧（或是分片MP4），无需索引
+            return None
+
+        file.seek(stss[0] + 4)
+        entry_count = struct.unpack('>I', file.read(4))[0]
+        sync_samples = struct.unpack(f'>{entry_count}I', file.read(4 * entry_count))
+
+        file.seek(stts[0] + 4)
+        entry_count = struct.unpack('>I', file.read(4))[0]
+        stts_entries = struct.unpack(f'>{entry_count * 2}I', file.read(8 * entry_count))
+
+        # 将stts的(数量, 时长)区间展开为每段的起始样本号和起始时间，再按样本号二分查找
+        run_first_samples, run_start_times, run_deltas = [], [], []
+        sample, time = 1, 0
+        for i in range(0, len(stts_entries), 2):
+            count, delta = stts_entries[i], stts_entries[i + 1]
+            run_first_samples.append(sample)
+            run_start_times.append(time)
+            run_deltas.append(delta)
+            sample += count
+            time += count * delta
+
+        index = []
+        for sync_sample in sync_samples:
+            run = bisect.bisect_right(run_first_samples, sync_sample) - 1
+            if run < 0:
+                continue
+            decode_time = run_start_times[run] + (sync_sample - run_first_samples[run]) * run_deltas[run]
+            index.append(decode_time / timescale)
+        return index
+    return None
+
+
+def _read_pes_pts(payload):
+    if len(payload) < 14 or payload[0:3] != b'\x00\x00\x01':
+        return None
+    stream_id = payload[3]
+    if not (0xE0 <= stream_id <= 0xEF or stream_id == 0xFD):
+        return None
+    if not payload[7] & 0x80:
+        return None
+    pts = payload[9:14]
+    return (((pts[0] >> 1) & 0x07) << 30) | (pts[1] << 22) | ((pts[2] >> 1) << 15) | (pts[3] << 7) | (pts[4] >> 1)
+
+
+def _scan_ts_window(data, packet_size, sync_offset, video_pid):
+    # 返回窗口内(视频PID, 首个PTS, 随机访问点PTS列表)
+    random_access_points = []
+    first_pts = None
+    start = sync_offset
+    while start + 188 <= len(data) and data[start] != 0x47:
+        start += 1
+    for position in range(start, len(data) - 187, packet_size):
+        if data[position] != 0x47:
+            continue
+        pid = ((data[position + 1] & 0x1F) << 8) | data[position + 2]
+        payload_unit_start = data[position + 1] & 0x40
+        adaptation_field_control = (data[position + 3] >> 4) & 0x03
+        if not payload_unit_start or not adaptation_field_control & 0x01:
+            continue
+        if video_pid is not None and pid != video_pid:
+            continue
+        random_access = False
+        payload_start = position + 4
+        if adaptation_field_control & 0x02:
+            adaptation_length = data[position + 4]
+            if adaptation_length > 0:
+                random_access = bool(data[position + 5] & 0x40)
+            payload_start += 1 + adaptation_length
+        pts = _read_pes_pts(data[payload_start:position + 188])
+        if pts is None:
+            continue
+        if video_pid is None:
+            video_pid = pid
+        if first_pts is None:
+            first_pts = pts
+        if random_access:
+            random_access_points.append(pts)
+    return video_pid, first_pts, random_access_points
+
+
+def scan_ts_random_access_points(file, file_size):
+    header = file.read(192 * 3)
+    if len(header) >= 192 * 3 and header[4] == 0x47 and header[196] == 0x47 and header[388] == 0x47:
+        packet_size, sync_offset = 192, 4  # M2TS每个包前有4字节时间码
+    elif len(header) >= 188 * 3 and header[0] == 0x47 and header[188] == 0x47 and header[376] == 0x47:
+        packet_size, sync_offset = 188, 0
+    else:
+        raise ValueError('不是有效的TS文件')
+
+    if file_size <= TS_SCAN_WINDOWS * TS_SCAN_WINDOW_SIZE:
+        offsets = range(0, file_size, TS_SCAN_WINDOW_SIZE)
+    else:
+        step = file_size // TS_SCAN_WINDOWS
+        offsets = [i * step for i in range(TS_SCAN_WINDOWS)]
+
+    video_pid, base_pts = None, None
+    random_access_points = []
+    for offset in offsets:
+        # 对齐到包边界，保证窗口内的包能被正确解析
+        offset -= offset % packet_size
+        file.seek(offset)
+        data = file.read(TS_SCAN_WINDOW_SIZE)
+        video_pid, first_pts, points = _scan_ts_window(data, packet_size, sync_offset, video_pid)
+        if base_pts is None:
+            base_pts = first_pts
+        random_access_points.extend(points)
+
+    if base_pts is None or not random_access_points:
+        return None
+    # PTS为33位，跨越回绕点时补上一个周期
+    return [((pts - base_pts) % (1 << 33)) / 90000 for pts in random_access_points]
+
+
+def is_sampled_keyframe_index(video_path):
+    """关键帧索引是否只来自抽样窗口（较大的TS/M2TS），此时相邻索引之间还有未扫描到的关键帧"""
+    if os.path.splitext(video_path)[1].lower() not in ('.ts', '.m2ts', '.mts'):
+        return False
+    try:
+        return os.path.getsize(video_path) > TS_SCAN_WINDOWS * TS_SCAN_WINDOW_SIZE
+    except OSError:
+        return False
+
+
+class KeyframeSeeker:
+    """
+    基于关键帧索引的跳转器，包装一个cv2.VideoCapture。
+
+    snap_all()把候选帧号对齐到附近的关键帧，这样每次跳转只需从该关键帧解码少量帧；
+    read()取帧时估算跳转需要解码的帧数，若从当前位置向前grab到目标的帧数不超过它，则顺序读取，不再重新跳转。
+    目标密集（如短视频的大尺寸缩略图）或GOP较长时自动变为单次顺序读取，目标稀疏时逐个跳转。
+    sampled为True时索引是抽样得到的（见is_sampled_keyframe_index()），到上一个索引关键帧的距离远大于实际GOP，
+    估算跳转开销时最多按没有索引时的平均值计算。
+    """
+
+    def __init__(self, capture, keyframe_index, fps, preroll=OPENCV_SEEK_PREROLL, sampled=False):
+        self.capture = capture
+        self.fps = fps
+        self.preroll = preroll  # 对齐时目标落在关键帧之后的帧数，使跳转只需从该关键帧开始解码
+        self.sampled = sampled
+        self.keyframe_frames = [int(round(t * fps)) for t in keyframe_index] if keyframe_index and fps else []
+        self.position = None  # 下一次read()将返回的帧号，未知时为None
+        self.seek_count = 0
+        self.grab_count = 0
+
+    def snap(self, frame_number, lower=0, upper=None):
+        """返回与frame_number最近的关键帧对应的取帧位置，限制在[lower, upper)之内"""
+        if not self.keyframe_frames:
+            return frame_number
+        i = bisect.bisect_left(self.keyframe_frames, frame_number - self.preroll)
+        candidates = [self.keyframe_frames[j] + self.preroll for j in (i - 1, i) if
+                      0 <= j < len(self.keyframe_frames)]
+        candidates = [c for c in candidates if c >= lower and (upper is None or c < upper)]
+        if not candidates:
+            return frame_number
+        return min(candidates, key=lambda c: abs(c - frame_number))
+
+    def snap_all(self, frame_numbers, lower=0, upper=None):
+        """批量对齐，对齐后与已有位置重复的保持原帧号，避免多张截图落在同一帧"""
+        snapped_numbers = []
+        for frame_number in frame_numbers:
+            snapped = self.snap(frame_number, lower, upper)
+            snapped_numbers.append(snapped if snapped not in snapped_numbers else frame_number)
+        return snapped_numbers
+
+    def _previous_keyframe(self, frame_number):
+        i = bisect.bisect_right(self.keyframe_frames, frame_number) - 1
+        return self.keyframe_frames[i] if i >= 0 else 0
+
+    def seek_cost(self, frame_number):
+        """估算跳转到frame_number需要解码的帧数（含固定开销）"""
+        unknown = OPENCV_SEEK_PREROLL + DEFAULT_GOP_FRAMES // 2
+        if self.keyframe_frames:
+            decoded = frame_number - self._previous_keyframe(frame_number - OPENCV_SEEK_PREROLL)
+            if self.sampled:
+                decoded = min(decoded, unknown)
+        else:
+            decoded = unknown
+        return decoded + SEEK_OVERHEAD_FRAMES
+
+    def read(self, frame_number):
+        """读取指定帧，返回(是否成功, 帧数据)"""
+        if self.position is not None and 0 <= frame_number - self.position <= self.seek_cost(frame_number):
+            # 向前grab到目标的解码量不超过跳转，顺序读取
+            while self.position < frame_number:
+                if not self.capture.grab():
+                    self.position = None
+                    return False, None
+                self.position += 1
+                self.grab_count += 1
+        else:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            self.position = frame_number
+            self.seek_count += 1
+
+        ret, frame = self.capture.read()
+        self.position = self.position + 1 if ret else None
+        return ret, frame
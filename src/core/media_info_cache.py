@@ -0,0 +1,116 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from pymediainfo import MediaInfo
+
+from src.core.tool import get_settings
+
+# MediaInfo解析结果的缓存数据库。网络挂载的原盘解析一次可能要数秒，同一文件再次获取MediaInfo或视频参数时直接读取缓存
+MEDIA_INFO_CACHE_PATH = 'temp/media_info_cache.sqlite3'
+# pymediainfo构造MediaInfo对象使用的XML格式（MediaInfo 17.10起名为OLDXML），缓存保存这份XML，读取时重建对象
+MEDIA_INFO_XML_OUTPUT = 'OLDXML'
+
+_media_info_cache_lock = threading.Lock()
+
+
+def media_info_identity(path):
+    """缓存键：绝对路径、大小、修改时间和inode，文件被替换或修改后对应的缓存自然失效"""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class MediaInfoCache:
+    """
+    sqlite中的MediaInfo解析缓存。每个路径一行，保存解析时的文件身份和压缩后的XML，
+    身份不一致时视为未命中并在重新解析后覆盖；条目数超过max_entries时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, cache_path=MEDIA_INFO_CACHE_PATH, max_entries=1000):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+
+    def get(self, path):
+        """读取缓存，命中时返回MediaInfo对象，未命中或缓存不可用时返回None"""
+        if self.max_entries <= 0:
+            return None
+        path, size, mtime_ns, inode = media_info_identity(path)
+        try:
+            with _media_info_cache_lock, self._connect() as connection:
+                row = connection.execute('SELECT xml FROM media_info WHERE path = ? AND size = ? AND mtime_ns = ? '
+                                         'AND inode = ?', (path, size, mtime_ns, inode)).fetchone()
+                if row is None:
+                    return None
+                connection.execute('UPDATE media_info SET last_used = ? WHERE path = ?', (time.time(), path))
+            return MediaInfo(zlib.decompress(row[0]).decode('utf-8'))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            # 数据库损坏或被占用时当作未命中，不影响解析
+            print(f'读取MediaInfo缓存失败：{e}')
+            return None
+
+    def put(self, path, xml):
+        """写入解析得到的XML；写入失败只打印信息，不影响调用方"""
+        if self.max_entries <= 0:
+            return
+        path, size, mtime_ns, inode = media_info_identity(path)
+        try:
+            with _media_info_cache_lock, self._connect() as connection:
+                connection.execute('INSERT OR REPLACE INTO media_info VALUES (?, ?, ?, ?, ?, ?)',
+                                   (path, size, mtime_ns, inode, zlib.compress(xml.encode('utf-8')), time.time()))
+                # 淘汰最久未使用的条目
+                connection.execute('DELETE FROM media_info WHERE path NOT IN '
+                                   '(SELECT path FROM media_info ORDER BY last_used DESC LIMIT ?)',
+                                   (self.max_entries,))
+        except sqlite3.Error as e:
+            print(f'写入MediaInfo缓存失败：{e}')
+
+    def parse(self, path, bypass=False):
+        """
+        获取文件的MediaInfo对象，优先读取缓存。
+
+        参数:
+        bypass (bool): 跳过缓存重新解析，解析结果仍会写入缓存，覆盖旧的条目
+
+        返回:
+        MediaInfo: 与MediaInfo.parse()相同的对象
+        """
+        if not bypass:
+            media_info = self.get(path)
+            if media_info is not None:
+                print('命中MediaInfo缓存')
+                return media_info
+        xml = MediaInfo.parse(path, output=MEDIA_INFO_XML_OUTPUT)
+        self.put(path, xml)
+        return MediaInfo(xml)
+
+    def clear(self):
+        with _media_info_cache_lock, self._connect() as connection:
+            connection.execute('DELETE FROM media_info')
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # 每次操作使用新的连接并在一个事务中完成，多线程（API）和多进程（截图）下都可以安全使用
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.cache_path, timeout=10)
+        try:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS media_info (path TEXT PRIMARY KEY, size INTEGER, '
+                                   'mtime_ns INTEGER, inode INTEGER, xml BLOB, last_used REAL)')
+                yield connection
+        finally:
+            connection.close()
+
+
+def get_media_info_cache():
+    """按设置media_info_cache_size（条目数）创建缓存，为0时不缓存"""
+    return MediaInfoCache(MEDIA_INFO_CACHE_PATH, int(get_settings('media_info_cache_size')))
+
+
+def parse_media_info(path, use_cache=True):
+    """解析文件的MediaInfo，use_cache为False时跳过缓存重新解析"""
+    return get_media_info_cache().parse(path, bypass=not use_cache)
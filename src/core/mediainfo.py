@@ -1,198 +1,228 @@
-import json
 import os
 import re
 
-from pymediainfo import MediaInfo
-
+from src.core.media_info_cache import parse_media_info
+from src.core.rename import get_video_info
 from src.core.tool import get_settings
 
+# get_media_info()各类轨道输出的字段：(属性名, 标签)，按MediaInfo文本报告的顺序排列
+MEDIA_INFO_GENERAL_FIELDS = (
+    ('other_unique_id', 'Unique ID'),
+    ('complete_name', 'Complete name'),
+    ('other_format', 'Format'),
+    ('format_version', 'Format version'),
+    ('format_profile', 'Format profile'),
+    ('other_codec_id', 'Codec ID'),
+    ('other_file_size', 'File size'),
+    ('other_duration', 'Duration'),
+    ('other_overall_bit_rate_mode', 'Overall bit rate mode'),
+    ('other_overall_bit_rate', 'Overall bit rate'),
+    ('other_frame_rate', 'Frame rate'),
+    ('movie_name', 'Movie name'),
+    ('album', 'Album'),
+    ('description', 'Description'),
+    ('encoded_date', 'Encoded date'),
+    ('writing_application', 'Writing application'),
+    ('writing_library', 'Writing library'),
+    ('comment', 'Comment'),
+    ('cover', 'Cover'),
+    ('attachments', 'Attachments'),
+)
+MEDIA_INFO_VIDEO_FIELDS = (
+    ('other_track_id', 'ID'),
+    ('other_id_in_the_original_source_medium', 'ID in the original source medium'),
+    ('other_format', 'Format'),
+    ('format_info', 'Format/Info'),
+    ('format_profile', 'Format profile'),
+    ('format_settings', 'Format settings'),
+    ('format_settings__cabac', 'Format settings, CABAC'),
+    ('other_format_settings__reference_frames', 'Format settings, Reference frames'),
+    ('other_hdr_format', 'HDR format'),
+    ('codec_id', 'Codec ID'),
+    ('codec_id_info', 'Codec ID / Info'),
+    ('other_duration', 'Duration'),
+    ('other_bit_rate', 'Bit rate'),
+    ('other_width', 'Width'),
+    ('other_height', 'Height'),
+    ('other_display_aspect_ratio', 'Display aspect ratio'),
+    ('other_frame_rate_mode', 'Frame rate mode'),
+    ('other_frame_rate', 'Frame rate'),
+    ('other_minimum_frame_rate', 'Minimum frame rate'),
+    ('other_maximum_frame_rate', 'Maximum frame rate'),
+    ('color_space', 'Color space'),
+    ('other_chroma_subsampling', 'Chroma subsampling'),
+    ('other_bit_depth', 'Bit depth'),
+    ('scan_type', 'Scan type'),
+    ('bits__pixel_frame', 'Bits/(Pixel*Frame)'),
+    ('other_stream_size', 'Stream size'),
+    ('other_language', 'Language'),
+    ('other_writing_library', 'Writing library'),
+    ('encoding_settings', 'Encoding settings'),
+    ('default', 'Default'),
+    ('forced', 'Forced'),
+    ('color_range', 'Color range'),
+    ('color_primaries', 'Color primaries'),
+    ('transfer_characteristics', 'Transfer characteristics'),
+    ('matrix_coefficients', 'Matrix coefficients'),
+    ('mastering_display_color_primaries', 'Mastering display color primaries'),
+    ('mastering_display_luminance', 'Mastering display luminance'),
+    ('maximum_content_light_level', 'Maximum Content Light Level'),
+    ('maxcll_original', 'MaxCLL Original'),
+    ('maximum_frameaverage_light_level', 'Maximum Frame-Average Light Level'),
+    ('maxfall_original', 'MaxFALL Original'),
+    ('original_source_medium', 'Original source medium'),
+    ('sei_rbsp_stop_one_bit', 'SEI_rbsp_stop_one_bit'),
+    ('codec_configuration_box', 'Codec configuration box'),
+)
+MEDIA_INFO_AUDIO_FIELDS = (
+    ('other_track_id', 'ID'),
+    ('other_id_in_the_original_source_medium', 'ID in the original source medium'),
+    ('other_format', 'Format'),
+    ('format_info', 'Format/Info'),
+    ('other_commercial_name', 'Commercial name'),
+    ('codec_id', 'Codec ID'),
+    ('other_duration', 'Duration'),
+    ('other_bit_rate_mode', 'Bit rate mode'),
+    ('other_bit_rate', 'Bit rate'),
+    ('other_maximum_bit_rate', 'Maximum bit rate'),
+    ('other_channel_s', 'Channel(s)'),
+    ('channel_layout', 'Channel layout'),
+    ('other_sampling_rate', 'Sampling rate'),
+    ('other_frame_rate', 'Frame rate'),
+    ('other_bit_depth', 'Bit depth'),
+    ('other_compression_mode', 'Compression mode'),
+    ('other_delay_relative_to_video', 'Delay relative to video'),
+    ('other_stream_size', 'Stream size'),
+    ('title', 'Title'),
+    ('other_language', 'Language'),
+    ('other_service_kind', 'Service kind'),
+    ('default', 'Default'),
+    ('other_forced', 'Forced'),
+    ('original_source_medium', 'Original source medium'),
+    ('complexity_index', 'Complexity index'),
+    ('number_of_dynamic_objects', 'Number of dynamic objects'),
+    ('other_bed_channel_count', 'Bed channel count'),
+    ('bed_channel_configuration', 'Bed channel configuration'),
+    ('alternate_group', 'Alternate group'),
+)
+MEDIA_INFO_TEXT_FIELDS = (
+    ('other_track_id', 'ID'),
+    ('other_id_in_the_original_source_medium', 'ID in the original source medium'),
+    ('other_format', 'Format'),
+    ('muxing_mode', 'Muxing mode'),
+    ('codec_id', 'Codec ID'),
+    ('codec_id_info', 'Codec ID/Info'),
+    ('other_duration', 'Duration'),
+    ('other_bit_rate', 'Bit rate'),
+    ('other_frame_rate', 'Frame rate'),
+    ('count_of_elements', 'Count of elements'),
+    ('other_stream_size', 'Stream size'),
+    ('title', 'Title'),
+    ('other_language', 'Language'),
+    ('default', 'Default'),
+    ('forced', 'Forced'),
+    ('original_source_medium', 'Original source medium'),
+)
+# 菜单轨道中章节条目的属性名，如00_01_23456表示00:01:23.456
+MEDIA_INFO_CHAPTER_PATTERN = re.compile(r'(\d{2})_(\d{2})_(\d{5})')
+# 等于该值时不输出的字段
+MEDIA_INFO_SKIPPED_VALUES = {'other_delay_relative_to_video': '00:00:00.000'}
+
+# 预先生成每一行的前缀（标签左对齐到36个字符），渲染时只需拼接值
+_MEDIA_INFO_LAYOUTS = {
+    track_type: tuple((key, f'{label:36}: ') for key, label in fields)
+    for track_type, fields in (('General', MEDIA_INFO_GENERAL_FIELDS), ('Video', MEDIA_INFO_VIDEO_FIELDS),
+                               ('Audio', MEDIA_INFO_AUDIO_FIELDS), ('Text', MEDIA_INFO_TEXT_FIELDS))
+}
+
+# analyze_media()输出的结构化字段：(属性名, 类型)，数值统一转换为int或float，便于程序直接使用
+ANALYSIS_GENERAL_FIELDS = (
+    ('format', str), ('format_version', str), ('file_size', int), ('duration', float),
+    ('overall_bit_rate_mode', str), ('overall_bit_rate', int), ('frame_rate', float), ('frame_count', int),
+    ('movie_name', str), ('encoded_date', str), ('writing_application', str), ('writing_library', str),
+    ('count_of_video_streams', int), ('count_of_audio_streams', int), ('count_of_text_streams', int),
+)
+ANALYSIS_VIDEO_FIELDS = (
+    ('track_id', str), ('format', str), ('format_profile', str), ('codec_id', str), ('duration', float),
+    ('bit_rate', int), ('width', int), ('height', int), ('display_aspect_ratio', float), ('frame_rate_mode', str),
+    ('frame_rate', float), ('frame_count', int), ('color_space', str), ('chroma_subsampling', str),
+    ('bit_depth', int), ('scan_type', str), ('hdr_format', str), ('color_range', str), ('color_primaries', str),
+    ('transfer_characteristics', str), ('matrix_coefficients', str), ('delay', float), ('writing_library', str),
+    ('language', str), ('default', str), ('forced', str),
+)
+ANALYSIS_AUDIO_FIELDS = (
+    ('track_id', str), ('format', str), ('commercial_name', str), ('codec_id', str), ('duration', float),
+    ('bit_rate_mode', str), ('bit_rate', int), ('channel_s', int), ('channel_layout', str), ('sampling_rate', int),
+    ('bit_depth', int), ('compression_mode', str), ('delay_relative_to_video', float), ('title', str),
+    ('language', str), ('default', str), ('forced', str),
+)
+
+
+def _render_fields(parts, track, layout):
+    for key, prefix in layout:
+        value = getattr(track, key, None)
+        # 同一属性有多个值时（other_*）取第一个，即MediaInfo文本报告中的写法
+        if type(value) is list:
+            value = value[0]
+        if value is None:
+            continue
+        if key == 'complete_name':
+            value = os.path.basename(value)  # 用于只保留影片文件名，去除路径
+        elif MEDIA_INFO_SKIPPED_VALUES.get(key) == value:
+            continue
+        parts.append(f'{prefix}{value}\n')
+
+
+def render_media_info(media_info):
+    """
+    按_MEDIA_INFO_LAYOUTS把MediaInfo对象渲染为文本报告，直接读取各Track的属性，逐行收集后一次拼接。
 
-def get_media_info(file_path):
+    返回:
+    str: 不含工具水印的报告
+    """
+    parts = []
+    audio_count, text_count = 1, 1
+    for track in media_info.tracks:
+        track_type = track.track_type
+        if track_type == 'General':
+            parts.append('General\n')
+        elif track_type == 'Video':
+            parts.append('\nVideo\n')
+        elif track_type == 'Audio':
+            # 多音轨、多字幕的资源按顺序编号
+            parts.append(f'\nAudio #{audio_count}\n')
+            audio_count += 1
+        elif track_type == 'Text':
+            parts.append(f'\nText #{text_count}\n')
+            text_count += 1
+        elif track_type == 'Menu':
+            parts.append('\nMenu\n')
+            # 章节条目的属性名是时间戳，值是章节标题，只能遍历全部属性
+            for key, value in track.__dict__.items():
+                match = MEDIA_INFO_CHAPTER_PATTERN.match(key)
+                if match:
+                    hours, minutes, seconds_millis = match.groups()
+                    seconds, millis = divmod(int(seconds_millis), 1000)
+                    parts.append(f'{f"{hours}:{minutes}:{seconds:02}.{millis:03}":36}: {value}\n')
+            continue
+        else:
+            continue
+        _render_fields(parts, track, _MEDIA_INFO_LAYOUTS[track_type])
+    return ''.join(parts)
+
+
+# media_info：已解析的MediaInfo对象（如VideoSession.media_info），传入时不再重新解析
+# use_cache：使用MediaInfo解析缓存，为False时重新解析文件并刷新缓存
+def get_media_info(file_path, media_info=None, use_cache=True):
     if not os.path.exists(file_path):
         print('文件路径不存在')
         return False, '视频文件路径不存在'
 
     try:
         # 尝试解析媒体信息
-        media_info = MediaInfo.parse(file_path)
-        json_data = media_info.to_json()
-
-        # 解析 JSON 数据
-        data = json.loads(json_data)
-
-        # 初始化输出字符串
-        output = ''
-
-        # 初始化计数器
-        audio_count, text_count = 1, 1
-
-        # 遍历所有 track
-        # print(data)
-        for track in data['tracks']:
-            if track['track_type'] == 'General':
-                # 处理 General 类型的 track
-                output += 'General\n'
-                for key, label in [
-                    ('other_unique_id', 'Unique ID'),
-                    ('complete_name', 'Complete name'),
-                    ('other_format', 'Format'),
-                    ('format_version', 'Format version'),
-                    ('format_profile', 'Format profile'),
-                    ('other_codec_id', 'Codec ID'),
-                    ('other_file_size', 'File size'),
-                    ('other_duration', 'Duration'),
-                    ('other_overall_bit_rate_mode', 'Overall bit rate mode'),
-                    ('other_overall_bit_rate', 'Overall bit rate'),
-                    ('other_frame_rate', 'Frame rate'),
-                    ('movie_name', 'Movie name'),
-                    ('album', 'Album'),
-                    ('description', 'Description'),
-                    ('encoded_date', 'Encoded date'),
-                    ('writing_application', 'Writing application'),
-                    ('writing_library', 'Writing library'),
-                    ('comment', 'Comment'),
-                    ('cover', 'Cover'),
-                    ('attachments', 'Attachments')
-                ]:
-                    value = track[key][0] if isinstance(track.get(key), list) else track.get(key)
-                    if value is not None:
-                        if label == 'Complete name':
-                            value = os.path.basename(value)  # 用于只保留影片文件名，去除路径
-                        output += f'{label:36}: {value}\n'
-
-            elif track['track_type'] == 'Video':
-                # 处理 Video 类型的 track
-                output += '\nVideo\n'
-                for key, label in [
-                    ('other_track_id', 'ID'),
-                    ('other_id_in_the_original_source_medium', 'ID in the original source medium'),
-                    ('other_format', 'Format'),
-                    ('format_info', 'Format/Info'),
-                    ('format_profile', 'Format profile'),
-                    ('format_settings', 'Format settings'),
-                    ('format_settings__cabac', 'Format settings, CABAC'),
-                    ('other_format_settings__reference_frames', 'Format settings, Reference frames'),
-                    ('other_hdr_format', 'HDR format'),
-                    ('codec_id', 'Codec ID'),
-                    ('codec_id_info', 'Codec ID / Info'),
-                    ('other_duration', 'Duration'),
-                    ('other_bit_rate', 'Bit rate'),
-                    ('other_width', 'Width'),
-                    ('other_height', 'Height'),
-                    ('other_display_aspect_ratio', 'Display aspect ratio'),
-                    ('other_frame_rate_mode', 'Frame rate mode'),
-                    ('other_frame_rate', 'Frame rate'),
-                    ('other_minimum_frame_rate', 'Minimum frame rate'),
-                    ('other_maximum_frame_rate', 'Maximum frame rate'),
-                    ('color_space', 'Color space'),
-                    ('other_chroma_subsampling', 'Chroma subsampling'),
-                    ('other_bit_depth', 'Bit depth'),
-                    ('scan_type', 'Scan type'),
-                    ('bits__pixel_frame', 'Bits/(Pixel*Frame)'),
-                    ('other_stream_size', 'Stream size'),
-                    ('other_language', 'Language'),
-                    ('other_writing_library', 'Writing library'),
-                    ('encoding_settings', 'Encoding settings'),
-                    ('default', 'Default'),
-                    ('forced', 'Forced'),
-                    ('color_range', 'Color range'),
-                    ('color_primaries', 'Color primaries'),
-                    ('transfer_characteristics', 'Transfer characteristics'),
-                    ('matrix_coefficients', 'Matrix coefficients'),
-                    ('mastering_display_color_primaries', 'Mastering display color primaries'),
-                    ('mastering_display_luminance', 'Mastering display luminance'),
-                    ('maximum_content_light_level', 'Maximum Content Light Level'),
-                    ('maxcll_original', 'MaxCLL Original'),
-                    ('maximum_frameaverage_light_level', 'Maximum Frame-Average Light Level'),
-                    ('maxfall_original', 'MaxFALL Original'),
-                    ('original_source_medium', 'Original source medium'),
-                    ('sei_rbsp_stop_one_bit', 'SEI_rbsp_stop_one_bit'),
-                    ('codec_configuration_box', 'Codec configuration box'),
-                ]:
-                    value = track[key][0] if isinstance(track.get(key), list) else track.get(key)
-                    if value is not None:
-                        output += f'{label:36}: {value}\n'
-
-            elif track['track_type'] == 'Audio':
-                # 处理 Audio 类型的 track
-                output += f'\nAudio #{audio_count}\n'
-                audio_count += 1  # 由于有多音频的资源，故计数器+1
-                for key, label in [
-                    ('other_track_id', 'ID'),
-                    ('other_id_in_the_original_source_medium', 'ID in the original source medium'),
-                    ('other_format', 'Format'),
-                    ('format_info', 'Format/Info'),
-                    ('other_commercial_name', 'Commercial name'),
-                    ('codec_id', 'Codec ID'),
-                    ('other_duration', 'Duration'),
-                    ('other_bit_rate_mode', 'Bit rate mode'),
-                    ('other_bit_rate', 'Bit rate'),
-                    ('other_maximum_bit_rate', 'Maximum bit rate'),
-                    ('other_channel_s', 'Channel(s)'),
-                    ('channel_layout', 'Channel layout'),
-                    ('other_sampling_rate', 'Sampling rate'),
-                    ('other_frame_rate', 'Frame rate'),
-                    ('other_bit_depth', 'Bit depth'),
-                    ('other_compression_mode', 'Compression mode'),
-                    ('other_delay_relative_to_video', 'Delay relative to video'),
-                    ('other_stream_size', 'Stream size'),
-                    ('title', 'Title'),
-                    ('other_language', 'Language'),
-                    ('other_service_kind', 'Service kind'),
-                    ('default', 'Default'),
-                    ('other_forced', 'Forced'),
-                    ('original_source_medium', 'Original source medium'),
-                    ('complexity_index', 'Complexity index'),
-                    ('number_of_dynamic_objects', 'Number of dynamic objects'),
-                    ('other_bed_channel_count', 'Bed channel count'),
-                    ('bed_channel_configuration', 'Bed channel configuration'),
-                    ('alternate_group', 'Alternate group'),
-                ]:
-                    value = track[key][0] if isinstance(track.get(key), list) else track.get(key)
-                    if value is not None:
-                        if label == 'Delay relative to video' and value == '00:00:00.000':
-                            continue
-                        output += f'{label:36}: {value}\n'
-
-            elif track['track_type'] == 'Text':
-                # 处理 Text 类型的 track
-                output += f'\nText #{text_count}\n'
-                text_count += 1  # 由于有多字幕的资源，故计数器+1
-                for key, label in [
-                    ('other_track_id', 'ID'),
-                    ('other_id_in_the_original_source_medium', 'ID in the original source medium'),
-                    ('other_format', 'Format'),
-                    ('muxing_mode', 'Muxing mode'),
-                    ('codec_id', 'Codec ID'),
-                    ('codec_id_info', 'Codec ID/Info'),
-                    ('other_duration', 'Duration'),
-                    ('other_bit_rate', 'Bit rate'),
-                    ('other_frame_rate', 'Frame rate'),
-                    ('count_of_elements', 'Count of elements'),
-                    ('other_stream_size', 'Stream size'),
-                    ('title', 'Title'),
-                    ('other_language', 'Language'),
-                    ('default', 'Default'),
-                    ('forced', 'Forced'),
-                    ('original_source_medium', 'Original source medium'),
-                ]:
-                    value = track[key][0] if isinstance(track.get(key), list) else track.get(key)
-                    if value is not None:
-                        output += f'{label:36}: {value}\n'
-
-            elif track['track_type'] == 'Menu':
-                output += f'\nMenu\n'
-                # 遍历所有章节条目
-                for key, value in track.items():
-                    # 使用正则表达式匹配时间戳和章节标题的格式
-                    match = re.match(r'(\d{2})_(\d{2})_(\d{5})', key)
-                    if match:
-                        # 格式化时间戳
-                        hours, minutes, seconds_millis = match.groups()
-                        seconds, millis = divmod(int(seconds_millis), 1000)
-                        timestamp = f'{hours}:{minutes}:{seconds:02}.{millis:03}'
-                        # 添加到输出字符串
-                        output += f'{timestamp:36}: {value}\n'
+        if media_info is None:
+            media_info = parse_media_info(file_path, use_cache)
+        output = render_media_info(media_info)
 
         if get_settings('media_info_suffix'):  # 用户可以选择是否需要增加工具水印（方便推广）
             output += '\nCreated by Publish Helper'
@@ -207,3 +237,57 @@ def get_media_info(file_path):
         # MediaInfo无法解析文件
         print(f'无法解析文件：{e}')
         return False, f'无法解析文件：{e}'
+
+
+def _track_fields(track, fields):
+    # 转换失败（如多个值以“/”分隔）时保留原值
+    result = {}
+    for key, kind in fields:
+        value = getattr(track, key)
+        if value is not None and not isinstance(value, kind):
+            try:
+                value = kind(value)
+            except (TypeError, ValueError):
+                pass
+        result[key] = value
+    return result
+
+
+def media_fields(media_info):
+    """
+    从MediaInfo对象中取出General、Video、Audio轨道的结构化字段（见ANALYSIS_*_FIELDS），缺失的字段为None。
+
+    返回:
+    dict: {'general': dict, 'video': list[dict], 'audio': list[dict]}，视频和音频按轨道顺序排列
+    """
+    general_tracks = media_info.general_tracks
+    return {
+        'general': _track_fields(general_tracks[0], ANALYSIS_GENERAL_FIELDS) if general_tracks else {},
+        'video': [_track_fields(track, ANALYSIS_VIDEO_FIELDS) for track in media_info.video_tracks],
+        'audio': [_track_fields(track, ANALYSIS_AUDIO_FIELDS) for track in media_info.audio_tracks],
+    }
+
+
+# 只解析一次，同时得到get_media_info()的文本、get_video_info()的参数和结构化字段
+# media_info、use_cache与get_media_info()相同
+# 返回：(True, {'media_info': MediaInfo文本, 'video_info': get_video_info()的参数列表, 'fields': media_fields()})，
+# 失败时为(False, 错误信息)
+def analyze_media(file_path, media_info=None, use_cache=True):
+    if not os.path.exists(file_path):
+        print('文件路径不存在')
+        return False, '视频文件路径不存在'
+
+    try:
+        if media_info is None:
+            media_info = parse_media_info(file_path, use_cache)
+    except Exception as e:
+        print(f'无法解析文件：{e}')
+        return False, f'无法解析文件：{e}'
+
+    get_media_info_success, report = get_media_info(file_path, media_info)
+    if not get_media_info_success:
+        return False, report
+    get_video_info_success, video_info = get_video_info(file_path, media_info)
+    if not get_video_info_success:
+        return False, video_info[0]
+    return True, {'media_info': report, 'video_info': video_info, 'fields': media_fields(media_info)}
@@ -1,5 +1,6 @@
 # 此处仅提供一个简单的示例，具体实现起来方案有很多，可按需开发
 import json
+import mimetypes
 import os
 
 import requests
@@ -7,9 +8,10 @@ import requests
 from src.core.tool import get_picture_bed_type
 
 
-def upload_picture(picture_bed_api_url, picture_bed_api_token, picture_path):
+# picture_data：内存中已编码的图片，传入时picture_path仅作为上传的文件名，不读取磁盘
+def upload_picture(picture_bed_api_url, picture_bed_api_token, picture_path, picture_data=None):
     print(picture_bed_api_url, picture_bed_api_token, picture_path)
-    if not os.path.exists(picture_path):  # 检测是否存在图片
+    if picture_data is None and not os.path.exists(picture_path):  # 检测是否存在图片
         print('图片文件路径不存在')
         return False, '图片文件路径不存在'
     else:
@@ -22,28 +24,36 @@ def upload_picture(picture_bed_api_url, picture_bed_api_token, picture_path):
         if get_picture_bed_type_success:
             print(f'获取到图床的类型：{picture_bed_type}')
             if picture_bed_type == 'lsky-pro':
-                return lsky_pro_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path)
+                return lsky_pro_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path, picture_data)
             elif picture_bed_type == 'bohe':
-                return bohe_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path)
+                return bohe_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path, picture_data)
             elif picture_bed_type == 'chevereto':
-                return chevereto_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path)
+                return chevereto_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path, picture_data)
             elif picture_bed_type == 'freeimage':
-                return freeimage_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path)
+                return freeimage_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path, picture_data)
             elif picture_bed_type == 'imgbb':
-                return imgbb_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path)
+                return imgbb_picture_bed(picture_bed_api_url, picture_bed_api_token, picture_path, picture_data)
             elif picture_bed_type == 'pixhost':
-                return pixhost_picture_bed(picture_bed_api_url, picture_path)
+                return pixhost_picture_bed(picture_bed_api_url, picture_path, picture_data)
             else:
                 return False, '你错误更改了图床配置文件？冒号前面的类型是不能随便改的！如果需要支持更多新类型的图床请提Issues，前提是图床支持API上传！'
         else:
             return False, picture_bed_type
 
 
+def _picture_file(frame_path, frame_data):
+    """生成requests上传所需的(文件名, 内容, MIME类型)，文件内容一次读入后立即关闭文件"""
+    if frame_data is None:
+        with open(frame_path, 'rb') as file:
+            frame_data = file.read()
+    return frame_path, frame_data, mimetypes.guess_type(frame_path)[0] or 'image/png'
+
+
 # 兰空图床
-def lsky_pro_picture_bed(api_url, api_token, frame_path):
+def lsky_pro_picture_bed(api_url, api_token, frame_path, frame_data=None):
     print('接受到上传兰空图床请求')
     url = api_url
-    files = {'file': (frame_path, open(frame_path, 'rb'), 'image/png')}
+    files = {'file': _picture_file(frame_path, frame_data)}
     headers = {'Authorization': api_token, 'Accept': 'json'}
     data = {}
     print('值已经获取')
@@ -72,10 +82,10 @@ def lsky_pro_picture_bed(api_url, api_token, frame_path):
 
 
 # 薄荷图床
-def bohe_picture_bed(api_url, api_token, frame_path):
+def bohe_picture_bed(api_url, api_token, frame_path, frame_data=None):
     print('开始上传薄荷图床')
     url = api_url
-    files = {'uploadedFile': (frame_path, open(frame_path, 'rb'), 'image/png')}
+    files = {'uploadedFile': _picture_file(frame_path, frame_data)}
     data = {'api_token': api_token, 'image_compress': 0, 'image_compress_level': 80}
 
     try:
@@ -86,9 +96,6 @@ def bohe_picture_bed(api_url, api_token, frame_path):
         print(f'请求过程中出现错误：{str(e)}')
         return False, f'请求过程中出现错误：{str(e)}'
 
-    # 关闭文件流，避免资源泄露
-    files['uploadedFile'][1].close()
-
     # 将响应文本转换为字典
     try:
         api_response = json.loads(res.text)
@@ -110,11 +117,11 @@ def bohe_picture_bed(api_url, api_token, frame_path):
 
 
 # chevereto图床
-def chevereto_picture_bed(api_url, api_token, frame_path):
+def chevereto_picture_bed(api_url, api_token, frame_path, frame_data=None):
     print('接受到上传chevereto图床请求')
     url = api_url
     data = {'expiration': 'PT5M', 'X-API-Key': api_token, 'key': api_token}
-    files = {'source': (frame_path, open(frame_path, 'rb'), 'image/png')}
+    files = {'source': _picture_file(frame_path, frame_data)}
     print('值已经获取')
 
     try:
@@ -142,11 +149,11 @@ def chevereto_picture_bed(api_url, api_token, frame_path):
 
 
 # freeimage图床
-def freeimage_picture_bed(api_url, api_token, frame_path):
+def freeimage_picture_bed(api_url, api_token, frame_path, frame_data=None):
     print('接受到上传freeimage图床请求')
     url = api_url
     data = {'key': api_token, 'format': 'txt'}
-    files = {'source': (frame_path, open(frame_path, 'rb'), 'image/png')}
+    files = {'source': _picture_file(frame_path, frame_data)}
     print('值已经获取')
 
     try:
@@ -168,11 +175,11 @@ def freeimage_picture_bed(api_url, api_token, frame_path):
 
 
 # imgbb图床
-def imgbb_picture_bed(api_url, api_token, frame_path):
+def imgbb_picture_bed(api_url, api_token, frame_path, frame_data=None):
     print('接受到上传imgbb图床请求')
     url = api_url
     data = {'expiration': '600', 'key': api_token}
-    files = {'image': (frame_path, open(frame_path, 'rb'), 'image/png')}
+    files = {'image': _picture_file(frame_path, frame_data)}
     print('值已经获取')
 
     try:
@@ -199,10 +206,10 @@ def imgbb_picture_bed(api_url, api_token, frame_path):
 
 
 # pixhost图床
-def pixhost_picture_bed(api_url, frame_path):
+def pixhost_picture_bed(api_url, frame_path, frame_data=None):
     print('接受到上传pixhost图床请求')
     url = api_url
-    files = {'img': (frame_path, open(frame_path, 'rb'), 'image/jpeg')}
+    files = {'img': _picture_file(frame_path, frame_data)}
     data = {'content_type': 0, 'max_th_size': 420}
     headers = {'Accept': 'application/json'}
     print('值已经获取')
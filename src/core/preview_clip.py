@@ -0,0 +1,195 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.core.crop import apply_crop, detect_video_crop
+from src.core.keyframe import get_keyframe_index
+from src.core.screenshot import FRAME_SOURCE_BACKENDS, JOB_POLL_INTERVAL, get_video_hdr_transfer, open_frame_source
+from src.core.tone_map import get_tone_mapper
+from src.core.tool import generate_image_filename
+
+PREVIEW_FORMATS = ('webp', 'gif')
+# 相邻两帧缩小后的平均像素差不超过该值时视为重复帧，合并为一帧并延长显示时间（静止镜头、动画的一拍二）
+PREVIEW_DUPLICATE_DIFF = 1.0
+# 超出大小限制时依次尝试的质量和宽度（相对preview_quality、preview_width的比例），先降质量再缩小；gif没有质量参数，只缩小
+PREVIEW_QUALITY_FACTORS = (1.0, 0.7, 0.4)
+PREVIEW_SCALE_FACTORS = (1.0, 0.75, 0.5)
+
+
+def decimate_indices(frame_count, source_fps, preview_fps):
+    """
+    按目标帧率从一段frame_count帧中抽帧，帧率不成整数倍（如23.976到10）时也均匀分布。
+
+    返回:
+    tuple: (保留的帧在段内的序号, 每帧的显示时长（毫秒）)，均为NumPy数组
+    """
+    if frame_count <= 0:
+        return np.zeros(0, dtype=int), np.zeros(0)
+    if preview_fps <= 0 or preview_fps >= source_fps:
+        indices = np.arange(frame_count)
+    else:
+        indices = np.unique(np.floor(np.arange(0, frame_count, source_fps / preview_fps)).astype(int))
+    # 每帧显示到下一保留帧为止，最后一帧显示到段尾
+    durations = np.diff(np.append(indices, frame_count)) * 1000 / source_fps
+    return indices, durations
+
+
+def drop_duplicate_frames(clip, durations, threshold=PREVIEW_DUPLICATE_DIFF):
+    """
+    去掉与前一帧几乎相同的帧，时长并入前一个保留的帧，总时长不变。
+
+    参数:
+    clip (ndarray): 形状为(帧数, 高, 宽, 3)的uint8数组
+
+    返回:
+    tuple: (保留的帧, 对应的显示时长)
+    """
+    if len(clip) < 2:
+        return clip, durations
+    differences = np.abs(clip[1:].astype(np.int16) - clip[:-1]).mean(axis=(1, 2, 3))
+    keep = np.concatenate([[True], differences > threshold])
+    groups = np.cumsum(keep) - 1
+    return clip[keep], np.bincount(groups, weights=durations)
+
+
+def encode_animation(clip, durations, image_format='webp', quality=75):
+    """把BGR帧编码为循环播放的动图，返回bytes"""
+    images = [Image.fromarray(np.ascontiguousarray(frame[:, :, ::-1])) for frame in clip]
+    options = {'save_all': True, 'append_images': images[1:], 'loop': 0,
+               'duration': [max(1, int(round(duration))) for duration in durations]}
+    if image_format == 'webp':
+        options.update(quality=quality, method=4)
+    else:
+        options.update(optimize=True)
+    buffer = io.BytesIO()
+    images[0].save(buffer, format=image_format.upper(), **options)
+    return buffer.getvalue()
+
+
+def _fit_to_budget(clip, durations, image_format, quality, max_bytes, job=None):
+    # 在后台线程中依次尝试：每个宽度先用各级质量编码，第一个不超过max_bytes的结果即为输出；
+    # max_bytes为0时不限制大小，只编码一次
+    qualities = [max(1, int(quality * factor)) for factor in PREVIEW_QUALITY_FACTORS] \
+        if image_format == 'webp' else [quality]
+    smallest = None
+    for scale in PREVIEW_SCALE_FACTORS:
+        frames = clip
+        if scale < 1:
+            size = (max(2, int(clip.shape[2] * scale) // 2 * 2), max(2, int(clip.shape[1] * scale) // 2 * 2))
+            frames = np.stack([cv2.resize(frame, size, interpolation=cv2.INTER_AREA) for frame in clip])
+        for attempt_quality in qualities:
+            if job is not None:
+                job.advance()
+            data = encode_animation(frames, durations, image_format, attempt_quality)
+            print(f'预览{frames.shape[2]}x{frames.shape[1]}'
+                  f'{f"，质量{attempt_quality}" if image_format == "webp" else ""}：{len(data)}字节')
+            if max_bytes <= 0 or len(data) <= max_bytes:
+                return data, None
+            smallest = len(data) if smallest is None else min(smallest, len(data))
+    return None, smallest
+
+
+# 参数：video_path：源视频路径；preview_path：输出路径；preview_position：片段起点在视频中的占比；
+# preview_duration：片段时长（秒）；preview_fps：动图的帧率，按该帧率抽帧，重复帧再合并；
+# preview_width：动图宽度，高度按比例计算，不放大；preview_format：webp或gif；preview_quality：webp的质量（1-100）
+# preview_max_bytes：输出大小上限，超出时先降低质量再缩小（见PREVIEW_QUALITY_FACTORS、PREVIEW_SCALE_FACTORS），为0时不限制
+# in_memory、tone_mapping、screenshot_backend、session、auto_crop、job与get_screenshot()相同
+# 返回：(True, 动图路径)，in_memory时为(文件名, bytes)；失败时为(False, 错误信息)
+def get_preview_clip(video_path, preview_path, preview_position=0.5, preview_duration=3.0, preview_fps=10,
+                     preview_width=480, preview_format='webp', preview_quality=75, preview_max_bytes=2 * 1024 * 1024,
+                     in_memory=False, tone_mapping=False, screenshot_backend='opencv', session=None, auto_crop=False,
+                     job=None):
+    preview_format = preview_format.lower()
+    if preview_format not in PREVIEW_FORMATS:
+        print(f'不支持的预览格式：{preview_format}')
+        return False, f'不支持的预览格式：{preview_format}'
+    if screenshot_backend not in FRAME_SOURCE_BACKENDS:
+        print(f'不支持的取帧后端：{screenshot_backend}')
+        return False, f'不支持的取帧后端：{screenshot_backend}'
+
+    try:
+        if not in_memory and not os.path.exists(preview_path):
+            os.makedirs(preview_path)
+            print('已创建输出路径')
+    except Exception as e:
+        print(f'创建目录时出错：{e}')
+        return False, f'创建目录时出错：{e}'
+
+    source = None
+    executor = None
+    try:
+        if session is not None:
+            source = session.frame_source(screenshot_backend)
+        else:
+            source = open_frame_source(video_path, screenshot_backend, get_keyframe_index(video_path))
+        source.job = job
+        fps = source.fps
+        frame_count = max(1, min(int(preview_duration * fps), source.total_frames))
+        start_frame = min(int(source.total_frames * preview_position), source.total_frames - frame_count)
+        indices, durations = decimate_indices(frame_count, fps, preview_fps)
+        print(f'预览片段：第{start_frame}帧起共{frame_count}帧，抽取{len(indices)}帧')
+
+        crop = None
+        if auto_crop:
+            crop = session.crop(screenshot_backend) if session is not None else detect_video_crop(source)
+        tone_mapper = get_tone_mapper(get_video_hdr_transfer(video_path, session) if tone_mapping else None)
+
+        # 整段只解码一次，只有抽中的帧裁剪、缩小后保留，缩小后再色调映射
+        wanted = set((start_frame + indices).tolist())
+        clip = None
+        size = None
+        kept = 0
+        if job is not None:
+            job.begin('读取预览帧', frame_count)
+        for frame_number, frame in source.read_segment(start_frame, frame_count):
+            if job is not None:
+                job.advance()
+            if frame_number not in wanted:
+                continue
+            frame = apply_crop(frame, crop)
+            if size is None:
+                width = min(preview_width, frame.shape[1]) if preview_width > 0 else frame.shape[1]
+                size = (width // 2 * 2, max(2, int(round(frame.shape[0] * width / frame.shape[1])) // 2 * 2))
+                clip = np.empty((len(indices), size[1], size[0], 3), dtype=np.uint8)
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA) if frame.shape[1::-1] != size else frame
+            clip[kept] = tone_mapper(frame) if tone_mapper is not None else frame
+            kept += 1
+        if kept == 0:
+            return False, '无法读取预览片段'
+        # 读取中途失败时只保留已读到的帧，时长按实际帧数截断
+        clip, durations = drop_duplicate_frames(clip[:kept], durations[:kept])
+        print(f'去除重复帧后剩余{len(clip)}帧')
+
+        # 编码在后台线程中进行，主线程等待时检查任务是否被取消
+        if job is not None:
+            job.begin('编码预览', len(PREVIEW_SCALE_FACTORS) * (len(PREVIEW_QUALITY_FACTORS)
+                                                             if preview_format == 'webp' else 1), '次')
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(_fit_to_budget, clip, durations, preview_format, preview_quality,
+                                 preview_max_bytes, job)
+        while not wait([future], timeout=JOB_POLL_INTERVAL).done:
+            if job is not None:
+                job.check()
+        data, smallest = future.result()
+        if data is None:
+            return False, f'预览超出大小限制：最小{smallest}字节，限制{preview_max_bytes}字节'
+
+        filename = generate_image_filename(preview_path, preview_format)
+        if in_memory:
+            return True, (os.path.basename(filename), data)
+        with open(filename, 'wb') as file:
+            file.write(data)
+        print(f'预览已保存：{filename}')
+        return True, filename
+    except Exception as e:
+        print(f'生成预览出错：{e}')
+        return False, f'生成预览出错：{e}'
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if source is not None and session is None:
+            source.close()
@@ -4,8 +4,7 @@ import os
 import re
 import shutil
 
-from pymediainfo import MediaInfo
-
+from src.core.media_info_cache import parse_media_info
 from src.core.tool import get_settings, get_abbreviation, chinese_to_int
 
 
@@ -127,13 +126,16 @@ def get_pt_gen_info(description):
         1) if year_match else '', other_titles, categories, actors, episodes, season
 
 
-def get_video_info(file_path):
+# media_info：已解析的MediaInfo对象（如VideoSession.media_info），传入时不再重新解析
+# use_cache：使用MediaInfo解析缓存，为False时重新解析文件并刷新缓存
+def get_video_info(file_path, media_info=None, use_cache=True):
     if not os.path.exists(file_path):
         print('文件路径不存在')
         return False, ['视频文件路径不存在']
     try:
         audio_count = 0
-        media_info = MediaInfo.parse(file_path)
+        if media_info is None:
+            media_info = parse_media_info(file_path, use_cache)
         print(media_info.to_json())
         # 初始化数据，避免空数据报错
         video_format = ''
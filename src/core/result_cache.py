@@ -0,0 +1,191 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from src.core.tool import generate_image_filename, get_settings
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# 截图和缩略图的结果缓存目录。同一文件以相同参数再次截图（例如转发到另一个站点）时直接复制缓存的图片，不再解码
+RESULT_CACHE_PATH = 'temp/cache'
+RESULT_CACHE_INDEX = 'index.json'
+# 跨进程的锁文件，API和GUI可以是两个进程，共用同一个缓存目录
+RESULT_CACHE_LOCK = 'index.lock'
+
+_result_cache_lock = threading.Lock()
+
+
+def _lock_file(file):
+    if os.name == 'nt':
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK重试约10秒后仍未获得锁时抛出OSError，继续等待
+                continue
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(file):
+    if os.name == 'nt':
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def file_identity(path):
+    """文件身份：设备号、inode、大小、修改时间，文件被替换或修改后对应的缓存自然失效"""
+    stat = os.stat(path)
+    return [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def make_cache_key(kind, video_path, parameters):
+    """
+    生成缓存键。
+
+    参数:
+    kind (str): 结果类型，如'screenshot'、'thumbnail'
+    video_path (str): 视频路径
+    parameters (list): 影响结果的参数，需可被JSON序列化
+
+    返回:
+    str: 40位十六进制字符串
+    """
+    data = json.dumps([kind, file_identity(video_path), parameters])
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    按LRU淘汰的图片结果缓存。每个键对应cache_path下的一个目录，
+    index.json记录各键的文件名、占用字节数和最后使用时间，总大小超过max_bytes时淘汰最久未使用的键。
+    """
+
+    def __init__(self, cache_path=RESULT_CACHE_PATH, max_bytes=512 * 1024 * 1024):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+
+    def get(self, key, output_path=None, with_info=False):
+        """
+        读取缓存。命中时把缓存的图片以新的随机文件名复制到output_path，返回路径列表；
+        output_path为None时不写入磁盘，返回[(文件名, bytes)]。未命中返回None。
+        with_info为True时命中返回(图片, 写入时附带的info)
+        """
+        if self.max_bytes <= 0:
+            return None
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            images = []
+            try:
+                for name in entry['files']:
+                    source = os.path.join(self.cache_path, key, name)
+                    extension = os.path.splitext(name)[1][1:]
+                    if output_path is None:
+                        with open(source, 'rb') as file:
+                            images.append((os.path.basename(generate_image_filename('', extension)), file.read()))
+                    else:
+                        image_path = generate_image_filename(output_path, extension)
+                        shutil.copyfile(source, image_path)
+                        images.append(image_path)
+            except OSError as e:
+                # 缓存文件被外部删除或损坏，丢弃该条目
+                print(f'读取缓存失败：{e}')
+                self._remove(index, key)
+                self._save_index(index)
+                return None
+            entry['last_used'] = time.time()
+            self._save_index(index)
+            return (images, entry.get('info', {})) if with_info else images
+
+    def put(self, key, images, info=None):
+        """
+        写入缓存，images的元素为图片路径或(文件名, bytes)；写入失败只打印信息，不影响调用方。
+        info为随图片保存的附加信息（需可被JSON序列化），如黑边裁剪区域，命中时不必再解码视频获取
+        """
+        if self.max_bytes <= 0:
+            return
+        with self._locked():
+            index = self._load_index()
+            self._remove(index, key)
+            directory = os.path.join(self.cache_path, key)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                files, size = [], 0
+                for i, image in enumerate(images):
+                    if isinstance(image, str):
+                        name = f'{i}{os.path.splitext(image)[1]}'
+                        shutil.copyfile(image, os.path.join(directory, name))
+                    else:
+                        name = f'{i}{os.path.splitext(image[0])[1]}'
+                        with open(os.path.join(directory, name), 'wb') as file:
+                            file.write(image[1])
+                    files.append(name)
+                    size += os.path.getsize(os.path.join(directory, name))
+            except OSError as e:
+                print(f'写入缓存失败：{e}')
+                shutil.rmtree(directory, ignore_errors=True)
+                return
+            index[key] = {'files': files, 'size': size, 'last_used': time.time(), 'info': info or {}}
+            self._evict(index)
+            self._save_index(index)
+
+    def _evict(self, index):
+        total = sum(entry['size'] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]['size']
+            self._remove(index, key)
+
+    def _remove(self, index, key):
+        index.pop(key, None)
+        shutil.rmtree(os.path.join(self.cache_path, key), ignore_errors=True)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # 线程锁之外再加文件锁，多个进程读写index.json时不会互相覆盖
+        os.makedirs(self.cache_path, exist_ok=True)
+        with _result_cache_lock, open(os.path.join(self.cache_path, RESULT_CACHE_LOCK), 'a+b') as lock_file:
+            _lock_file(lock_file)
+            try:
+                yield
+            finally:
+                _unlock_file(lock_file)
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.cache_path, RESULT_CACHE_INDEX), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        # 先写唯一的临时文件再替换，避免中断时留下不完整的索引
+        descriptor, temp_path = tempfile.mkstemp(prefix=RESULT_CACHE_INDEX, dir=self.cache_path)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(index, file)
+            os.replace(temp_path, os.path.join(self.cache_path, RESULT_CACHE_INDEX))
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+
+
+def get_result_cache():
+    """按设置result_cache_size（MB）创建缓存，为0时不缓存"""
+    return ResultCache(RESULT_CACHE_PATH, int(float(get_settings('result_cache_size')) * 1024 * 1024))
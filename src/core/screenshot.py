@@ -1,23 +1,100 @@
 import os
 import random
-from pathlib import Path
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 import cv2
 import numpy as np
-from PIL import Image
 
-from src.core.tool import generate_image_filename
+from src.core.crop import apply_crop, detect_video_crop, scale_crop
+from src.core.frame_score import PERCEPTUAL_HASHES, decimate_luma, hamming_distances, luma_histograms, \
+    perceptual_hashes, score_lumas, stack_lumas
+from src.core.job import JobCancelled
+from src.core.keyframe import KeyframeSeeker, get_keyframe_index, is_sampled_keyframe_index
+from src.core.media_info_cache import parse_media_info
+from src.core.rename import get_video_info
+from src.core.result_cache import get_result_cache, make_cache_key
+from src.core.tone_map import get_tone_mapper, hdr_transfer
+from src.core.tool import generate_image_filename, get_video_files
+
+# 亮度低于BLANK_DARK_LUMA（或高于BLANK_BRIGHT_LUMA）的像素占比超过BLANK_PIXEL_RATIO时视为黑场（白场）
+BLANK_DARK_LUMA = 24
+BLANK_BRIGHT_LUMA = 232
+BLANK_PIXEL_RATIO = 0.95
+# 候选帧与下一帧的亮度直方图距离（0-1）超过该值时视为处于切镜或叠化中
+TRANSITION_HISTOGRAM_DISTANCE = 0.3
+# 候选帧与下一帧的平均亮度差超过该值时视为处于淡入淡出中
+TRANSITION_MEAN_STEP = 4.0
+# 截图格式对应的扩展名和OpenCV编码参数，PNG使用压缩级别（0-9），JPEG/WebP使用质量（1-100）
+IMAGE_FORMATS = {
+    'png': ('png', cv2.IMWRITE_PNG_COMPRESSION),
+    'jpg': ('jpg', cv2.IMWRITE_JPEG_QUALITY),
+    'jpeg': ('jpg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('webp', cv2.IMWRITE_WEBP_QUALITY),
+}
+# 后台编码线程数，cv2.imencode执行时会释放GIL
+ENCODER_THREADS = min(4, os.cpu_count() or 1)
+# 取帧后端：opencv使用cv2.VideoCapture；ffmpeg调用ffmpeg子进程，在输入端用-ss跳转
+FRAME_SOURCE_BACKENDS = ('opencv', 'ffmpeg')
+# ffmpeg每次跳转输出的帧数，多出的帧留给紧随其后的读取（例如转场判断读取的下一帧），不必再启动一次进程
+FFMPEG_LOOKAHEAD_FRAMES = 2
+# 多进程截图时主进程检查任务是否被取消的间隔（秒）
+JOB_POLL_INTERVAL = 0.2
+# 一次ffmpeg调用（或逐帧读取时的每一帧）的最长等待时间（秒），损坏的文件上ffmpeg可能一直卡住，超时后结束子进程
+FFMPEG_TIMEOUT = 60
 
 
 # 参数：video_path：源视频路径；screenshot_path：输出图片路径；screenshot_number：截图的总数量；screenshot_start：截图的起始帧占比，避免截取黑帧；
 # screenshot_end：截图的结束帧占比，中间的范围不要太小，否则会导致截图数量不够；min_interval：最小帧间隔占比，避免连续截图；
-# screenshot_threshold：参数，用于判断关键帧的复杂程度，数字越大越复杂，不宜过大，否则可能会导致截图数量不够
+# screenshot_threshold：参数，用于判断关键帧的复杂程度，数字越大越复杂，不宜过大，否则可能会导致截图数量不够；
+# 比较的是frame_score中的综合复杂度（亮度标准差按直方图熵和边缘占比折算），与原先的标准差处于同一量级
+# accurate_seek：是否精确跳转到随机帧，默认会对齐到附近的关键帧以减少解码量
+# screenshot_workers：并行截图的进程数，1为单进程，0为按CPU核心数自动选择
+# screenshot_oversample：候选帧倍数，在范围内均匀抽取 倍数×截图数量 个候选帧，评分后择优
+# screenshot_seed：随机种子，相同的种子和参数会得到相同的截图，为None时每次随机
+# screenshot_format：输出格式，png、jpg或webp；screenshot_quality：jpg/webp的质量（1-100）；
+# screenshot_png_compression：png的压缩级别（0-9），越大文件越小但编码越慢
+# in_memory：只在内存中编码，不写入screenshot_path，返回[(文件名, bytes)]，用于直接上传图床
+# use_cache：使用结果缓存，同一文件以相同参数（包括种子）再次截图时直接返回缓存的截图；未指定种子时每次都应随机选帧，不使用缓存
+# tone_mapping：HDR视频（按MediaInfo的HDR格式判断）输出前转为SDR，避免画面发灰
+# screenshot_backend：取帧后端，opencv或ffmpeg，TS/M2TS等OpenCV跳转慢或帧数不准的文件可使用ffmpeg
+# session：VideoSession，同一任务的各步骤共用取帧后端、关键帧索引和MediaInfo，不在这里关闭
+# screenshot_dedup_distance：与已选帧的感知哈希汉明距离（0-64）不超过该值的候选帧视为重复，为0时不去重；
+# screenshot_hash：感知哈希算法，dhash或phash
+# screenshot_threshold_percentile：自适应阈值，大于0时以本视频候选帧复杂度的该百分位数（0-100）作为阈值，
+# 替代固定的screenshot_threshold，暗场动画和颗粒感重的电影都能得到合适的阈值
+# job：Job，报告已解码的帧数，被取消时停止解码并返回失败
+# auto_crop：检测上下（左右）的黑边并在输出前裁掉，传入session时与缩略图共用检测结果
+# output_specs：输出规格列表（见normalize_output_specs()），每帧只解码一次，各规格在后台线程中并行缩放和编码；
+# 传入时返回值为按规格分组的列表，[规格1的截图列表, 规格2的截图列表, ...]，截图格式等参数作为规格的缺省值
 def get_screenshot(video_path, screenshot_path, screenshot_number, screenshot_threshold, screenshot_start,
                    screenshot_end,
-                   screenshot_min_interval=0.01):
+                   screenshot_min_interval=0.01, accurate_seek=False, screenshot_workers=1, screenshot_oversample=3,
+                   screenshot_seed=None, screenshot_format='png', screenshot_quality=90, screenshot_png_compression=3,
+                   in_memory=False, use_cache=False, tone_mapping=False, screenshot_backend='opencv', session=None,
+                   screenshot_dedup_distance=0, screenshot_hash='dhash', screenshot_threshold_percentile=0, job=None,
+                   auto_crop=False, output_specs=None):
+    if screenshot_format.lower() not in IMAGE_FORMATS:
+        print(f'不支持的截图格式：{screenshot_format}')
+        return False, [f'不支持的截图格式：{screenshot_format}']
+    if screenshot_hash not in PERCEPTUAL_HASHES:
+        print(f'不支持的感知哈希：{screenshot_hash}')
+        return False, [f'不支持的感知哈希：{screenshot_hash}']
+    if screenshot_backend not in FRAME_SOURCE_BACKENDS:
+        print(f'不支持的取帧后端：{screenshot_backend}')
+        return False, [f'不支持的取帧后端：{screenshot_backend}']
+    try:
+        specs = normalize_output_specs(output_specs, screenshot_format, screenshot_quality, screenshot_png_compression)
+    except ValueError as e:
+        print(e)
+        return False, [str(e)]
+
     # 确保输出路径存在
     try:
-        if not os.path.exists(screenshot_path):
+        if not in_memory and not os.path.exists(screenshot_path):
             os.makedirs(screenshot_path)
             print('已创建输出路径')
     except PermissionError:
@@ -30,81 +107,807 @@ def get_screenshot(video_path, screenshot_path, screenshot_number, screenshot_th
         print(f'创建目录时出错：{e}')
         return False, [f'创建目录时出错：{e}']
 
+    runner = None
+    try:
+        # 命中结果缓存时直接复制缓存的截图，不再解码
+        result_cache, cache_key = None, None
+        if use_cache and screenshot_seed is not None:
+            result_cache = get_result_cache()
+            cache_key = make_cache_key('screenshot', video_path,
+                                       [screenshot_number, screenshot_threshold, screenshot_start, screenshot_end,
+                                        screenshot_min_interval, accurate_seek, screenshot_oversample,
+                                        screenshot_seed, screenshot_format.lower(), screenshot_quality,
+                                        screenshot_png_compression, tone_mapping, screenshot_backend,
+                                        screenshot_dedup_distance, screenshot_hash, screenshot_threshold_percentile,
+                                        auto_crop, specs if output_specs else None])
+            cached = result_cache.get(cache_key, None if in_memory else screenshot_path, with_info=True)
+            if cached is not None:
+                print('命中截图缓存')
+                cached_images, cached_info = cached
+                _reuse_cached_crop(session, auto_crop, cached_info)
+                if output_specs:
+                    # 缓存中按规格依次存放
+                    count = len(cached_images) // len(specs)
+                    return True, [cached_images[i * count:(i + 1) * count] for i in range(len(specs))]
+                return True, cached_images
+
+        # 加载视频，读取关键帧索引，同一文件重复截图时直接使用缓存
+        if session is not None:
+            keyframe_index = session.keyframe_index
+            source = session.frame_source(screenshot_backend)
+        else:
+            keyframe_index = get_keyframe_index(video_path)
+            source = open_frame_source(video_path, screenshot_backend, keyframe_index)
+        source.job = job
+        runner = _FrameRunner(video_path, screenshot_backend, source, keyframe_index, screenshot_workers,
+                              close_source=session is None, job=job)
+        total_frames = source.total_frames
+        fps = source.fps
+        duration = total_frames / fps
+        print(f'加载视频成功，取帧后端：{screenshot_backend}')
+
+        # 计算起止时间帧编号
+        start_frame = int(total_frames * screenshot_start)
+        end_frame = int(total_frames * screenshot_end)
+        screenshot_min_interval = duration * screenshot_min_interval
+        print(f'起止帧：{str(start_frame)} 终止帧：{str(end_frame)} 最小帧间隔：{str(screenshot_min_interval)}')
+
+        # 分层抽取候选帧：把范围等分为 倍数×数量 段，每段随机取一帧，保证候选帧覆盖整个范围
+        candidates = sample_candidate_frames(start_frame, end_frame,
+                                             screenshot_number * max(1, screenshot_oversample), screenshot_seed)
+        if not accurate_seek:
+            candidates = sorted(source.snap_all(candidates, start_frame, end_frame))
+        print(f'共{len(candidates)}个候选帧')
+
+        # 只保留缩小后的亮度平面用于评分，不在内存中堆积全尺寸帧
+        if job is not None:
+            job.begin('读取候选帧', len(candidates))
+        lumas = [item for item in runner.run(_read_lumas, candidates) if item[1] is not None]
+        candidates = [frame_number for frame_number, _, _ in lumas]
+        scores = score_lumas([luma for _, luma, _ in lumas])
+        # 在编码前剔除黑场、白场和转场中的帧
+        rejected, reasons = detect_rejected_frames([luma for _, luma, _ in lumas],
+                                                   [next_luma for _, _, next_luma in lumas])
+        # 用感知哈希找出画面几乎相同的候选帧（静止镜头），选帧时不与已选帧重复
+        hashes = perceptual_hashes([luma for _, luma, _ in lumas], screenshot_hash)
+        for i, frame_number in enumerate(candidates):
+            print(f'Frame ID: {frame_number}, Timestamp: {frame_number / fps}, '
+                  f'Complexity: {scores["complexity"][i]:.2f}, Std Dev: {scores["std"][i]:.2f}, '
+                  f'Edge Density: {scores["edge_density"][i]:.3f}, Entropy: {scores["entropy"][i]:.2f}, '
+                  f'Hash: {int(hashes[i]):016x}'
+                  f'{", Rejected: " + reasons[i] if rejected[i] else ""}')  # 调试信息
+
+        if screenshot_threshold_percentile > 0:
+            screenshot_threshold = adaptive_threshold(scores['complexity'], screenshot_threshold_percentile, rejected)
+            print(f'自适应阈值：{screenshot_threshold:.2f}（候选帧复杂度的第{screenshot_threshold_percentile}百分位）')
+
+        selected_frames = select_best_frames(candidates, scores['complexity'], screenshot_number,
+                                             screenshot_threshold, screenshot_min_interval * fps, rejected,
+                                             hamming_distances(hashes), screenshot_dedup_distance)
+        print(f'选中的帧：{selected_frames}')
+
+        # 重新读取选中的帧，在后台线程中裁剪黑边、色调映射、编码和保存
+        transfer = get_video_hdr_transfer(video_path, session) if tone_mapping else None
+        crop = None
+        if auto_crop:
+            crop = session.crop(screenshot_backend) if session is not None else detect_video_crop(source)
+        if job is not None:
+            job.begin('保存截图', len(selected_frames))
+        frame_variants = runner.run(_save_frames, selected_frames, None if in_memory else screenshot_path, specs,
+                                    transfer, crop)
+        # 每帧的结果是各规格的图片，转为按规格分组
+        variants = [[images[i] for images in frame_variants] for i in range(len(specs))]
+
+        for images in variants:
+            print([image if isinstance(image, str) else image[0] for image in images])
+        if result_cache is not None and len(frame_variants) == len(selected_frames):
+            result_cache.put(cache_key, [image for images in variants for image in images], {'crop': crop})
+        return True, variants if output_specs else variants[0]
+    except Exception as e:
+        print(f'截图出错：{e}')
+        return False, [f'截图出错：{e}']
+    finally:
+        if runner is not None:
+            runner.close()
+
+
+def distribute_screenshots(screenshot_number, episode_count):
+    """
+    把截图数量分配到各集：每集先分得相同的数量，余下的截图均匀分给分布在整季中的几集，
+    截图数量少于集数时也不会都集中在前几集。
+
+    返回:
+    list[int]: 每集的截图数量，总和为screenshot_number
+    """
+    if episode_count <= 0:
+        return []
+    counts = [screenshot_number // episode_count] * episode_count
+    remainder = screenshot_number % episode_count
+    for i in range(remainder):
+        counts[int((i + 0.5) * episode_count / remainder)] += 1
+    return counts
+
+
+# 参数：folder_path：剧集（短剧）所在的文件夹，按get_video_files()的顺序视为各集；
+# screenshot_number：整季的截图总数，由distribute_screenshots()分配到各集，每集在各自的起止占比范围内选帧；
+# season_workers：同时截图的集数（进程数），1为逐集截图，0为按CPU核心数自动选择；多进程时每集的截图在单进程中进行
+# screenshot_seed：指定时第i集使用screenshot_seed + i，结果可复现
+# job：Job，以集为单位报告进度，被取消时不再开始新的一集并返回失败
+# 其余参数原样传给get_screenshot()
+# 返回：与get_screenshot()相同，截图按集的顺序排列，同一集内按时间排列；某一集失败时跳过该集
+def get_season_screenshot(folder_path, screenshot_path, screenshot_number, screenshot_threshold, screenshot_start,
+                          screenshot_end, screenshot_min_interval=0.01, season_workers=0, screenshot_seed=None,
+                          job=None, **screenshot_options):
+    get_video_files_success, episodes = get_video_files(folder_path)
+    if not get_video_files_success:
+        print(f'获取剧集列表失败：{episodes[0]}')
+        return False, episodes
+    if not episodes:
+        print('文件夹中没有视频文件')
+        return False, ['文件夹中没有视频文件']
+
+    counts = distribute_screenshots(screenshot_number, len(episodes))
+    tasks = [(i, episode, count) for i, (episode, count) in enumerate(zip(episodes, counts)) if count > 0]
+    print(f'共{len(episodes)}集，截图分配：{counts}')
+    if season_workers <= 0:
+        season_workers = os.cpu_count() or 1
+    season_workers = min(season_workers, len(tasks))
+
+    def episode_arguments(index, episode, count):
+        options = dict(screenshot_options)
+        if season_workers > 1:
+            options['screenshot_workers'] = 1
+        return ((episode, screenshot_path, count, screenshot_threshold, screenshot_start, screenshot_end,
+                 screenshot_min_interval),
+                dict(options, screenshot_seed=None if screenshot_seed is None else screenshot_seed + index))
+
+    executor = None
     try:
-        # 加载视频
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            print('无法加载视频')
-            return False, ['无法加载视频']
+        if job is not None:
+            job.begin('截取各集', len(tasks), '集')
+        results = {}
+        if season_workers <= 1:
+            for index, episode, count in tasks:
+                args, kwargs = episode_arguments(index, episode, count)
+                results[index] = get_screenshot(*args, **kwargs)
+                if job is not None:
+                    job.advance()
         else:
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            duration = total_frames / fps
-            print('加载视频成功')
-
-            # 计算起止时间帧编号
-            start_frame = int(total_frames * screenshot_start)
-            end_frame = int(total_frames * screenshot_end)
-            screenshot_min_interval = duration * screenshot_min_interval
-            print(f'起止帧：{str(start_frame)} 终止帧：{str(end_frame)} 最小帧间隔：{str(screenshot_min_interval)}')
-
-            # 初始化变量
-            extracted_images = []
-            last_keyframe_time = -screenshot_min_interval
-
-            # 生成随机时间戳
-            timestamps = sorted(random.sample(range(start_frame, end_frame), screenshot_number))
-
-            for timestamp in timestamps:
-                # 跳转到特定帧
-                cap.set(cv2.CAP_PROP_POS_FRAMES, timestamp)
-                ret, frame = cap.read()
-                if not ret:
-                    continue
-
-                current_time = timestamp / fps
-                if current_time >= last_keyframe_time + screenshot_min_interval:
-                    std_dev = np.std(frame)
-                    print(f'Frame ID: {timestamp}, Timestamp: {current_time}, Std Dev: {std_dev}')  # 调试信息
-
-                    if std_dev > screenshot_threshold:
-                        frame_path = generate_image_filename(screenshot_path)
-                        im_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                        im_pil.save(Path(frame_path))
-                        extracted_images.append(frame_path)
-                        last_keyframe_time = current_time
+            executor = ProcessPoolExecutor(max_workers=season_workers)
+            futures = {}
+            for index, episode, count in tasks:
+                args, kwargs = episode_arguments(index, episode, count)
+                futures[executor.submit(get_screenshot, *args, **kwargs)] = index
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=JOB_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+                if job is not None:
+                    if done:
+                        job.advance(len(done))
                     else:
-                        print('当前帧不满足复杂度要求，获取随机帧代替')  # 调试信息
-                        timestamp = random.sample(range(start_frame, end_frame), 1)[0]
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, timestamp)
-                        ret, frame = cap.read()
-                        frame_path = generate_image_filename(screenshot_path)
-                        im_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                        im_pil.save(Path(frame_path))
-                        extracted_images.append(frame_path)
-                else:
-                    print('当前帧不满足时间间隔要求，获取随机帧代替')  # 调试信息
-                    timestamp = random.sample(range(start_frame, end_frame), 1)[0]
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, timestamp)
-                    ret, frame = cap.read()
-                    frame_path = generate_image_filename(screenshot_path)
-                    im_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    im_pil.save(Path(frame_path))
-                    extracted_images.append(frame_path)
-
-            cap.release()
-
-            print(extracted_images)
-            return True, extracted_images
+                        job.check()
+
+        # 按集的顺序拼接，传入output_specs时每集的结果按规格分组，逐个规格拼接
+        merged, errors = None, []
+        for index, episode, _ in tasks:
+            success, response = results[index]
+            if not success:
+                print(f'{os.path.basename(episode)}截图失败，跳过：{response[0]}')
+                errors.append(response[0])
+                continue
+            groups = response if screenshot_options.get('output_specs') else [response]
+            merged = groups if merged is None else [images + group for images, group in zip(merged, groups)]
+        if merged is None:
+            return False, [errors[0] if errors else '没有可用的截图']
+        return True, merged if screenshot_options.get('output_specs') else merged[0]
     except Exception as e:
         print(f'截图出错：{e}')
         return False, [f'截图出错：{e}']
+    finally:
+        if executor is not None:
+            # 任务被取消时不等待正在截图的集
+            executor.shutdown(wait=job is None or not job.cancelled, cancel_futures=True)
+
+
+def sample_candidate_frames(start_frame, end_frame, count, seed=None):
+    """在[start_frame, end_frame)内分层随机抽取count个不重复的帧号，返回升序列表"""
+    if count <= 0 or end_frame <= start_frame:
+        return []
+    rng = random.Random(seed)
+    count = min(count, end_frame - start_frame)
+    boundaries = np.linspace(start_frame, end_frame, count + 1).astype(int)
+    return [rng.randrange(low, max(low + 1, high)) for low, high in zip(boundaries[:-1], boundaries[1:])]
+
+
+def adaptive_threshold(complexity, percentile, rejected=None):
+    """
+    以候选帧复杂度分布的百分位数作为本视频的阈值。候选帧在整个范围内分层抽取，已经是复杂度分布的样本，
+    不需要额外读取；黑场、白场和转场帧不参与统计，全部被剔除时使用所有候选帧。
+
+    返回:
+    float: 阈值，没有候选帧时为0
+    """
+    complexity = np.asarray(complexity, dtype=np.float64)
+    if rejected is not None and not np.all(rejected):
+        complexity = complexity[~np.asarray(rejected, dtype=bool)]
+    if len(complexity) == 0:
+        return 0.0
+    return float(np.percentile(complexity, percentile))
+
 
+def select_best_frames(frame_numbers, complexity, count, threshold, min_interval_frames, rejected=None,
+                       hash_distances=None, dedup_distance=0):
+    """
+    按复杂度从高到低挑选帧，优先选择超过阈值且与已选帧间隔足够的帧；
+    数量不足时依次放宽为：不要求阈值、不要求间隔、使用被rejected标记的帧，最后才使用与已选帧重复的帧。
 
+    参数:
+    hash_distances (ndarray|None): 候选帧之间感知哈希的汉明距离矩阵，hamming_distances()的结果
+    dedup_distance (int): 与已选帧的距离不超过该值时视为重复，为0时不去重
+
+    返回:
+    list[int]: 升序的帧号
+    """
+    order = np.argsort(-np.asarray(complexity, dtype=np.float64), kind='stable')
+    if rejected is None:
+        rejected = np.zeros(len(frame_numbers), dtype=bool)
+    selected = []
+    selected_indices = []
+
+    def far_enough(frame_number):
+        return all(abs(frame_number - chosen) >= min_interval_frames for chosen in selected)
+
+    def duplicated(i):
+        if hash_distances is None or dedup_distance <= 0 or not selected_indices:
+            return False
+        return bool((hash_distances[i, selected_indices] <= dedup_distance).any())
+
+    for require_threshold, require_interval, allow_rejected, allow_duplicated in (
+            (True, True, False, False), (False, True, False, False), (False, False, False, False),
+            (False, False, True, False), (False, False, True, True)):
+        for i in order:
+            if len(selected) >= count:
+                return sorted(selected)
+            frame_number = frame_numbers[i]
+            if frame_number in selected:
+                continue
+            if rejected[i] and not allow_rejected:
+                continue
+            if require_threshold and complexity[i] <= threshold:
+                continue
+            if require_interval and not far_enough(frame_number):
+                continue
+            if not allow_duplicated and duplicated(i):
+                continue
+            selected.append(frame_number)
+            selected_indices.append(i)
+    return sorted(selected)
+
+
+def detect_rejected_frames(lumas, next_lumas):
+    """
+    用亮度直方图批量判断候选帧是否不适合作为截图：
+    黑场/白场：绝大部分像素接近纯黑或纯白（片头片尾、字幕卡）；
+    转场：与下一帧的直方图距离或平均亮度差过大（切镜、叠化、淡入淡出）。
+
+    参数:
+    lumas (list[ndarray]): 候选帧的亮度平面
+    next_lumas (list[ndarray|None]): 各候选帧下一帧的亮度平面，为None时不做转场判断
+
+    返回:
+    tuple: (rejected, reasons)，rejected为布尔数组，reasons为对应的原因，未剔除的为空字符串
+    """
+    count = len(lumas)
+    if count == 0:
+        return np.zeros(0, dtype=bool), []
+    next_lumas = [luma if next_luma is None else next_luma for luma, next_luma in zip(lumas, next_lumas)]
+    stack = stack_lumas(list(lumas) + next_lumas)
+    current, following = stack[:count], stack[count:]
+
+    pixels = current.shape[1] * current.shape[2]
+    dark = (current < BLANK_DARK_LUMA).sum(axis=(1, 2)) / pixels > BLANK_PIXEL_RATIO
+    bright = (current > BLANK_BRIGHT_LUMA).sum(axis=(1, 2)) / pixels > BLANK_PIXEL_RATIO
+
+    histograms = luma_histograms(stack)
+    distance = np.abs(histograms[:count] - histograms[count:]).sum(axis=1) / 2
+    mean_step = np.abs(current.mean(axis=(1, 2)) - following.mean(axis=(1, 2)))
+    transition = (distance > TRANSITION_HISTOGRAM_DISTANCE) | (mean_step > TRANSITION_MEAN_STEP)
+
+    reasons = ['黑场' if dark[i] else '白场' if bright[i] else '转场' if transition[i] else '' for i in range(count)]
+    return dark | bright | transition, reasons
+
+
+def _read_lumas(source, frame_numbers, job=None):
+    # 顺带读取紧随其后的一帧用于转场判断，只需多解码一帧
+    lumas = []
+    for frame_number in frame_numbers:
+        if job is not None:
+            job.advance()
+        ret, frame = source.read(frame_number)
+        if not ret:
+            lumas.append((frame_number, None, None))
+            continue
+        next_ret, next_frame = source.read(frame_number + 1)
+        lumas.append((frame_number, decimate_luma(frame), decimate_luma(next_frame) if next_ret else None))
+    return lumas
+
+
+def normalize_output_specs(output_specs, image_format='png', quality=90, png_compression=3):
+    """
+    整理输出规格。每个规格是一个字典：width、height为输出的最大宽高（0或缺省表示不限制，只缩小不放大，保持宽高比），
+    format、quality、png_compression缺省时使用截图的设置。output_specs为空时只输出一个原尺寸的规格。
+
+    返回:
+    list[dict]: 含width、height、image_format、quality、png_compression的规格列表
+    """
+    specs = []
+    for spec in output_specs or [{}]:
+        spec = {'width': int(spec.get('width') or 0), 'height': int(spec.get('height') or 0),
+                'image_format': str(spec.get('format') or image_format).lower(),
+                'quality': int(spec.get('quality') or quality),
+                'png_compression': int(spec.get('png_compression', png_compression))}
+        if spec['image_format'] not in IMAGE_FORMATS:
+            raise ValueError(f'不支持的截图格式：{spec["image_format"]}')
+        specs.append(spec)
+    return specs
+
+
+def parse_output_specs(text):
+    """
+    解析文本形式的输出规格，多个规格以逗号分隔，每个规格为 宽x高[:格式[:质量]]，宽或高为0表示不限制，
+    例如'0x0:png,640x0:jpg:80'输出原尺寸PNG和宽640的JPEG。text为空时返回None。
+    """
+    if not text or not text.strip():
+        return None
+    specs = []
+    for item in text.split(','):
+        parts = item.strip().split(':')
+        width, _, height = parts[0].lower().partition('x')
+        spec = {'width': int(width or 0), 'height': int(height or 0)}
+        if len(parts) > 1 and parts[1]:
+            spec['format'] = parts[1]
+        if len(parts) > 2 and parts[2]:
+            spec['quality'] = int(parts[2])
+        specs.append(spec)
+    return specs
+
+
+def resize_to_spec(image, spec):
+    """按规格的最大宽高等比缩小，已经不超过时原样返回"""
+    height, width = image.shape[:2]
+    scale = 1.0
+    if spec['width'] > 0:
+        scale = min(scale, spec['width'] / width)
+    if spec['height'] > 0:
+        scale = min(scale, spec['height'] / height)
+    if scale >= 1.0:
+        return image
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_image(image, image_format='png', quality=90, png_compression=3):
+    """
+    直接从BGR数组编码图片，不经过RGB转换和PIL。
+
+    返回:
+    tuple: (扩展名, 编码后的bytes)
+    """
+    extension, flag = IMAGE_FORMATS[image_format.lower()]
+    value = png_compression if extension == 'png' else quality
+    ret, buffer = cv2.imencode('.' + extension, image, [flag, int(value)])
+    if not ret:
+        raise RuntimeError(f'图片编码失败：{extension}')
+    return extension, buffer.tobytes()
+
+
+def encode_named_image(image, image_format='png', quality=90, png_compression=3):
+    """编码图片并生成随机文件名，不写入磁盘，返回(文件名, bytes)"""
+    extension, data = encode_image(image, image_format, quality, png_compression)
+    return os.path.basename(generate_image_filename('', extension)), data
+
+
+def write_image(image, output_path, image_format='png', quality=90, png_compression=3):
+    """编码图片并以随机文件名写入output_path，返回文件路径；output_path为None时等同于encode_named_image"""
+    if output_path is None:
+        return encode_named_image(image, image_format, quality, png_compression)
+    extension, data = encode_image(image, image_format, quality, png_compression)
+    image_path = generate_image_filename(output_path, extension)
+    # 不使用cv2.imwrite，它在Windows下无法写入含中文的路径
+    with open(image_path, 'wb') as file:
+        file.write(data)
+    return image_path
+
+
+def get_video_hdr_transfer(video_path, session=None):
+    """从get_video_info()的HDR格式得到传输特性，SDR或无法解析时返回None；传入session时使用其已解析的MediaInfo"""
+    get_video_info_success, response = get_video_info(video_path, session.media_info if session is not None else None)
+    if not get_video_info_success:
+        print(f'无法获取HDR信息，不做色调映射：{response[0]}')
+        return None
+    transfer = hdr_transfer(response[3])
+    if transfer is not None:
+        print(f'HDR格式：{response[3]}，按{transfer.upper()}做色调映射')
+    return transfer
+
+
+def _reuse_cached_crop(session, auto_crop, cached_info):
+    # 命中结果缓存时把随图片保存的黑边裁剪区域交给session，调用方读取session.crop()时不再解码检测
+    if auto_crop and session is not None and 'crop' in cached_info:
+        session.set_crop(cached_info['crop'])
+
+
+def _save_frames(source, frame_numbers, screenshot_path, specs, transfer=None, crop=None, job=None):
+    # 解码在当前线程顺序进行，缩放、色调映射和编码交给后台线程，解码下一帧的同时处理上一帧；
+    # 每帧的每个输出规格是一个独立的任务，同一帧的多个规格也并行编码
+    tone_mapper = get_tone_mapper(transfer)
+    futures = []
+    with ThreadPoolExecutor(max_workers=ENCODER_THREADS) as encoder:
+        for frame_number in frame_numbers:
+            if job is not None:
+                job.advance()
+            ret, frame = source.read(frame_number)
+            if not ret:
+                print(f'无法读取第{frame_number}帧')
+                continue
+            # 先裁剪再色调映射，黑边的像素不参与计算
+            frame = apply_crop(frame, crop)
+            futures.append([encoder.submit(_write_frame, frame, screenshot_path, tone_mapper, spec)
+                            for spec in specs])
+    return [[future.result() for future in frame_futures] for frame_futures in futures]
+
+
+def _write_frame(frame, screenshot_path, tone_mapper, spec):
+    # 先缩小再色调映射，小尺寸的规格只需处理缩小后的像素
+    frame = resize_to_spec(frame, spec)
+    if tone_mapper is not None:
+        frame = tone_mapper(frame)
+    return write_image(frame, screenshot_path, spec['image_format'], spec['quality'], spec['png_compression'])
+
+
+def open_frame_source(video_path, backend='opencv', keyframe_index=None, fps=None, total_frames=None,
+                      media_info=None):
+    """
+    打开取帧后端。所有后端提供相同的接口：
+    total_frames、fps、frame_size：帧数、帧率和画面尺寸(宽, 高)；snap_all()：把帧号对齐到关键帧附近；
+    read(帧号)：返回(是否成功, BGR帧)；read_keyframe(帧号, (宽, 高))：只解码附近的关键帧并缩小，返回(是否成功, BGR帧)；
+    read_segment(帧号, 数量)：从该帧起顺序解码一段，逐帧生成(帧号, BGR帧)；
+    seek_count、grab_count：跳转次数和顺序读取的帧数；close()：释放资源；
+    job：由调用方设置的Job，ffmpeg后端等待子进程时检查是否被取消，被取消时结束子进程。
+
+    参数:
+    fps、total_frames：已知的帧率和帧数，子进程重新打开时传入，省去再次探测
+    media_info：已解析的MediaInfo对象，ffmpeg后端需要探测时直接使用
+    """
+    if backend == 'opencv':
+        return OpenCVFrameSource(video_path, keyframe_index)
+    if backend == 'ffmpeg':
+        return FFmpegFrameSource(video_path, keyframe_index, fps, total_frames, media_info)
+    raise ValueError(f'不支持的取帧后端：{backend}')
+
+
+class OpenCVFrameSource:
+    """基于cv2.VideoCapture的取帧后端，跳转和顺序读取由KeyframeSeeker决定"""
+
+    def __init__(self, video_path, keyframe_index=None):
+        self.capture = cv2.VideoCapture(video_path)
+        if not self.capture.isOpened():
+            self.capture.release()
+            raise RuntimeError('无法加载视频')
+        self.total_frames = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.frame_size = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.seeker = KeyframeSeeker(self.capture, keyframe_index, self.fps,
+                                     sampled=is_sampled_keyframe_index(video_path))
+        # VideoCapture的读取无法中断，只在帧与帧之间检查取消
+        self.job = None
+
+    @property
+    def seek_count(self):
+        return self.seeker.seek_count
+
+    @property
+    def grab_count(self):
+        return self.seeker.grab_count
+
+    def snap_all(self, frame_numbers, lower=0, upper=None):
+        return self.seeker.snap_all(frame_numbers, lower, upper)
+
+    def read(self, frame_number):
+        return self.seeker.read(frame_number)
+
+    def read_segment(self, frame_number, count):
+        # 第一帧跳转，之后的帧由KeyframeSeeker顺序读取
+        for offset in range(count):
+            ret, frame = self.seeker.read(frame_number + offset)
+            if not ret:
+                return
+            yield frame_number + offset, frame
+
+    def read_keyframe(self, frame_number, size=None):
+        """
+        OpenCV无法设置解码器只解码关键帧，也不能在解码时缩小，只能依靠关键帧索引：
+        frame_number应先经snap_all()对齐到关键帧之后，这样只需从该关键帧解码少量帧，解码后立即缩小，不保留原尺寸帧
+        """
+        ret, frame = self.seeker.read(frame_number)
+        if not ret or size is None:
+            return ret, frame
+        return True, cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def close(self):
+        self.capture.release()
+
+
+def run_ffmpeg(command, job=None, timeout=FFMPEG_TIMEOUT):
+    """
+    运行ffmpeg，等待结束并返回(stdout, stderr)的bytes。超过timeout秒仍未结束时结束子进程，返回已输出的部分；
+    job被取消时结束子进程并抛出JobCancelled
+    """
+    # 打包后的GUI程序在Windows下调用子进程时不弹出控制台窗口
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                # 超时后重新调用communicate()不会丢失已读取的输出
+                return process.communicate(timeout=JOB_POLL_INTERVAL)
+            except subprocess.TimeoutExpired:
+                if job is not None and job.cancelled:
+                    raise JobCancelled()
+                if time.monotonic() > deadline:
+                    print(f'ffmpeg超过{timeout}秒没有结束，已结束进程')
+                    process.kill()
+                    return process.communicate()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+
+
+class _ProcessWatchdog:
+    """在后台线程中监视子进程，超过timeout秒没有调用feed()或job被取消时结束子进程，reason记录原因"""
+
+    def __init__(self, process, job=None, timeout=FFMPEG_TIMEOUT):
+        self.process = process
+        self.job = job
+        self.timeout = timeout
+        self.reason = None
+        self._deadline = time.monotonic() + timeout
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self):
+        self._deadline = time.monotonic() + self.timeout
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(JOB_POLL_INTERVAL):
+            if self.job is not None and self.job.cancelled:
+                self.reason = 'cancelled'
+            elif time.monotonic() > self._deadline:
+                self.reason = 'timeout'
+            else:
+                continue
+            self.process.kill()
+            return
+
+
+class FFmpegFrameSource:
+    """
+    基于ffmpeg子进程的取帧后端。帧号按帧率换算为时间，在输入端用-ss跳转，ffmpeg直接定位到之前的关键帧再解码到目标，
+    解码结果以BMP经stdout传回。帧率和帧数取自MediaInfo，TS/M2TS和VFR的MKV比OpenCV的估计准确。
+    """
+
+    def __init__(self, video_path, keyframe_index=None, fps=None, total_frames=None, media_info=None):
+        self.executable = shutil.which('ffmpeg')
+        if self.executable is None:
+            raise RuntimeError('找不到ffmpeg，请安装ffmpeg并加入PATH')
+        self.video_path = video_path
+        self.media_info = media_info
+        if fps is None or total_frames is None:
+            fps, total_frames = probe_frame_rate_and_count(video_path, media_info)
+        self.fps = fps
+        self.total_frames = total_frames
+        # ffmpeg从目标之前的关键帧开始解码，对齐时直接落在关键帧上
+        self.seeker = KeyframeSeeker(None, keyframe_index, fps, preroll=0)
+        self.seek_count = 0
+        self.grab_count = 0
+        self.job = None
+        self._buffered = {}
+        self._frame_size = None
+
+    @property
+    def frame_size(self):
+        # 只有缩略图需要画面尺寸，用到时才读取MediaInfo
+        if self._frame_size is None:
+            if self.media_info is None:
+                self.media_info = parse_media_info(self.video_path)
+            track = self.media_info.video_tracks[0]
+            self._frame_size = (int(track.width), int(track.height))
+        return self._frame_size
+
+    def snap_all(self, frame_numbers, lower=0, upper=None):
+        return self.seeker.snap_all(frame_numbers, lower, upper)
+
+    def read(self, frame_number):
+        if frame_number in self._buffered:
+            self.grab_count += 1
+            return True, self._buffered.pop(frame_number)
+
+        command = [self.executable, '-v', 'error', '-ss', f'{frame_number / self.fps:.6f}', '-i', self.video_path,
+                   '-frames:v', str(FFMPEG_LOOKAHEAD_FRAMES), '-f', 'image2pipe', '-c:v', 'bmp', '-pix_fmt', 'bgr24',
+                   'pipe:1']
+        stdout, stderr = run_ffmpeg(command, self.job)
+        self.seek_count += 1
+        frames = split_bmp_stream(stdout)
+        if not frames:
+            print(f'ffmpeg无法读取第{frame_number}帧：{stderr.decode("utf-8", "replace").strip()}')
+            return False, None
+        self._buffered = {frame_number + i: frame for i, frame in enumerate(frames[1:], 1)}
+        return True, frames[0]
+
+    def read_segment(self, frame_number, count):
+        # 整段只启动一次ffmpeg，BMP从管道中逐帧读出，不在内存中堆积整段的输出
+        command = [self.executable, '-v', 'error', '-ss', f'{frame_number / self.fps:.6f}', '-i', self.video_path,
+                   '-frames:v', str(count), '-f', 'image2pipe', '-c:v', 'bmp', '-pix_fmt', 'bgr24', 'pipe:1']
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                   creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        # 管道读取会一直阻塞，由看门狗在超时或取消时结束子进程，读取随即返回
+        watchdog = _ProcessWatchdog(process, self.job)
+        self.seek_count += 1
+        try:
+            for offset in range(count):
+                header = process.stdout.read(6)
+                if len(header) < 6 or header[:2] != b'BM':
+                    break
+                data = header + process.stdout.read(int.from_bytes(header[2:6], 'little') - 6)
+                frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    break
+                watchdog.feed()
+                self.grab_count += 1
+                yield frame_number + offset, frame
+        finally:
+            watchdog.stop()
+            process.kill()
+            process.stdout.close()
+            process.wait()
+        if watchdog.reason == 'cancelled':
+            raise JobCancelled()
+        if watchdog.reason == 'timeout':
+            print(f'ffmpeg超过{FFMPEG_TIMEOUT}秒没有输出新的帧，已结束进程')
+
+    def read_keyframe(self, frame_number, size=None):
+        """
+        只解码frame_number处或之前最近的关键帧：-skip_frame nokey让解码器丢弃非关键帧，-noaccurate_seek直接输出跳转到的关键帧；
+        缩小由ffmpeg的scale滤镜在解码后立即完成，原尺寸帧不经过管道。frame_number已对齐到关键帧时向后偏移半帧，避免时间取整落到上一个关键帧
+        """
+        command = [self.executable, '-v', 'error', '-skip_frame', 'nokey', '-ss',
+                   f'{(frame_number + 0.5) / self.fps:.6f}', '-noaccurate_seek', '-i', self.video_path,
+                   '-frames:v', '1']
+        if size is not None:
+            command += ['-vf', f'scale={size[0]}:{size[1]}:flags=area']
+        command += ['-f', 'image2pipe', '-c:v', 'bmp', '-pix_fmt', 'bgr24', 'pipe:1']
+        stdout, stderr = run_ffmpeg(command, self.job)
+        self.seek_count += 1
+        frames = split_bmp_stream(stdout)
+        if not frames:
+            print(f'ffmpeg无法读取第{frame_number}帧附近的关键帧：{stderr.decode("utf-8", "replace").strip()}')
+            return False, None
+        return True, frames[0]
+
+    def close(self):
+        self._buffered = {}
+
+
+def probe_frame_rate_and_count(video_path, media_info=None):
+    """用MediaInfo读取第一条视频轨的帧率和帧数，返回(fps, total_frames)；media_info为已解析的结果时不再解析"""
+    if media_info is None:
+        media_info = parse_media_info(video_path)
+    for track in media_info.video_tracks:
+        fps = float(track.frame_rate or 0)
+        total_frames = int(track.frame_count or 0) or int(float(track.duration or 0) / 1000 * fps)
+        if fps > 0 and total_frames > 0:
+            return fps, total_frames
+    raise RuntimeError('MediaInfo无法获取帧率或帧数')
+
+
+def split_bmp_stream(data):
+    """把image2pipe输出的连续BMP数据拆分并解码为BGR帧列表，BMP文件头的第2-5字节为文件大小"""
+    frames = []
+    position = 0
+    while position + 6 <= len(data) and data[position:position + 2] == b'BM':
+        size = int.from_bytes(data[position + 2:position + 6], 'little')
+        frame = cv2.imdecode(np.frombuffer(data[position:position + size], dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            break
+        frames.append(frame)
+        position += size
+    return frames
+
+
+# 子进程入口，每个进程打开自己的取帧后端，关键帧索引和帧率由主进程传入，避免重复扫描
+def _run_with_source(video_path, backend, keyframe_index, fps, total_frames, function, frame_numbers, *args):
+    source = open_frame_source(video_path, backend, keyframe_index, fps, total_frames)
+    try:
+        return function(source, frame_numbers, *args)
+    finally:
+        source.close()
+
+
+class _FrameRunner:
+    """
+    按帧号执行读取任务。单进程时直接使用当前的取帧后端；
+    多进程时把升序帧号切成连续的若干段交给进程池，结果按段顺序拼接，保持时间顺序。
+    close_source为False时取帧后端属于调用方（如VideoSession），close()不关闭它。
+    job不能传给子进程，多进程时由主进程按段汇报进度，并在等待期间检查是否被取消。
+    """
+
+    def __init__(self, video_path, backend, source, keyframe_index, workers, close_source=True, job=None):
+        self.video_path = video_path
+        self.backend = backend
+        self.source = source
+        self.close_source = close_source
+        self.job = job
+        self.keyframe_index = keyframe_index
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor = None
+        if workers > 1:
+            # 生成图片文件名用到了random，子进程需要重新播种，避免fork后文件名重复
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=random.seed)
+            print(f'使用{workers}个进程并行截图')
+
+    def run(self, function, frame_numbers, *args):
+        if self.executor is None or len(frame_numbers) <= 1:
+            return function(self.source, frame_numbers, *args, job=self.job)
+        chunks = [chunk.tolist() for chunk in np.array_split(frame_numbers, min(self.workers, len(frame_numbers)))]
+        futures = [self.executor.submit(_run_with_source, self.video_path, self.backend, self.keyframe_index,
+                                        self.source.fps, self.source.total_frames, function, chunk, *args)
+                   for chunk in chunks]
+        if self.job is not None:
+            chunk_sizes = {future: len(chunk) for future, chunk in zip(futures, chunks)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=JOB_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if done:
+                    self.job.advance(sum(chunk_sizes[future] for future in done))
+                else:
+                    self.job.check()
+        return [result for future in futures for result in future.result()]
+
+    def close(self):
+        if self.executor is not None:
+            # 任务被取消时不等待正在运行的子进程，尚未开始的段直接丢弃
+            self.executor.shutdown(wait=self.job is None or not self.job.cancelled, cancel_futures=True)
+        if self.close_source:
+            self.source.close()
+
+
+# in_memory：只在内存中编码，不写入screenshot_storage_path，返回(文件名, bytes)
+# use_cache：使用结果缓存，同一文件以相同参数再次获取缩略图时直接返回缓存的图片
+# tone_mapping：HDR视频的每个格子转为SDR
+# screenshot_backend：取帧后端，opencv或ffmpeg
+# keyframe_only：快速模式，每个格子只解码位置附近的关键帧，并在解码时缩小到格子尺寸，优先于accurate_seek
+# session：VideoSession，与同一任务的截图共用取帧后端，不在这里关闭
+# job：Job，报告已完成的格子数，被取消时停止解码并返回失败
+# auto_crop：检测黑边并裁掉每个格子的黑边，格子尺寸按裁剪后的画面计算
+# output_specs：输出规格列表，拼接好的缩略图按各规格并行缩放和编码，传入时返回各规格的图片列表
 def get_thumbnail(video_path, screenshot_storage_path, thumbnail_rows, thumbnail_cols, screenshot_start_percentage,
-                  screenshot_end_percentage):
+                  screenshot_end_percentage, accurate_seek=False, in_memory=False, use_cache=False,
+                  tone_mapping=False, screenshot_backend='opencv', keyframe_only=False, session=None, job=None,
+                  auto_crop=False, output_specs=None):
     try:
-        if not os.path.exists(screenshot_storage_path):  # 输出路径不存在
+        if not in_memory and not os.path.exists(screenshot_storage_path):  # 输出路径不存在
             os.makedirs(screenshot_storage_path)
             print('已创建输出路径。')
     except PermissionError:
@@ -116,14 +919,32 @@ def get_thumbnail(video_path, screenshot_storage_path, thumbnail_rows, thumbnail
     except Exception as e:
         print(f'创建目录时出错：{e}')
         return False, [f'创建目录时出错：{e}']
-    video_capture = None
+    source = None
     try:
-        video_capture = cv2.VideoCapture(video_path)
-
-        if not video_capture.isOpened():  # 打不开文件
-            raise Exception('Error: 无法打开视频文件')
+        specs = normalize_output_specs(output_specs)
+        result_cache, cache_key = None, None
+        if use_cache:
+            result_cache = get_result_cache()
+            cache_key = make_cache_key('thumbnail', video_path,
+                                       [thumbnail_rows, thumbnail_cols, screenshot_start_percentage,
+                                        screenshot_end_percentage, accurate_seek, tone_mapping,
+                                        screenshot_backend, keyframe_only, auto_crop,
+                                        specs if output_specs else None])
+            cached = result_cache.get(cache_key, None if in_memory else screenshot_storage_path, with_info=True)
+            if cached is not None:
+                print('命中缩略图缓存')
+                cached_images, cached_info = cached
+                _reuse_cached_crop(session, auto_crop, cached_info)
+                return True, cached_images if output_specs else cached_images[0]
 
-        total_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if session is not None:
+            source = session.frame_source(screenshot_backend)
+        else:
+            source = open_frame_source(video_path, screenshot_backend, get_keyframe_index(video_path))
+        source.job = job
+        # 共用的取帧后端已有截图阶段的计数，这里只统计缩略图的部分
+        seek_count, grab_count = source.seek_count, source.grab_count
+        total_frames = source.total_frames
 
         # 计算开始和结束帧
         start_frame = int(total_frames * screenshot_start_percentage)
@@ -132,51 +953,98 @@ def get_thumbnail(video_path, screenshot_storage_path, thumbnail_rows, thumbnail
         # 计算每张截取图像的时间间隔
         interval = (end_frame - start_frame) // (thumbnail_cols * thumbnail_rows)
 
-        images = []
+        frame_numbers = [start_frame + i * interval for i in range(thumbnail_cols * thumbnail_rows)]
+        frame_numbers = [frame_number for frame_number in frame_numbers if frame_number < end_frame]
+
+        # 缩略图只需要代表性画面，默认对齐到关键帧附近
+        if keyframe_only or not accurate_seek:
+            frame_numbers = sorted(source.snap_all(frame_numbers, start_frame, end_frame))
 
-        for i in range((thumbnail_cols * thumbnail_rows)):
-            frame_number = start_frame + i * interval
-            if frame_number >= end_frame:
-                break
+        # 缩小后再做色调映射，每个格子只需处理缩小后的像素
+        tone_mapper = get_tone_mapper(get_video_hdr_transfer(video_path, session) if tone_mapping else None)
+        crop = None
+        if auto_crop:
+            crop = session.crop(screenshot_backend) if session is not None else detect_video_crop(source)
+
+        # 边解码边拼接：按第一帧确定格子尺寸并一次性分配画布，之后每帧缩小后立即写入画布，
+        # 内存中最多只有一帧原尺寸画面，与网格大小无关
+        border_size = 5
+        concatenated_image = None
+        tile_width, tile_height = 0, 0
+        tile_crop = None
+        if job is not None:
+            job.begin('生成缩略图', len(frame_numbers))
 
-            video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = video_capture.read()
+        # 快速模式下按视频尺寸预先确定格子尺寸，取帧时直接缩小到该尺寸
+        if keyframe_only:
+            frame_width, frame_height = source.frame_size
+            tile_size = (int(round(frame_width / thumbnail_rows)), int(round(frame_height / thumbnail_rows)))
+        for index, frame_number in enumerate(frame_numbers):
+            if keyframe_only:
+                ret, frame = source.read_keyframe(frame_number, tile_size)
+            else:
+                ret, frame = source.read(frame_number)
 
             if not ret:
-                raise Exception(f'Error: 无法读取第 {i + 1} 张图像')
+                raise Exception(f'Error: 无法读取第 {index + 1} 张图像')
 
-            images.append(frame)
+            if concatenated_image is None:
+                # 与cv2.resize(fx=fy=1/rows)得到的尺寸一致
+                if not keyframe_only:
+                    frame_height, frame_width = frame.shape[:2]
+                tile_width = int(round(frame_width / thumbnail_rows))
+                tile_height = int(round(frame_height / thumbnail_rows))
+                if crop is not None:
+                    # 快速模式取到的帧已缩小到格子尺寸，按同样的比例换算裁剪区域
+                    tile_crop = scale_crop(crop, tile_width / frame_width, tile_height / frame_height, tile_width,
+                                           tile_height)
+                    tile_width, tile_height = tile_crop[2], tile_crop[3]
+                concatenated_image = np.full((thumbnail_cols * (tile_height + 2 * border_size),
+                                              thumbnail_rows * (tile_width + 2 * border_size), 3), 255,
+                                             dtype=np.uint8)
 
-        # 处理图像数量小于预期的情况
-        if len(images) < (thumbnail_cols * thumbnail_rows):
-            print(f'Warning: 只能获取 {len(images)} 张图像，小于预期的 {thumbnail_cols * thumbnail_rows} 张')
+            i, j = divmod(index, thumbnail_rows)
+            y_offset = i * (tile_height + 2 * border_size) + border_size
+            x_offset = j * (tile_width + 2 * border_size) + border_size
+            tile = apply_crop(frame, tile_crop if keyframe_only else crop)
+            if tile.shape[:2] != (tile_height, tile_width):
+                tile = cv2.resize(tile, (tile_width, tile_height), interpolation=cv2.INTER_AREA)
+            if tone_mapper is not None:
+                tile = tone_mapper(tile)
+            concatenated_image[y_offset:y_offset + tile_height, x_offset:x_offset + tile_width] = tile
+            if job is not None:
+                job.advance()
 
-        resized_images = [cv2.resize(image, (0, 0), fx=1.0 / thumbnail_rows, fy=1.0 / thumbnail_rows) for image in
-                          images]
-        border_size = 5
-        concatenated_image = np.ones((thumbnail_cols * (resized_images[0].shape[0] + 2 * border_size),
-                                      thumbnail_rows * (resized_images[0].shape[1] + 2 * border_size), 3),
-                                     dtype=np.uint8) * 255
-        for i in range(thumbnail_cols):
-            for j in range(thumbnail_rows):
-                index = i * thumbnail_rows + j
-                if index >= len(resized_images):
-                    break
-                y_offset = i * (resized_images[0].shape[0] + 2 * border_size) + border_size
-                x_offset = j * (resized_images[0].shape[1] + 2 * border_size) + border_size
+        print(f'缩略图取帧：跳转{source.seek_count - seek_count}次，顺序读取{source.grab_count - grab_count}帧')
+
+        if concatenated_image is None:
+            raise Exception('Error: 没有可用于拼接的图像')
 
-                concatenated_image[y_offset:y_offset + resized_images[0].shape[0],
-                x_offset:x_offset + resized_images[0].shape[1]] = resized_images[index]
-        thumbnail_path = generate_image_filename(screenshot_storage_path)
-        im_pil = Image.fromarray(cv2.cvtColor(concatenated_image, cv2.COLOR_BGR2RGB))
-        im_pil.save(Path(thumbnail_path))
+        # 处理图像数量小于预期的情况
+        if len(frame_numbers) < (thumbnail_cols * thumbnail_rows):
+            print(f'Warning: 只能获取 {len(frame_numbers)} 张图像，小于预期的 {thumbnail_cols * thumbnail_rows} 张')
+
+        output_path = None if in_memory else screenshot_storage_path
+        if output_specs:
+            with ThreadPoolExecutor(max_workers=ENCODER_THREADS) as encoder:
+                futures = [encoder.submit(_write_frame, concatenated_image, output_path, None, spec) for spec in specs]
+            thumbnail_path = [future.result() for future in futures]
+        else:
+            thumbnail_path = write_image(concatenated_image, output_path)
+        if result_cache is not None:
+            result_cache.put(cache_key, thumbnail_path if output_specs else [thumbnail_path], {'crop': crop})
 
     except Exception as e:
         print(f'发生异常：{e}')
         return False, str(e)
 
     finally:
-        video_capture.release()
+        if source is not None and session is None:
+            source.close()
 
-    print(f'拼接后的图像已保存到{thumbnail_path}')
+    for image in thumbnail_path if output_specs else [thumbnail_path]:
+        if in_memory:
+            print(f'拼接后的图像已编码：{image[0]}')
+        else:
+            print(f'拼接后的图像已保存到{image}')
     return True, thumbnail_path
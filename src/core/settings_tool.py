@@ -53,6 +53,32 @@ class SettingsManager:
             "screenshot_threshold": "30.0",
             "screenshot_start_percentage": "0.10",
             "screenshot_end_percentage": "0.90",
+            "screenshot_workers": "1",
+            "screenshot_oversample": "3",
+            "screenshot_format": "png",
+            "screenshot_quality": "90",
+            "screenshot_png_compression": "3",
+            "result_cache_size": "512",
+            "media_info_cache_size": "1000",
+            "screenshot_tone_mapping": "",
+            "screenshot_backend": "opencv",
+            "thumbnail_keyframe_only": "",
+            "screenshot_dedup_distance": "0",
+            "screenshot_hash": "dhash",
+            "screenshot_threshold_percentile": "0",
+            "screenshot_auto_crop": "",
+            "screenshot_season_sampling": "",
+            "screenshot_season_workers": "0",
+            "comparison_number": "4",
+            "comparison_mode": "pair",
+            "comparison_workers": "2",
+            "preview_position": "0.5",
+            "preview_duration": "3",
+            "preview_fps": "10",
+            "preview_width": "480",
+            "preview_format": "webp",
+            "preview_quality": "75",
+            "preview_max_size": "2048",
             "auto_upload_screenshot": "True",
             "paste_screenshot_url": "True",
             "delete_screenshot": "True",
@@ -81,7 +107,7 @@ class SettingsManager:
             "second_title_playlet": "{original_title} | {total_episodes} | {year}年 | {playlet_source} | 类型：{categories}",
             "file_name_playlet": "{original_title}.{en_title}.S{season}E{episode}.{year}.{video_format}.{source}.{video_codec}.{bit_depth}.{hdr_format}.{frame_rate}.{audio_codec}.{channels}.{audio_num}-{team}",
             # Auto feed configuration
-            "auto_feed_link": "https://example.com/upload.php#separator#name#linkstr#{主标题}#linkstr#small_descr#linkstr#{副标题}#linkstr#url#linkstr#{IMDB}#linkstr#dburl#linkstr#{豆瓣}#linkstr#descr#linkstr#{简介}[quote]{MediaInfo}[/quote]#linkstr#log_info#linkstr##linkstr#tracklist#linkstr##linkstr#music_type#linkstr##linkstr#music_media#linkstr##linkstr#edition_info#linkstr##linkstr#music_name#linkstr##linkstr#music_author#linkstr##linkstr#animate_info#linkstr##linkstr#anidb#linkstr##linkstr#torrentName#linkstr##linkstr#images#linkstr##linkstr#torrent_name#linkstr#{种子名称}#linkstr#torrent_url#linkstr#{种子链接}#linkstr#type#linkstr#{类型}#linkstr#source_sel#linkstr#{地区}#linkstr#standard_sel#linkstr#{分辨率}#linkstr#audiocodec_sel#linkstr#{音频编码}#linkstr#codec_sel#linkstr#{视频编码}#linkstr#medium_sel#linkstr#{媒介}#linkstr#origin_site#linkstr#{小组}#linkstr#origin_url#linkstr##linkstr#golden_torrent#linkstr#false#linkstr#mediainfo_cmct#linkstr##linkstr#imgs_cmct#linkstr##linkstr#full_mediainfo#linkstr##linkstr#subtitles#linkstr##linkstr#youtube_url#linkstr##linkstr#ptp_poster#linkstr##linkstr#comparisons#linkstr##linkstr#version_info#linkstr##linkstr#multi_mediainfo#linkstr##linkstr#labels#linkstr#0",
+            "auto_feed_link": "https://example.com/upload.php#separator#name#linkstr#{主标题}#linkstr#small_descr#linkstr#{副标题}#linkstr#url#linkstr#{IMDB}#linkstr#dburl#linkstr#{豆瓣}#linkstr#descr#linkstr#{简介}[quote]{MediaInfo}[/quote]#linkstr#log_info#linkstr##linkstr#tracklist#linkstr##linkstr#music_type#linkstr##linkstr#music_media#linkstr##linkstr#edition_info#linkstr##linkstr#music_name#linkstr##linkstr#music_author#linkstr##linkstr#animate_info#linkstr##linkstr#anidb#linkstr##linkstr#torrentName#linkstr##linkstr#images#linkstr##linkstr#torrent_name#linkstr#{种子名称}#linkstr#torrent_url#linkstr#{种子链接}#linkstr#type#linkstr#{类型}#linkstr#source_sel#linkstr#{地区}#linkstr#standard_sel#linkstr#{分辨率}#linkstr#audiocodec_sel#linkstr#{音频编码}#linkstr#codec_sel#linkstr#{视频编码}#linkstr#medium_sel#linkstr#{媒介}#linkstr#origin_site#linkstr#{小组}#linkstr#origin_url#linkstr##linkstr#golden_torrent#linkstr#false#linkstr#mediainfo_cmct#linkstr##linkstr#imgs_cmct#linkstr##linkstr#full_mediainfo#linkstr##linkstr#subtitles#linkstr##linkstr#youtube_url#linkstr##linkstr#ptp_poster#linkstr##linkstr#comparisons#linkstr#{对比图}#linkstr#version_info#linkstr##linkstr#multi_mediainfo#linkstr##linkstr#labels#linkstr#0",
             "open_auto_feed_link": "True",
             # Personal signature
             "personalized_signature": "",
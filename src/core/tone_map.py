@@ -0,0 +1,128 @@
+import threading
+
+import cv2
+import numpy as np
+
+# SDR参考白对应的亮度（nit），ITU-R BT.2408；色调映射后该亮度及以上的高光被压缩到SDR的最大值
+SDR_REFERENCE_WHITE = 203.0
+# 缺少MaxCLL等元数据时假定的母版峰值亮度（nit），也是HLG的标称显示峰值
+HDR_SOURCE_PEAK = 1000.0
+# 第二张查找表的级数，以线性光的平方根为索引，暗部精度足够
+TONE_MAP_LUT_SIZE = 4096
+
+# 线性光下BT.2020到BT.709的色域转换矩阵（RGB顺序）
+BT2020_TO_BT709 = np.array([[1.6605, -0.5876, -0.0728],
+                            [-0.1246, 1.1329, -0.0083],
+                            [-0.0182, -0.1006, 1.1187]])
+
+# SMPTE ST 2084（PQ）常数
+PQ_M1 = 2610 / 16384
+PQ_M2 = 2523 / 4096 * 128
+PQ_C1 = 3424 / 4096
+PQ_C2 = 2413 / 4096 * 32
+PQ_C3 = 2392 / 4096 * 32
+PQ_PEAK = 10000.0
+
+# ARIB STD-B67（HLG）常数，系统伽马按1000nit显示取1.2
+HLG_A = 0.17883277
+HLG_B = 1 - 4 * HLG_A
+HLG_C = 0.5 - HLG_A * np.log(4 * HLG_A)
+HLG_SYSTEM_GAMMA = 1.2
+
+_tone_mappers = {}
+_tone_mappers_lock = threading.Lock()
+
+
+def hdr_transfer(hdr_format):
+    """
+    根据get_video_info()得到的HDR格式判断传输特性。
+
+    返回:
+    str|None: 'hlg'、'pq'，SDR返回None
+    """
+    if not hdr_format:
+        return None
+    if 'HLG' in hdr_format.upper():
+        return 'hlg'
+    # HDR10、HDR10+、Dolby Vision和HDR Vivid的常见形式均为PQ
+    return 'pq'
+
+
+def pq_eotf(code):
+    """PQ信号（0-1）转为显示亮度（nit）"""
+    e = np.power(np.clip(code, 0, 1), 1 / PQ_M2)
+    return PQ_PEAK * np.power(np.maximum(e - PQ_C1, 0) / (PQ_C2 - PQ_C3 * e), 1 / PQ_M1)
+
+
+def pq_inverse_eotf(nits):
+    """显示亮度（nit）转为PQ信号（0-1）"""
+    y = np.power(np.clip(nits / PQ_PEAK, 0, 1), PQ_M1)
+    return np.power((PQ_C1 + PQ_C2 * y) / (1 + PQ_C3 * y), PQ_M2)
+
+
+def hlg_eotf(code):
+    """HLG信号（0-1）转为显示亮度（nit），系统伽马逐通道近似应用"""
+    code = np.clip(code, 0, 1)
+    scene = np.where(code <= 0.5, code ** 2 / 3, (np.exp((code - HLG_C) / HLG_A) + HLG_B) / 12)
+    return HDR_SOURCE_PEAK * np.power(scene, HLG_SYSTEM_GAMMA)
+
+
+def bt2390_eetf(nits, source_peak, target_peak):
+    """ITU-R BT.2390的EETF：在PQ域中保持暗部和中间调，用Hermite样条把[膝点, 源峰值]压缩到目标峰值以内"""
+    source_pq = pq_inverse_eotf(source_peak)
+    e1 = pq_inverse_eotf(np.minimum(nits, source_peak)) / source_pq
+    max_lum = pq_inverse_eotf(target_peak) / source_pq
+    knee = 1.5 * max_lum - 0.5
+    t = np.clip((e1 - knee) / (1 - knee), 0, 1)
+    spline = ((2 * t ** 3 - 3 * t ** 2 + 1) * knee + (t ** 3 - 2 * t ** 2 + t) * (1 - knee) +
+              (-2 * t ** 3 + 3 * t ** 2) * max_lum)
+    e2 = np.where(e1 < knee, e1, spline)
+    return pq_eotf(e2 * source_pq)
+
+
+def srgb_oetf(linear):
+    """线性光（0-1）转为sRGB信号（0-1）"""
+    linear = np.clip(linear, 0, 1)
+    return np.where(linear <= 0.0031308, 12.92 * linear, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+class ToneMapper:
+    """
+    基于查找表的HDR转SDR，查找表只在创建时计算一次：
+    1. cv2.LUT把8位信号查表转为线性光（相对SDR参考白）；
+    2. cv2.transform在线性光下做BT.2020到BT.709的色域转换；
+    3. 以线性光的平方根为索引查第二张表，一次完成BT.2390色调映射和sRGB编码，得到8位结果。
+    """
+
+    def __init__(self, transfer, source_peak=HDR_SOURCE_PEAK):
+        codes = np.arange(256) / 255
+        nits = hlg_eotf(codes) if transfer == 'hlg' else pq_eotf(codes)
+        self.linear_lut = (nits / SDR_REFERENCE_WHITE).astype(np.float32)
+
+        # OpenCV的帧为BGR顺序，矩阵的行列同时反转
+        self.gamut_matrix = BT2020_TO_BT709[::-1, ::-1].astype(np.float32)
+
+        # 索引i对应线性光(i/(TONE_MAP_LUT_SIZE-1))²×峰值；表长取满16位，超过峰值的索引直接查到白色，无需单独裁剪
+        index = np.minimum(np.arange(65536) / (TONE_MAP_LUT_SIZE - 1), 1)
+        mapped = bt2390_eetf(index ** 2 * source_peak, source_peak, SDR_REFERENCE_WHITE) / SDR_REFERENCE_WHITE
+        self.output_lut = np.round(srgb_oetf(mapped) * 255).astype(np.uint8)
+        self.index_scale = (TONE_MAP_LUT_SIZE - 1) / np.sqrt(source_peak / SDR_REFERENCE_WHITE)
+
+    def __call__(self, frame):
+        """对BGR帧做色调映射，返回新的uint8 BGR帧"""
+        linear = cv2.LUT(frame, self.linear_lut)
+        linear = cv2.transform(linear, self.gamut_matrix)
+        # 色域转换可能产生负值，开方前置零
+        np.maximum(linear, 0, out=linear)
+        index = cv2.multiply(cv2.sqrt(linear), self.index_scale, dtype=cv2.CV_16U)
+        return self.output_lut[index]
+
+
+def get_tone_mapper(transfer):
+    """按传输特性返回共享的ToneMapper，SDR返回None"""
+    if transfer is None:
+        return None
+    with _tone_mappers_lock:
+        if transfer not in _tone_mappers:
+            _tone_mappers[transfer] = ToneMapper(transfer)
+        return _tone_mappers[transfer]
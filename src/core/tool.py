@@ -9,6 +9,11 @@ import re
 from torf import Torrent
 from xpinyin import Pinyin
 
+from src.core.job import JobCancelled
+
+# 制作种子时两次进度回调之间的最短间隔（秒）
+TORRENT_PROGRESS_INTERVAL = 0.5
+
 
 # 更新settings
 def update_settings(settings_name, settings_data):
@@ -69,7 +74,7 @@ def get_settings(settings_name):
         with open(settings_file, 'w', encoding='utf-8') as file:
             default_settings = {
                 'api_port': '5372',
-                'auto_feed_link': 'https://example.com/upload.php#separator#name#linkstr#{\u4e3b\u6807\u9898}#linkstr#small_descr#linkstr#{\u526f\u6807\u9898}#linkstr#url#linkstr#{IMDB}#linkstr#dburl#linkstr#{\u8c46\u74e3}#linkstr#descr#linkstr#{\u7b80\u4ecb}[quote]{MediaInfo}[/quote]#linkstr#log_info#linkstr##linkstr#tracklist#linkstr##linkstr#music_type#linkstr##linkstr#music_media#linkstr##linkstr#edition_info#linkstr##linkstr#music_name#linkstr##linkstr#music_author#linkstr##linkstr#animate_info#linkstr##linkstr#anidb#linkstr##linkstr#torrentName#linkstr##linkstr#images#linkstr##linkstr#torrent_name#linkstr#{\u79cd\u5b50\u540d\u79f0}#linkstr#torrent_url#linkstr#{\u79cd\u5b50\u94fe\u63a5}#linkstr#type#linkstr#{\u7c7b\u578b}#linkstr#source_sel#linkstr#{\u5730\u533a}#linkstr#standard_sel#linkstr#{\u5206\u8fa8\u7387}#linkstr#audiocodec_sel#linkstr#{\u97f3\u9891\u7f16\u7801}#linkstr#codec_sel#linkstr#{\u89c6\u9891\u7f16\u7801}#linkstr#medium_sel#linkstr#{\u5a92\u4ecb}#linkstr#origin_site#linkstr#{\u5c0f\u7ec4}#linkstr#origin_url#linkstr##linkstr#golden_torrent#linkstr#false#linkstr#mediainfo_cmct#linkstr##linkstr#imgs_cmct#linkstr##linkstr#full_mediainfo#linkstr##linkstr#subtitles#linkstr##linkstr#youtube_url#linkstr##linkstr#ptp_poster#linkstr##linkstr#comparisons#linkstr##linkstr#version_info#linkstr##linkstr#multi_mediainfo#linkstr##linkstr#labels#linkstr#0',
+                'auto_feed_link': 'https://example.com/upload.php#separator#name#linkstr#{\u4e3b\u6807\u9898}#linkstr#small_descr#linkstr#{\u526f\u6807\u9898}#linkstr#url#linkstr#{IMDB}#linkstr#dburl#linkstr#{\u8c46\u74e3}#linkstr#descr#linkstr#{\u7b80\u4ecb}[quote]{MediaInfo}[/quote]#linkstr#log_info#linkstr##linkstr#tracklist#linkstr##linkstr#music_type#linkstr##linkstr#music_media#linkstr##linkstr#edition_info#linkstr##linkstr#music_name#linkstr##linkstr#music_author#linkstr##linkstr#animate_info#linkstr##linkstr#anidb#linkstr##linkstr#torrentName#linkstr##linkstr#images#linkstr##linkstr#torrent_name#linkstr#{\u79cd\u5b50\u540d\u79f0}#linkstr#torrent_url#linkstr#{\u79cd\u5b50\u94fe\u63a5}#linkstr#type#linkstr#{\u7c7b\u578b}#linkstr#source_sel#linkstr#{\u5730\u533a}#linkstr#standard_sel#linkstr#{\u5206\u8fa8\u7387}#linkstr#audiocodec_sel#linkstr#{\u97f3\u9891\u7f16\u7801}#linkstr#codec_sel#linkstr#{\u89c6\u9891\u7f16\u7801}#linkstr#medium_sel#linkstr#{\u5a92\u4ecb}#linkstr#origin_site#linkstr#{\u5c0f\u7ec4}#linkstr#origin_url#linkstr##linkstr#golden_torrent#linkstr#false#linkstr#mediainfo_cmct#linkstr##linkstr#imgs_cmct#linkstr##linkstr#full_mediainfo#linkstr##linkstr#subtitles#linkstr##linkstr#youtube_url#linkstr##linkstr#ptp_poster#linkstr##linkstr#comparisons#linkstr#{\u5bf9\u6bd4\u56fe}#linkstr#version_info#linkstr##linkstr#multi_mediainfo#linkstr##linkstr#labels#linkstr#0',
                 'auto_upload_screenshot': 'True',
                 'delete_screenshot': 'True',
                 'do_get_thumbnail': 'True',
@@ -96,6 +101,32 @@ def get_settings(settings_name):
                 'screenshot_start_percentage': '0.10',
                 'screenshot_storage_path': 'temp/pic',
                 'screenshot_threshold': '30.00',
+                'screenshot_workers': '1',
+                'screenshot_oversample': '3',
+                'screenshot_format': 'png',
+                'screenshot_quality': '90',
+                'screenshot_png_compression': '3',
+                'result_cache_size': '512',
+                'media_info_cache_size': '1000',
+                'screenshot_tone_mapping': '',
+                'screenshot_backend': 'opencv',
+                'thumbnail_keyframe_only': '',
+                'screenshot_dedup_distance': '0',
+                'screenshot_hash': 'dhash',
+                'screenshot_threshold_percentile': '0',
+                'screenshot_auto_crop': '',
+                'screenshot_season_sampling': '',
+                'screenshot_season_workers': '0',
+                'comparison_number': '4',
+                'comparison_mode': 'pair',
+                'comparison_workers': '2',
+                'preview_position': '0.5',
+                'preview_duration': '3',
+                'preview_fps': '10',
+                'preview_width': '480',
+                'preview_format': 'webp',
+                'preview_quality': '75',
+                'preview_max_size': '2048',
                 'second_confirm_file_name': 'True',
                 'second_title_movie': '{original_title} / {other_titles} | \u7c7b\u578b\uff1a{categories} | \u6f14\u5458\uff1a{actors}',
                 'second_title_playlet': '{original_title} | {total_episodes} | {year}\u5e74 | {playlet_source} | \u7c7b\u578b\uff1a{categories}',
@@ -123,6 +154,32 @@ def get_settings(settings_name):
         'screenshot_threshold': '30.0',
         'screenshot_start_percentage': '0.10',
         'screenshot_end_percentage': '0.90',
+        'screenshot_workers': '1',
+        'screenshot_oversample': '3',
+        'screenshot_format': 'png',
+        'screenshot_quality': '90',
+        'screenshot_png_compression': '3',
+        'result_cache_size': '512',
+        'media_info_cache_size': '1000',
+        'screenshot_tone_mapping': '',
+        'screenshot_backend': 'opencv',
+        'thumbnail_keyframe_only': '',
+        'screenshot_dedup_distance': '0',
+        'screenshot_hash': 'dhash',
+        'screenshot_threshold_percentile': '0',
+        'screenshot_auto_crop': '',
+        'screenshot_season_sampling': '',
+        'screenshot_season_workers': '0',
+        'comparison_number': '4',
+        'comparison_mode': 'pair',
+        'comparison_workers': '2',
+        'preview_position': '0.5',
+        'preview_duration': '3',
+        'preview_fps': '10',
+        'preview_width': '480',
+        'preview_format': 'webp',
+        'preview_quality': '75',
+        'preview_max_size': '2048',
         'do_get_thumbnail': 'True',
         'thumbnail_rows': '3',
         'thumbnail_cols': '3',
@@ -146,7 +203,7 @@ def get_settings(settings_name):
         'main_title_playlet': '{en_title} S{season} {year} {video_format} {source} {video_codec} {bit_depth} {hdr_format} {frame_rate} {audio_codec} {channels} {audio_num}-{team}',
         'second_title_playlet': '{original_title} | {total_episodes} | {year}\u5e74 | {playlet_source} | \u7c7b\u578b\uff1a{categories}',
         'file_name_playlet': '{original_title}.{en_title}.S{season}E{episode}.{year}.{video_format}.{source}.{video_codec}.{bit_depth}.{hdr_format}.{frame_rate}.{audio_codec}.{channels}.{audio_num}-{team}',
-        'auto_feed_link': 'https://example.com/upload.php#separator#name#linkstr#{主标题}#linkstr#small_descr#linkstr#{副标题}#linkstr#url#linkstr#{IMDB}#linkstr#dburl#linkstr#{豆瓣}#linkstr#descr#linkstr#{简介}[quote]{MediaInfo}[/quote]#linkstr#log_info#linkstr##linkstr#tracklist#linkstr##linkstr#music_type#linkstr##linkstr#music_media#linkstr##linkstr#edition_info#linkstr##linkstr#music_name#linkstr##linkstr#music_author#linkstr##linkstr#animate_info#linkstr##linkstr#anidb#linkstr##linkstr#torrentName#linkstr##linkstr#images#linkstr##linkstr#torrent_name#linkstr#{种子名称}#linkstr#torrent_url#linkstr#{种子链接}#linkstr#type#linkstr#{类型}#linkstr#source_sel#linkstr#{地区}#linkstr#standard_sel#linkstr#{分辨率}#linkstr#audiocodec_sel#linkstr#{音频编码}#linkstr#codec_sel#linkstr#{视频编码}#linkstr#medium_sel#linkstr#{媒介}#linkstr#origin_site#linkstr#{小组}#linkstr#origin_url#linkstr##linkstr#golden_torrent#linkstr#false#linkstr#mediainfo_cmct#linkstr##linkstr#imgs_cmct#linkstr##linkstr#full_mediainfo#linkstr##linkstr#subtitles#linkstr##linkstr#youtube_url#linkstr##linkstr#ptp_poster#linkstr##linkstr#comparisons#linkstr##linkstr#version_info#linkstr##linkstr#multi_mediainfo#linkstr##linkstr#labels#linkstr#0',
+        'auto_feed_link': 'https://example.com/upload.php#separator#name#linkstr#{主标题}#linkstr#small_descr#linkstr#{副标题}#linkstr#url#linkstr#{IMDB}#linkstr#dburl#linkstr#{豆瓣}#linkstr#descr#linkstr#{简介}[quote]{MediaInfo}[/quote]#linkstr#log_info#linkstr##linkstr#tracklist#linkstr##linkstr#music_type#linkstr##linkstr#music_media#linkstr##linkstr#edition_info#linkstr##linkstr#music_name#linkstr##linkstr#music_author#linkstr##linkstr#animate_info#linkstr##linkstr#anidb#linkstr##linkstr#torrentName#linkstr##linkstr#images#linkstr##linkstr#torrent_name#linkstr#{种子名称}#linkstr#torrent_url#linkstr#{种子链接}#linkstr#type#linkstr#{类型}#linkstr#source_sel#linkstr#{地区}#linkstr#standard_sel#linkstr#{分辨率}#linkstr#audiocodec_sel#linkstr#{音频编码}#linkstr#codec_sel#linkstr#{视频编码}#linkstr#medium_sel#linkstr#{媒介}#linkstr#origin_site#linkstr#{小组}#linkstr#origin_url#linkstr##linkstr#golden_torrent#linkstr#false#linkstr#mediainfo_cmct#linkstr##linkstr#imgs_cmct#linkstr##linkstr#full_mediainfo#linkstr##linkstr#subtitles#linkstr##linkstr#youtube_url#linkstr##linkstr#ptp_poster#linkstr##linkstr#comparisons#linkstr#{对比图}#linkstr#version_info#linkstr##linkstr#multi_mediainfo#linkstr##linkstr#labels#linkstr#0',
         'open_auto_feed_link': 'True'
     }
 
@@ -487,12 +544,12 @@ def get_abbreviation(original_name, json_file_path='static/abbreviation.json'):
 
 
 # 此方法用于自动生成一个不易重复的图片文件名称
-def generate_image_filename(base_path):
+def generate_image_filename(base_path, extension='png'):
     now = datetime.datetime.now()
     date_time = now.strftime('%Y%m%d-%H%M%S')
     letters = random.sample('0123456789', 6)
     random_str = ''.join(letters)
-    filename = f'{date_time}-{random_str}.png'
+    filename = f'{date_time}-{random_str}.{extension}'
     path = base_path + '/' + filename
     return path
 
@@ -536,7 +593,8 @@ def get_playlet_description(original_title, year, area, category, language, seas
     return f'\n◎片　　名　{original_title}\n◎年　　代　{year}\n◎产　　地　{area}\n◎类　　别　{category}\n◎语　　言　{language}\n◎简　　介　\n'
 
 
-def make_torrent(path, torrent_storage_path):
+# job：Job，报告已校验的字节数，被取消时停止校验并返回失败
+def make_torrent(path, torrent_storage_path, job=None):
     print(path + '  ' + torrent_storage_path)
     try:
         # 检查路径是否存在
@@ -566,7 +624,19 @@ def make_torrent(path, torrent_storage_path):
                     creation_date=current_time)
 
         # 生成和写入 Torrent 文件
-        t.generate()
+        if job is None:
+            t.generate()
+        else:
+            job.begin('制作种子', t.size, '字节')
+
+            def report_progress(torrent, file_path, pieces_done, pieces_total):
+                try:
+                    job.update(min(pieces_done * torrent.piece_size, torrent.size))
+                except JobCancelled:
+                    return True  # 回调返回非None时torf停止校验
+
+            t.generate(callback=report_progress, interval=TORRENT_PROGRESS_INTERVAL)
+            job.check()
         t.write(torrent_file_path)
 
         print(f'Torrent created: {torrent_file_path}')
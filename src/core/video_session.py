@@ -0,0 +1,127 @@
+from src.core.crop import detect_video_crop
+from src.core.keyframe import get_keyframe_index
+from src.core.media_info_cache import parse_media_info
+from src.core.result_cache import file_identity
+from src.core.screenshot import open_frame_source, probe_frame_rate_and_count
+from src.core.tool import check_path_and_find_video
+
+
+class VideoSession:
+    """
+    一次任务内共享的视频资源。路径只解析一次，MediaInfo和关键帧索引只读取一次，
+    每种取帧后端只打开一次，截图、缩略图、VideoInfo、MediaInfo等各步骤都从这里取用，
+    避免同一文件被反复打开和探测（网络挂载的文件每次探测都很慢）。
+
+    用法:
+    with VideoSession(path) as session:
+        is_video_path, response = session.check()
+        get_screenshot(session.video_path, ..., session=session)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.path_type, self.video_path, self.message = 0, None, ''
+        self._identity = None
+        self._media_info = None
+        self._keyframe_index = None
+        self._keyframe_index_loaded = False
+        self._crop = None
+        self._crop_detected = False
+        self._sources = {}
+        self._resolve(path)
+
+    def _resolve(self, path):
+        self.path = path
+        is_video_path, response = check_path_and_find_video(path)
+        if is_video_path == 1 or is_video_path == 2:
+            self.path_type, self.video_path, self.message = is_video_path, response, ''
+        else:
+            self.path_type, self.video_path, self.message = 0, None, response
+
+    def check(self):
+        """与check_path_and_find_video()的返回值相同：(0/1/2, 视频路径或错误信息)，但不再访问文件系统"""
+        if self.path_type == 0:
+            return 0, self.message
+        return self.path_type, self.video_path
+
+    def relocate(self, path):
+        """
+        文件或文件夹被重命名后重新解析路径。重命名不改变文件本身（inode、大小、修改时间不变），已读取的信息继续使用；
+        解析到的是另一个文件时丢弃缓存
+        """
+        identity = self._identity
+        self.close()
+        self._resolve(path)
+        if identity is None or self.video_path is None or file_identity(self.video_path) != identity:
+            self._media_info = None
+            self._keyframe_index, self._keyframe_index_loaded = None, False
+            self._crop, self._crop_detected = None, False
+            self._identity = None
+        elif self._media_info is not None:
+            # 报告中的Complete name取自解析结果，改为重命名后的路径，与重新解析得到的一致
+            self._media_info.general_tracks[0].complete_name = self.video_path
+        return self.check()
+
+    @property
+    def media_info(self):
+        """解析一次的MediaInfo对象，可直接传给get_video_info()和get_media_info()"""
+        if self._media_info is None and self.video_path is not None:
+            self._media_info = parse_media_info(self.video_path)
+            self._identity = file_identity(self.video_path)
+        return self._media_info
+
+    @property
+    def keyframe_index(self):
+        if not self._keyframe_index_loaded and self.video_path is not None:
+            self._keyframe_index = get_keyframe_index(self.video_path)
+            self._keyframe_index_loaded = True
+        return self._keyframe_index
+
+    @property
+    def fps(self):
+        return probe_frame_rate_and_count(self.video_path, self.media_info)[0]
+
+    @property
+    def total_frames(self):
+        return probe_frame_rate_and_count(self.video_path, self.media_info)[1]
+
+    @property
+    def duration(self):
+        """时长（秒）"""
+        fps, total_frames = probe_frame_rate_and_count(self.video_path, self.media_info)
+        return total_frames / fps
+
+    def crop(self, backend='opencv'):
+        """检测一次的黑边裁剪区域(x, y, 宽, 高)，截图和缩略图共用，没有黑边时为None"""
+        if not self._crop_detected and self.video_path is not None:
+            self._crop = detect_video_crop(self.frame_source(backend))
+            self._crop_detected = True
+        return self._crop
+
+    def set_crop(self, crop):
+        """使用已知的黑边裁剪区域（如结果缓存中随图片保存的），不再解码检测"""
+        self._crop = tuple(crop) if crop is not None else None
+        self._crop_detected = True
+
+    def frame_source(self, backend='opencv'):
+        """返回该后端共享的取帧对象，第一次使用时打开，由close()统一释放"""
+        if backend not in self._sources:
+            if backend == 'ffmpeg':
+                # ffmpeg后端的帧率和帧数本来就取自MediaInfo，直接使用已解析的结果
+                fps, total_frames = probe_frame_rate_and_count(self.video_path, self.media_info)
+                self._sources[backend] = open_frame_source(self.video_path, backend, self.keyframe_index, fps,
+                                                           total_frames, self.media_info)
+            else:
+                self._sources[backend] = open_frame_source(self.video_path, backend, self.keyframe_index)
+        return self._sources[backend]
+
+    def close(self):
+        for source in self._sources.values():
+            source.close()
+        self._sources = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -4,6 +4,7 @@ import sys
 import tempfile
 import time
 import webbrowser
+from functools import partial
 
 import pyperclip
 from PyQt6.QtCore import QThread, pyqtSignal
@@ -12,12 +13,13 @@ from PyQt6.QtWidgets import QMainWindow, QApplication, QDialog, QInputDialog, QM
 
 from src.api.startapi import start_api
 from src.core.autofeed import get_auto_feed_link
+from src.core.job import Job
 from src.core.mediainfo import get_media_info
 from src.core.picturebed import upload_picture
 from src.core.ptgen import get_pt_gen_description
 from src.core.rename import get_pt_gen_info, get_video_info, get_name_from_template, rename_file, rename_folder, \
     move_file_to_folder, create_hard_link
-from src.core.screenshot import get_screenshot, get_thumbnail
+from src.core.screenshot import get_screenshot, get_season_screenshot, get_thumbnail
 from src.core.tool import update_settings, get_settings, check_path_and_find_video, make_torrent, \
     chinese_name_to_pinyin, \
     get_video_files, is_filename_too_long, get_playlet_description, delete_season_number, \
@@ -70,6 +72,7 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
         self.upload_picture_thread5 = None
         self.upload_cover_thread = None
         self.make_torrent_thread = None
+        self.get_picture_thread = None
         self.api_thread = None
         self.wait_for_rename_thread = None
 
@@ -290,6 +293,11 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             self.debugBrowserMovie.append(f'未成功获取到任何PT-Gen信息{response}')
 
     def get_picture_button_movie_clicked(self):
+        if self.get_picture_thread is not None and self.get_picture_thread.isRunning():
+            # 正在截图时再次点击按钮即取消
+            self.get_picture_thread.cancel()
+            self.debugBrowserMovie.append('正在取消截图...')
+            return
         self.pictureUrlBrowserMovie.setText('')
         is_video_path, response = check_path_and_find_video(
             self.videoPathMovie.text().replace('file:///', ''))  # 视频资源的路径
@@ -304,114 +312,144 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
             thumbnail_rows = int(get_settings('thumbnail_rows'))
             thumbnail_cols = int(get_settings('thumbnail_cols'))
-            auto_upload_screenshot = bool(get_settings('auto_upload_screenshot'))
-            self.debugBrowserMovie.append('参数获取成功，开始执行截图函数，需要较长时间，程序会暂时无响应，请稍候...')
+            self.debugBrowserMovie.append('参数获取成功，开始执行截图函数，正在后台截图，再次点击按钮可取消...')
             print('参数获取成功，开始执行截图函数')
-            pictures = []
-            screenshot_success, response = get_screenshot(video_path, screenshot_storage_path, screenshot_number,
-                                                          screenshot_threshold, screenshot_start_percentage,
-                                                          screenshot_end_percentage, screenshot_min_interval=0.01)
-            print('成功获取截图函数的返回值')
-            self.debugBrowserMovie.append('成功获取截图函数的返回值')
+            screenshot_workers = int(get_settings('screenshot_workers'))
+            screenshot_oversample = int(get_settings('screenshot_oversample'))
+            screenshot_format = get_settings('screenshot_format')
+            screenshot_quality = int(get_settings('screenshot_quality'))
+            screenshot_png_compression = int(get_settings('screenshot_png_compression'))
+            screenshot_tone_mapping = bool(get_settings('screenshot_tone_mapping'))
+            screenshot_backend = get_settings('screenshot_backend')
+            thumbnail_keyframe_only = bool(get_settings('thumbnail_keyframe_only'))
+            screenshot_dedup_distance = int(get_settings('screenshot_dedup_distance'))
+            screenshot_hash = get_settings('screenshot_hash')
+            screenshot_threshold_percentile = float(get_settings('screenshot_threshold_percentile'))
+            screenshot_auto_crop = bool(get_settings('screenshot_auto_crop'))
+            get_screenshot_function = partial(get_screenshot, video_path, screenshot_storage_path, screenshot_number,
+                                              screenshot_threshold, screenshot_start_percentage,
+                                              screenshot_end_percentage, screenshot_min_interval=0.01,
+                                              screenshot_workers=screenshot_workers,
+                                              screenshot_oversample=screenshot_oversample,
+                                              screenshot_format=screenshot_format,
+                                              screenshot_quality=screenshot_quality,
+                                              screenshot_png_compression=screenshot_png_compression,
+                                              tone_mapping=screenshot_tone_mapping,
+                                              screenshot_backend=screenshot_backend,
+                                              screenshot_dedup_distance=screenshot_dedup_distance,
+                                              screenshot_hash=screenshot_hash,
+                                              screenshot_threshold_percentile=screenshot_threshold_percentile,
+                                              auto_crop=screenshot_auto_crop)
+            get_thumbnail_function = None
             if do_get_thumbnail:
-                get_thumbnail_success, thumbnail_path = get_thumbnail(video_path, screenshot_storage_path,
-                                                                      thumbnail_rows,
-                                                                      thumbnail_cols,
-                                                                      screenshot_start_percentage,
-                                                                      screenshot_end_percentage)
-                if get_thumbnail_success:
-                    pictures.append(thumbnail_path)
-            if screenshot_success:
-                pictures = response + pictures
-                self.debugBrowserMovie.append(f'成功获取截图：{str(pictures)}')
-                # 判断是否需要上传图床
-                if auto_upload_screenshot and len(pictures) > 0:
-                    picture_bed_path = get_settings('picture_bed_api_url')  # 图床地址
-                    picture_bed_token = get_settings('picture_bed_api_token')  # 图床Token
-                    print(f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
-                    self.debugBrowserMovie.append(
-                        f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床')
-                    self.pictureUrlBrowserMovie.setText('')
-                    if len(pictures) > 0:
-                        if do_get_thumbnail and len(pictures) == 1:
-                            self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[0], False, True)
-                        else:
-                            self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[0], False, False)
-                        self.upload_picture_thread0.result_signal.connect(
-                            self.handle_upload_picture_movie_result)  # 连接信号
-                        self.upload_picture_thread0.start()  # 启动线程
-                        print('启动线程0')
-                    if len(pictures) > 1:
-                        if do_get_thumbnail and len(pictures) == 2:
-                            self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[1], False, True)
-                        else:
-                            self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[1], False, False)
-                        self.upload_picture_thread1.result_signal.connect(
-                            self.handle_upload_picture_movie_result)  # 连接信号
-                        self.upload_picture_thread1.start()  # 启动线程
-                        print('启动线程1')
-                    if len(pictures) > 2:
-                        if do_get_thumbnail and len(pictures) == 3:
-                            self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[2], False, True)
-                        else:
-                            self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[2], False, False)
-                        self.upload_picture_thread2.result_signal.connect(
-                            self.handle_upload_picture_movie_result)  # 连接信号
-                        self.upload_picture_thread2.start()  # 启动线程
-                        print('启动线程2')
-                    if len(pictures) > 3:
-                        if do_get_thumbnail and len(pictures) == 4:
-                            self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[3], False, True)
-                        else:
-                            self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[3], False, False)
-                        self.upload_picture_thread3.result_signal.connect(
-                            self.handle_upload_picture_movie_result)  # 连接信号
-                        self.upload_picture_thread3.start()  # 启动线程
-                        print('启动线程3')
-                    if len(pictures) > 4:
-                        if do_get_thumbnail and len(pictures) == 5:
-                            self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[4], False, True)
-                        else:
-                            self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[4], False, False)
-                        self.upload_picture_thread4.result_signal.connect(
-                            self.handle_upload_picture_movie_result)  # 连接信号
-                        self.upload_picture_thread4.start()  # 启动线程
-                        print('启动线程4')
-                    if len(pictures) > 5:
-                        if do_get_thumbnail and len(pictures) == 6:
-                            self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[5], False, True)
-                        else:
-                            self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[5], False, False)
-                        self.upload_picture_thread5.result_signal.connect(
-                            self.handle_upload_picture_movie_result)  # 连接信号
-                        self.upload_picture_thread5.start()  # 启动线程
-                        print('启动线程5')
-                    print('上传图床线程全部启动')
-                    self.debugBrowserMovie.append('上传图床线程启动，请耐心等待图床Api的响应...')
-                else:
-                    self.debugBrowserMovie.append('未选择自动上传图床功能，图片已储存在本地')
-                    output = ''
-                    for picture in pictures:
-                        output += picture
-                        output += '\n'
-                    self.pictureUrlBrowserMovie.setText(output)
-            else:
-                self.debugBrowserMovie.append(f'截图失败：{response[0]}')
+                get_thumbnail_function = partial(get_thumbnail, video_path, screenshot_storage_path, thumbnail_rows,
+                                                 thumbnail_cols, screenshot_start_percentage,
+                                                 screenshot_end_percentage, tone_mapping=screenshot_tone_mapping,
+                                                 screenshot_backend=screenshot_backend,
+                                                 keyframe_only=thumbnail_keyframe_only,
+                                                 auto_crop=screenshot_auto_crop)
+            self.get_picture_thread = GetPictureThread(get_screenshot_function, get_thumbnail_function)
+            self.get_picture_thread.result_signal.connect(self.handle_get_picture_movie_result)
+            self.get_picture_thread.progress_signal.connect(self.debugBrowserMovie.append)
+            self.get_picture_thread.start()  # 启动线程
         else:
             self.debugBrowserMovie.append(f'您的视频文件路径有误：{response}')
 
+    def handle_get_picture_movie_result(self, screenshot_success, response, thumbnail_path):
+        do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
+        auto_upload_screenshot = bool(get_settings('auto_upload_screenshot'))
+        pictures = [thumbnail_path] if thumbnail_path else []
+        print('成功获取截图函数的返回值')
+        self.debugBrowserMovie.append('成功获取截图函数的返回值')
+        if screenshot_success:
+            pictures = response + pictures
+            self.debugBrowserMovie.append(f'成功获取截图：{str(pictures)}')
+            # 判断是否需要上传图床
+            if auto_upload_screenshot and len(pictures) > 0:
+                picture_bed_path = get_settings('picture_bed_api_url')  # 图床地址
+                picture_bed_token = get_settings('picture_bed_api_token')  # 图床Token
+                print(f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
+                self.debugBrowserMovie.append(
+                    f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床')
+                self.pictureUrlBrowserMovie.setText('')
+                if len(pictures) > 0:
+                    if do_get_thumbnail and len(pictures) == 1:
+                        self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[0], False, True)
+                    else:
+                        self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[0], False, False)
+                    self.upload_picture_thread0.result_signal.connect(
+                        self.handle_upload_picture_movie_result)  # 连接信号
+                    self.upload_picture_thread0.start()  # 启动线程
+                    print('启动线程0')
+                if len(pictures) > 1:
+                    if do_get_thumbnail and len(pictures) == 2:
+                        self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[1], False, True)
+                    else:
+                        self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[1], False, False)
+                    self.upload_picture_thread1.result_signal.connect(
+                        self.handle_upload_picture_movie_result)  # 连接信号
+                    self.upload_picture_thread1.start()  # 启动线程
+                    print('启动线程1')
+                if len(pictures) > 2:
+                    if do_get_thumbnail and len(pictures) == 3:
+                        self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[2], False, True)
+                    else:
+                        self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[2], False, False)
+                    self.upload_picture_thread2.result_signal.connect(
+                        self.handle_upload_picture_movie_result)  # 连接信号
+                    self.upload_picture_thread2.start()  # 启动线程
+                    print('启动线程2')
+                if len(pictures) > 3:
+                    if do_get_thumbnail and len(pictures) == 4:
+                        self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[3], False, True)
+                    else:
+                        self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[3], False, False)
+                    self.upload_picture_thread3.result_signal.connect(
+                        self.handle_upload_picture_movie_result)  # 连接信号
+                    self.upload_picture_thread3.start()  # 启动线程
+                    print('启动线程3')
+                if len(pictures) > 4:
+                    if do_get_thumbnail and len(pictures) == 5:
+                        self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[4], False, True)
+                    else:
+                        self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[4], False, False)
+                    self.upload_picture_thread4.result_signal.connect(
+                        self.handle_upload_picture_movie_result)  # 连接信号
+                    self.upload_picture_thread4.start()  # 启动线程
+                    print('启动线程4')
+                if len(pictures) > 5:
+                    if do_get_thumbnail and len(pictures) == 6:
+                        self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[5], False, True)
+                    else:
+                        self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[5], False, False)
+                    self.upload_picture_thread5.result_signal.connect(
+                        self.handle_upload_picture_movie_result)  # 连接信号
+                    self.upload_picture_thread5.start()  # 启动线程
+                    print('启动线程5')
+                print('上传图床线程全部启动')
+                self.debugBrowserMovie.append('上传图床线程启动，请耐心等待图床Api的响应...')
+            else:
+                self.debugBrowserMovie.append('未选择自动上传图床功能，图片已储存在本地')
+                output = ''
+                for picture in pictures:
+                    output += picture
+                    output += '\n'
+                self.pictureUrlBrowserMovie.setText(output)
+        else:
+            self.debugBrowserMovie.append(f'截图失败：{response[0]}')
+
     def handle_upload_picture_movie_result(self, upload_success, api_response, screenshot_path):
         # 这个函数用于处理上传的结果，它将在主线程中被调用
         # 更新UI，显示上传结果等
@@ -783,6 +821,11 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             return False, [f'启动PtGen线程成功，但是重命名出错：{e}']
 
     def make_torrent_button_movie_clicked(self):
+        if self.make_torrent_thread is not None and self.make_torrent_thread.isRunning():
+            # 正在制作种子时再次点击按钮即取消
+            self.make_torrent_thread.cancel()
+            self.debugBrowserMovie.append('正在取消制作种子...')
+            return
         self.torrent_url = ''
         path = self.videoPathMovie.text().replace('file:///', '')
         is_video_path, response = check_path_and_find_video(path)  # 视频资源的路径
@@ -791,6 +834,7 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             self.debugBrowserMovie.append(f'开始将"{path}"制作种子，储存在"{torrent_storage_path}"')
             self.make_torrent_thread = MakeTorrentThread(path, torrent_storage_path)
             self.make_torrent_thread.result_signal.connect(self.handle_make_torrent_movie_result)  # 连接信号
+            self.make_torrent_thread.progress_signal.connect(self.debugBrowserMovie.append)
             self.make_torrent_thread.start()  # 启动线程
             self.debugBrowserMovie.append('制作种子线程启动成功，正在后台制作种子，请耐心等待种子制作完毕...')
         else:
@@ -910,6 +954,11 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             self.debugBrowserTV.append(f'未成功获取到任何PT-Gen信息{response}')
 
     def get_picture_button_tv_clicked(self):
+        if self.get_picture_thread is not None and self.get_picture_thread.isRunning():
+            # 正在截图时再次点击按钮即取消
+            self.get_picture_thread.cancel()
+            self.debugBrowserTV.append('正在取消截图...')
+            return
         self.pictureUrlBrowserTV.setText('')
         is_video_path, video_path = check_path_and_find_video(
             self.videoPathTV.text().replace('file:///', ''))  # 视频资源的路径
@@ -924,108 +973,147 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
             thumbnail_rows = int(get_settings('thumbnail_rows'))
             thumbnail_cols = int(get_settings('thumbnail_cols'))
-            auto_upload_screenshot = bool(get_settings('auto_upload_screenshot'))
-            self.debugBrowserTV.append('参数获取成功，开始执行截图函数，需要较长时间，程序会暂时无响应，请稍候...')
+            self.debugBrowserTV.append('参数获取成功，开始执行截图函数，正在后台截图，再次点击按钮可取消...')
             print('参数获取成功，开始执行截图函数')
-            pictures = []
-            screenshot_success, response = get_screenshot(video_path, screenshot_storage_path, screenshot_number,
-                                                          screenshot_threshold, screenshot_start_percentage,
-                                                          screenshot_end_percentage, screenshot_min_interval=0.01)
-            print('成功获取截图函数的返回值')
-            self.debugBrowserTV.append('成功获取截图函数的返回值')
-            if do_get_thumbnail:
-                get_thumbnail_success, thumbnail_path = get_thumbnail(video_path, screenshot_storage_path,
-                                                                      thumbnail_rows,
-                                                                      thumbnail_cols,
-                                                                      screenshot_start_percentage,
-                                                                      screenshot_end_percentage)
-                if get_thumbnail_success:
-                    pictures.append(thumbnail_path)
-            if screenshot_success:
-                pictures = response + pictures
-                self.debugBrowserTV.append(f'成功获取截图：{str(pictures)}')
-                # 判断是否需要上传图床
-                if auto_upload_screenshot and len(pictures) > 0:
-                    picture_bed_path = get_settings('picture_bed_api_url')  # 图床地址
-                    picture_bed_token = get_settings('picture_bed_api_token')  # 图床Token
-                    print(f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
-                    self.debugBrowserTV.append(
-                        f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
-                    self.pictureUrlBrowserTV.setText('')
-                    if len(pictures) > 0:
-                        if do_get_thumbnail and len(pictures) == 1:
-                            self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[0], False, True)
-                        else:
-                            self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[0], False, False)
-                        self.upload_picture_thread0.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
-                        self.upload_picture_thread0.start()  # 启动线程
-                        print('启动线程0')
-                    if len(pictures) > 1:
-                        if do_get_thumbnail and len(pictures) == 2:
-                            self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[1], False, True)
-                        else:
-                            self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[1], False, False)
-                        self.upload_picture_thread1.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
-                        self.upload_picture_thread1.start()  # 启动线程
-                        print('启动线程1')
-                    if len(pictures) > 2:
-                        if do_get_thumbnail and len(pictures) == 3:
-                            self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[2], False, True)
-                        else:
-                            self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[2], False, False)
-                        self.upload_picture_thread2.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
-                        self.upload_picture_thread2.start()  # 启动线程
-                        print('启动线程2')
-                    if len(pictures) > 3:
-                        if do_get_thumbnail and len(pictures) == 4:
-                            self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[3], False, True)
-                        else:
-                            self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[3], False, False)
-                        self.upload_picture_thread3.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
-                        self.upload_picture_thread3.start()  # 启动线程
-                        print('启动线程3')
-                    if len(pictures) > 4:
-                        if do_get_thumbnail and len(pictures) == 5:
-                            self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[4], False, True)
-                        else:
-                            self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[4], False, False)
-                        self.upload_picture_thread4.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
-                        self.upload_picture_thread4.start()  # 启动线程
-                        print('启动线程4')
-                    if len(pictures) > 5:
-                        if do_get_thumbnail and len(pictures) == 6:
-                            self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[5], False, True)
-                        else:
-                            self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[5], False, False)
-                        self.upload_picture_thread5.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
-                        self.upload_picture_thread5.start()  # 启动线程
-                        print('启动线程5')
-                    print('上传图床线程全部启动')
-                    self.debugBrowserTV.append('上传图床线程启动，请耐心等待图床Api的响应...')
-                else:
-                    self.debugBrowserTV.append('未选择自动上传图床功能，图片已储存在本地')
-                    output = ''
-                    for picture in pictures:
-                        output += picture
-                        output += '\n'
-                    self.pictureUrlBrowserTV.setText(output)
+            screenshot_workers = int(get_settings('screenshot_workers'))
+            screenshot_oversample = int(get_settings('screenshot_oversample'))
+            screenshot_format = get_settings('screenshot_format')
+            screenshot_quality = int(get_settings('screenshot_quality'))
+            screenshot_png_compression = int(get_settings('screenshot_png_compression'))
+            screenshot_tone_mapping = bool(get_settings('screenshot_tone_mapping'))
+            screenshot_backend = get_settings('screenshot_backend')
+            thumbnail_keyframe_only = bool(get_settings('thumbnail_keyframe_only'))
+            screenshot_dedup_distance = int(get_settings('screenshot_dedup_distance'))
+            screenshot_hash = get_settings('screenshot_hash')
+            screenshot_threshold_percentile = float(get_settings('screenshot_threshold_percentile'))
+            screenshot_auto_crop = bool(get_settings('screenshot_auto_crop'))
+            screenshot_options = dict(screenshot_min_interval=0.01, screenshot_workers=screenshot_workers,
+                                      screenshot_oversample=screenshot_oversample,
+                                      screenshot_format=screenshot_format,
+                                      screenshot_quality=screenshot_quality,
+                                      screenshot_png_compression=screenshot_png_compression,
+                                      tone_mapping=screenshot_tone_mapping,
+                                      screenshot_backend=screenshot_backend,
+                                      screenshot_dedup_distance=screenshot_dedup_distance,
+                                      screenshot_hash=screenshot_hash,
+                                      screenshot_threshold_percentile=screenshot_threshold_percentile,
+                                      auto_crop=screenshot_auto_crop)
+            if is_video_path == 2 and bool(get_settings('screenshot_season_sampling')):
+                # 选择的是剧集文件夹，截图分配到各集
+                self.debugBrowserTV.append('整季截图，截图将分配到各集')
+                get_screenshot_function = partial(
+                    get_season_screenshot, os.path.dirname(video_path), screenshot_storage_path, screenshot_number,
+                    screenshot_threshold, screenshot_start_percentage, screenshot_end_percentage,
+                    season_workers=int(get_settings('screenshot_season_workers')), **screenshot_options)
             else:
-                self.debugBrowserTV.append(f'截图失败{response[0]}')
+                get_screenshot_function = partial(get_screenshot, video_path, screenshot_storage_path,
+                                                  screenshot_number, screenshot_threshold,
+                                                  screenshot_start_percentage, screenshot_end_percentage,
+                                                  **screenshot_options)
+            get_thumbnail_function = None
+            if do_get_thumbnail:
+                get_thumbnail_function = partial(get_thumbnail, video_path, screenshot_storage_path, thumbnail_rows,
+                                                 thumbnail_cols, screenshot_start_percentage,
+                                                 screenshot_end_percentage, tone_mapping=screenshot_tone_mapping,
+                                                 screenshot_backend=screenshot_backend,
+                                                 keyframe_only=thumbnail_keyframe_only,
+                                                 auto_crop=screenshot_auto_crop)
+            self.get_picture_thread = GetPictureThread(get_screenshot_function, get_thumbnail_function)
+            self.get_picture_thread.result_signal.connect(self.handle_get_picture_tv_result)
+            self.get_picture_thread.progress_signal.connect(self.debugBrowserTV.append)
+            self.get_picture_thread.start()  # 启动线程
         else:
             self.debugBrowserTV.append('您的视频文件路径有误')
 
+    def handle_get_picture_tv_result(self, screenshot_success, response, thumbnail_path):
+        do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
+        auto_upload_screenshot = bool(get_settings('auto_upload_screenshot'))
+        pictures = [thumbnail_path] if thumbnail_path else []
+        print('成功获取截图函数的返回值')
+        self.debugBrowserTV.append('成功获取截图函数的返回值')
+        if screenshot_success:
+            pictures = response + pictures
+            self.debugBrowserTV.append(f'成功获取截图：{str(pictures)}')
+            # 判断是否需要上传图床
+            if auto_upload_screenshot and len(pictures) > 0:
+                picture_bed_path = get_settings('picture_bed_api_url')  # 图床地址
+                picture_bed_token = get_settings('picture_bed_api_token')  # 图床Token
+                print(f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
+                self.debugBrowserTV.append(
+                    f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
+                self.pictureUrlBrowserTV.setText('')
+                if len(pictures) > 0:
+                    if do_get_thumbnail and len(pictures) == 1:
+                        self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[0], False, True)
+                    else:
+                        self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[0], False, False)
+                    self.upload_picture_thread0.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
+                    self.upload_picture_thread0.start()  # 启动线程
+                    print('启动线程0')
+                if len(pictures) > 1:
+                    if do_get_thumbnail and len(pictures) == 2:
+                        self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[1], False, True)
+                    else:
+                        self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[1], False, False)
+                    self.upload_picture_thread1.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
+                    self.upload_picture_thread1.start()  # 启动线程
+                    print('启动线程1')
+                if len(pictures) > 2:
+                    if do_get_thumbnail and len(pictures) == 3:
+                        self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[2], False, True)
+                    else:
+                        self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[2], False, False)
+                    self.upload_picture_thread2.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
+                    self.upload_picture_thread2.start()  # 启动线程
+                    print('启动线程2')
+                if len(pictures) > 3:
+                    if do_get_thumbnail and len(pictures) == 4:
+                        self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[3], False, True)
+                    else:
+                        self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[3], False, False)
+                    self.upload_picture_thread3.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
+                    self.upload_picture_thread3.start()  # 启动线程
+                    print('启动线程3')
+                if len(pictures) > 4:
+                    if do_get_thumbnail and len(pictures) == 5:
+                        self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[4], False, True)
+                    else:
+                        self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[4], False, False)
+                    self.upload_picture_thread4.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
+                    self.upload_picture_thread4.start()  # 启动线程
+                    print('启动线程4')
+                if len(pictures) > 5:
+                    if do_get_thumbnail and len(pictures) == 6:
+                        self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[5], False, True)
+                    else:
+                        self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[5], False, False)
+                    self.upload_picture_thread5.result_signal.connect(self.handle_upload_picture_tv_result)  # 连接信号
+                    self.upload_picture_thread5.start()  # 启动线程
+                    print('启动线程5')
+                print('上传图床线程全部启动')
+                self.debugBrowserTV.append('上传图床线程启动，请耐心等待图床Api的响应...')
+            else:
+                self.debugBrowserTV.append('未选择自动上传图床功能，图片已储存在本地')
+                output = ''
+                for picture in pictures:
+                    output += picture
+                    output += '\n'
+                self.pictureUrlBrowserTV.setText(output)
+        else:
+            self.debugBrowserTV.append(f'截图失败{response[0]}')
+
     def handle_upload_picture_tv_result(self, upload_success, api_response, screenshot_path):
         # 这个函数用于处理上传的结果，它将在主线程中被调用
         # 更新UI，显示上传结果等
@@ -1422,6 +1510,11 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             return False, [f'启动PtGen线程成功，但是重命名出错：{e}']
 
     def make_torrent_button_tv_clicked(self):
+        if self.make_torrent_thread is not None and self.make_torrent_thread.isRunning():
+            # 正在制作种子时再次点击按钮即取消
+            self.make_torrent_thread.cancel()
+            self.debugBrowserTV.append('正在取消制作种子...')
+            return
         self.torrent_url = ''
         is_video_path, response = check_path_and_find_video(
             self.videoPathTV.text().replace('file:///', ''))  # 视频资源的路径
@@ -1432,6 +1525,7 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             self.debugBrowserTV.append(f'开始将"{folder_path}"制作种子，储存在"{torrent_storage_path}"')
             self.make_torrent_thread = MakeTorrentThread(folder_path, torrent_storage_path)
             self.make_torrent_thread.result_signal.connect(self.handle_make_torrent_tv_result)  # 连接信号
+            self.make_torrent_thread.progress_signal.connect(self.debugBrowserTV.append)
             self.make_torrent_thread.start()  # 启动线程
             self.debugBrowserTV.append('制作种子线程启动成功，正在后台制作种子，请耐心等待种子制作完毕...')
         else:
@@ -1533,6 +1627,11 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             self.debugBrowserPlaylet.append('封面路径为空')
 
     def get_picture_button_playlet_clicked(self):
+        if self.get_picture_thread is not None and self.get_picture_thread.isRunning():
+            # 正在截图时再次点击按钮即取消
+            self.get_picture_thread.cancel()
+            self.debugBrowserPlaylet.append('正在取消截图...')
+            return
         self.pictureUrlBrowserPlaylet.setText('')
         is_video_path, response = check_path_and_find_video(
             self.videoPathPlaylet.text().replace('file:///', ''))  # 视频资源的路径
@@ -1541,8 +1640,6 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             video_path = response
             self.debugBrowserPlaylet.append(f'获取视频{video_path}的截图')
             screenshot_storage_path = get_settings('screenshot_storage_path')  # 截图储存路径
-            picture_bed_path = get_settings('picture_bed_api_url')  # 图床地址
-            picture_bed_token = get_settings('picture_bed_api_token')  # 图床Token
             screenshot_number = int(get_settings('screenshot_number'))
             screenshot_threshold = float(get_settings('screenshot_threshold'))
             screenshot_start_percentage = float(get_settings('screenshot_start_percentage'))
@@ -1550,111 +1647,153 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
             thumbnail_rows = int(get_settings('thumbnail_rows'))
             thumbnail_cols = int(get_settings('thumbnail_cols'))
-            auto_upload_screenshot = bool(get_settings('auto_upload_screenshot'))
-            self.debugBrowserPlaylet.append('参数获取成功，开始执行截图函数，需要较长时间，程序会暂时无响应，请稍候...')
+            self.debugBrowserPlaylet.append('参数获取成功，开始执行截图函数，正在后台截图，再次点击按钮可取消...')
             print('参数获取成功，开始执行截图函数')
-            pictures = []
-            screenshot_success, response = get_screenshot(video_path, screenshot_storage_path, screenshot_number,
-                                                          screenshot_threshold, screenshot_start_percentage,
-                                                          screenshot_end_percentage, screenshot_min_interval=0.01)
-            print('成功获取截图函数的返回值')
-            self.debugBrowserPlaylet.append('成功获取截图函数的返回值')
+            screenshot_workers = int(get_settings('screenshot_workers'))
+            screenshot_oversample = int(get_settings('screenshot_oversample'))
+            screenshot_format = get_settings('screenshot_format')
+            screenshot_quality = int(get_settings('screenshot_quality'))
+            screenshot_png_compression = int(get_settings('screenshot_png_compression'))
+            screenshot_tone_mapping = bool(get_settings('screenshot_tone_mapping'))
+            screenshot_backend = get_settings('screenshot_backend')
+            thumbnail_keyframe_only = bool(get_settings('thumbnail_keyframe_only'))
+            screenshot_dedup_distance = int(get_settings('screenshot_dedup_distance'))
+            screenshot_hash = get_settings('screenshot_hash')
+            screenshot_threshold_percentile = float(get_settings('screenshot_threshold_percentile'))
+            screenshot_auto_crop = bool(get_settings('screenshot_auto_crop'))
+            screenshot_options = dict(screenshot_min_interval=0.01, screenshot_workers=screenshot_workers,
+                                      screenshot_oversample=screenshot_oversample,
+                                      screenshot_format=screenshot_format,
+                                      screenshot_quality=screenshot_quality,
+                                      screenshot_png_compression=screenshot_png_compression,
+                                      tone_mapping=screenshot_tone_mapping,
+                                      screenshot_backend=screenshot_backend,
+                                      screenshot_dedup_distance=screenshot_dedup_distance,
+                                      screenshot_hash=screenshot_hash,
+                                      screenshot_threshold_percentile=screenshot_threshold_percentile,
+                                      auto_crop=screenshot_auto_crop)
+            if is_video_path == 2 and bool(get_settings('screenshot_season_sampling')):
+                # 选择的是剧集文件夹，截图分配到各集
+                self.debugBrowserPlaylet.append('整季截图，截图将分配到各集')
+                get_screenshot_function = partial(
+                    get_season_screenshot, os.path.dirname(video_path), screenshot_storage_path, screenshot_number,
+                    screenshot_threshold, screenshot_start_percentage, screenshot_end_percentage,
+                    season_workers=int(get_settings('screenshot_season_workers')), **screenshot_options)
+            else:
+                get_screenshot_function = partial(get_screenshot, video_path, screenshot_storage_path,
+                                                  screenshot_number, screenshot_threshold,
+                                                  screenshot_start_percentage, screenshot_end_percentage,
+                                                  **screenshot_options)
+            get_thumbnail_function = None
             if do_get_thumbnail:
-                get_thumbnail_success, thumbnail_path = get_thumbnail(video_path, screenshot_storage_path,
-                                                                      thumbnail_rows,
-                                                                      thumbnail_cols, screenshot_start_percentage,
-                                                                      screenshot_end_percentage)
-                if get_thumbnail_success:
-                    pictures.append(thumbnail_path)
-            if screenshot_success:
-                pictures = response + pictures
-                self.debugBrowserPlaylet.append(f'成功获取截图：{str(pictures)}')
-                # 判断是否需要上传图床
-                if auto_upload_screenshot and len(pictures) > 0:
-                    print(f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
-                    self.debugBrowserPlaylet.append(
-                        f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
-                    self.pictureUrlBrowserPlaylet.setText('')
-                    if len(pictures) > 0:
-                        if do_get_thumbnail and len(pictures) == 1:
-                            self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[0], False, True)
-                        else:
-                            self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[0], False, False)
-                        self.upload_picture_thread0.result_signal.connect(
-                            self.handle_upload_picture_playlet_result)  # 连接信号
-                        self.upload_picture_thread0.start()  # 启动线程
-                        print('启动线程0')
-                    if len(pictures) > 1:
-                        if do_get_thumbnail and len(pictures) == 2:
-                            self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[1], False, True)
-                        else:
-                            self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[1], False, False)
-                        self.upload_picture_thread1.result_signal.connect(
-                            self.handle_upload_picture_playlet_result)  # 连接信号
-                        self.upload_picture_thread1.start()  # 启动线程
-                        print('启动线程1')
-                    if len(pictures) > 2:
-                        if do_get_thumbnail and len(pictures) == 3:
-                            self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[2], False, True)
-                        else:
-                            self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[2], False, False)
-                        self.upload_picture_thread2.result_signal.connect(
-                            self.handle_upload_picture_playlet_result)  # 连接信号
-                        self.upload_picture_thread2.start()  # 启动线程
-                        print('启动线程2')
-                    if len(pictures) > 3:
-                        if do_get_thumbnail and len(pictures) == 4:
-                            self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[3], False, True)
-                        else:
-                            self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[3], False, False)
-                        self.upload_picture_thread3.result_signal.connect(
-                            self.handle_upload_picture_playlet_result)  # 连接信号
-                        self.upload_picture_thread3.start()  # 启动线程
-                        print('启动线程3')
-                    if len(pictures) > 4:
-                        if do_get_thumbnail and len(pictures) == 5:
-                            self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[4], False, True)
-                        else:
-                            self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[4], False, False)
-                        self.upload_picture_thread4.result_signal.connect(
-                            self.handle_upload_picture_playlet_result)  # 连接信号
-                        self.upload_picture_thread4.start()  # 启动线程
-                        print('启动线程4')
-                    if len(pictures) > 5:
-                        if do_get_thumbnail and len(pictures) == 6:
-                            self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[5], False, True)
-                        else:
-                            self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
-                                                                              pictures[5], False, False)
-                        self.upload_picture_thread5.result_signal.connect(
-                            self.handle_upload_picture_playlet_result)  # 连接信号
-                        self.upload_picture_thread5.start()  # 启动线程
-                        print('启动线程5')
-                    print('上传图床线程全部启动')
-                    self.debugBrowserPlaylet.append('上传图床线程启动，请耐心等待图床Api的响应...')
+                get_thumbnail_function = partial(get_thumbnail, video_path, screenshot_storage_path, thumbnail_rows,
+                                                 thumbnail_cols, screenshot_start_percentage,
+                                                 screenshot_end_percentage, tone_mapping=screenshot_tone_mapping,
+                                                 screenshot_backend=screenshot_backend,
+                                                 keyframe_only=thumbnail_keyframe_only,
+                                                 auto_crop=screenshot_auto_crop)
+            self.get_picture_thread = GetPictureThread(get_screenshot_function, get_thumbnail_function)
+            self.get_picture_thread.result_signal.connect(self.handle_get_picture_playlet_result)
+            self.get_picture_thread.progress_signal.connect(self.debugBrowserPlaylet.append)
+            self.get_picture_thread.start()  # 启动线程
+        else:
+            self.debugBrowserPlaylet.append(f'您的视频文件路径有误：{response}')
+
+    def handle_get_picture_playlet_result(self, screenshot_success, response, thumbnail_path):
+        do_get_thumbnail = bool(get_settings('do_get_thumbnail'))
+        auto_upload_screenshot = bool(get_settings('auto_upload_screenshot'))
+        picture_bed_path = get_settings('picture_bed_api_url')  # 图床地址
+        picture_bed_token = get_settings('picture_bed_api_token')  # 图床Token
+        pictures = [thumbnail_path] if thumbnail_path else []
+        print('成功获取截图函数的返回值')
+        self.debugBrowserPlaylet.append('成功获取截图函数的返回值')
+        if screenshot_success:
+            pictures = response + pictures
+            self.debugBrowserPlaylet.append(f'成功获取截图：{str(pictures)}')
+            # 判断是否需要上传图床
+            if auto_upload_screenshot and len(pictures) > 0:
+                print(f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
+                self.debugBrowserPlaylet.append(
+                    f'图床参数获取成功，图床地址是：{picture_bed_path}，开始自动上传截图到图床。')
+                self.pictureUrlBrowserPlaylet.setText('')
+                if len(pictures) > 0:
+                    if do_get_thumbnail and len(pictures) == 1:
+                        self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[0], False, True)
+                    else:
+                        self.upload_picture_thread0 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[0], False, False)
+                    self.upload_picture_thread0.result_signal.connect(
+                        self.handle_upload_picture_playlet_result)  # 连接信号
+                    self.upload_picture_thread0.start()  # 启动线程
+                    print('启动线程0')
+                if len(pictures) > 1:
+                    if do_get_thumbnail and len(pictures) == 2:
+                        self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[1], False, True)
+                    else:
+                        self.upload_picture_thread1 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[1], False, False)
+                    self.upload_picture_thread1.result_signal.connect(
+                        self.handle_upload_picture_playlet_result)  # 连接信号
+                    self.upload_picture_thread1.start()  # 启动线程
+                    print('启动线程1')
+                if len(pictures) > 2:
+                    if do_get_thumbnail and len(pictures) == 3:
+                        self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[2], False, True)
+                    else:
+                        self.upload_picture_thread2 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[2], False, False)
+                    self.upload_picture_thread2.result_signal.connect(
+                        self.handle_upload_picture_playlet_result)  # 连接信号
+                    self.upload_picture_thread2.start()  # 启动线程
+                    print('启动线程2')
+                if len(pictures) > 3:
+                    if do_get_thumbnail and len(pictures) == 4:
+                        self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[3], False, True)
+                    else:
+                        self.upload_picture_thread3 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[3], False, False)
+                    self.upload_picture_thread3.result_signal.connect(
+                        self.handle_upload_picture_playlet_result)  # 连接信号
+                    self.upload_picture_thread3.start()  # 启动线程
+                    print('启动线程3')
+                if len(pictures) > 4:
+                    if do_get_thumbnail and len(pictures) == 5:
+                        self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[4], False, True)
+                    else:
+                        self.upload_picture_thread4 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[4], False, False)
+                    self.upload_picture_thread4.result_signal.connect(
+                        self.handle_upload_picture_playlet_result)  # 连接信号
+                    self.upload_picture_thread4.start()  # 启动线程
+                    print('启动线程4')
+                if len(pictures) > 5:
+                    if do_get_thumbnail and len(pictures) == 6:
+                        self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[5], False, True)
+                    else:
+                        self.upload_picture_thread5 = UploadPictureThread(picture_bed_path, picture_bed_token,
+                                                                          pictures[5], False, False)
+                    self.upload_picture_thread5.result_signal.connect(
+                        self.handle_upload_picture_playlet_result)  # 连接信号
+                    self.upload_picture_thread5.start()  # 启动线程
+                    print('启动线程5')
+                print('上传图床线程全部启动')
+                self.debugBrowserPlaylet.append('上传图床线程启动，请耐心等待图床Api的响应...')
 
-                else:
-                    self.debugBrowserPlaylet.append('未选择自动上传图床功能，图片已储存在本地')
-                    screenshot_path = ''
-                    for r in pictures:
-                        screenshot_path += r
-                        screenshot_path += '\n'
-                    self.pictureUrlBrowserMovie.setText(screenshot_path)
             else:
-                self.debugBrowserPlaylet.append(f'截图失败{response[0]}')
+                self.debugBrowserPlaylet.append('未选择自动上传图床功能，图片已储存在本地')
+                screenshot_path = ''
+                for r in pictures:
+                    screenshot_path += r
+                    screenshot_path += '\n'
+                self.pictureUrlBrowserMovie.setText(screenshot_path)
         else:
-            self.debugBrowserPlaylet.append(f'您的视频文件路径有误：{response}')
+            self.debugBrowserPlaylet.append(f'截图失败{response[0]}')
 
     def handle_upload_picture_playlet_result(self, upload_success, api_response, screenshot_path, is_cover):
         # 这个函数用于处理上传的结果，它将在主线程中被调用
@@ -1934,6 +2073,11 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             return False, [f'获取命名出错：{e}']
 
     def make_torrent_button_playlet_clicked(self):
+        if self.make_torrent_thread is not None and self.make_torrent_thread.isRunning():
+            # 正在制作种子时再次点击按钮即取消
+            self.make_torrent_thread.cancel()
+            self.debugBrowserPlaylet.append('正在取消制作种子...')
+            return
         self.torrent_url = ''
         is_video_path, response = check_path_and_find_video(
             self.videoPathPlaylet.text().replace('file:///', ''))  # 视频资源的路径
@@ -1944,6 +2088,7 @@ class mainwindow(QMainWindow, Ui_Mainwindow):
             self.debugBrowserPlaylet.append(f'开始将{folder_path}制作种子，储存在{torrent_storage_path}')
             self.make_torrent_thread = MakeTorrentThread(folder_path, torrent_storage_path)
             self.make_torrent_thread.result_signal.connect(self.handle_make_torrent_result_playlet)  # 连接信号
+            self.make_torrent_thread.progress_signal.connect(self.debugBrowserPlaylet.append)
             self.make_torrent_thread.start()  # 启动线程
             self.debugBrowserPlaylet.append('制作种子线程启动成功，正在后台制作种子，请耐心等待种子制作完毕...')
         else:
@@ -2038,12 +2183,18 @@ class settings(QDialog, Ui_Settings):
         self.pictureBedApiToken.setText(get_settings('picture_bed_api_token'))
         self.screenshotNumber.setValue(int(get_settings('screenshot_number')))
         self.screenshotThreshold.setValue(float(get_settings('screenshot_threshold')))
+        self.screenshotThresholdPercentile.setValue(float(get_settings('screenshot_threshold_percentile')))
+        self.screenshotDedupDistance.setValue(int(get_settings('screenshot_dedup_distance')))
         self.screenshotStartPercentage.setValue(float(get_settings('screenshot_start_percentage')))
         self.screenshotEndPercentage.setValue(float(get_settings('screenshot_end_percentage')))
         self.doGetThumbnail.setChecked(bool(get_settings('do_get_thumbnail')))
         self.thumbnailRows.setValue(int(get_settings('thumbnail_rows')))
         self.thumbnailCols.setValue(int(get_settings('thumbnail_cols')))
         self.thumbnailDelay.setValue(float(get_settings('thumbnail_delay')))
+        self.screenshotToneMapping.setChecked(bool(get_settings('screenshot_tone_mapping')))
+        self.thumbnailKeyframeOnly.setChecked(bool(get_settings('thumbnail_keyframe_only')))
+        self.screenshotAutoCrop.setChecked(bool(get_settings('screenshot_auto_crop')))
+        self.screenshotSeasonSampling.setChecked(bool(get_settings('screenshot_season_sampling')))
         self.autoUploadScreenshot.setChecked(bool(get_settings('auto_upload_screenshot')))
         self.pasteScreenshotUrl.setChecked(bool(get_settings('paste_screenshot_url')))
         self.deleteScreenshot.setChecked(bool(get_settings('delete_screenshot')))
@@ -2076,6 +2227,8 @@ class settings(QDialog, Ui_Settings):
         update_settings('picture_bed_api_token', self.pictureBedApiToken.text())
         update_settings('screenshot_number', str(self.screenshotNumber.text()))
         update_settings('screenshot_threshold', str(self.screenshotThreshold.text()))
+        update_settings('screenshot_threshold_percentile', str(self.screenshotThresholdPercentile.text()))
+        update_settings('screenshot_dedup_distance', str(self.screenshotDedupDistance.text()))
         update_settings('screenshot_start_percentage', str(self.screenshotStartPercentage.text()))
         update_settings('screenshot_end_percentage', str(self.screenshotEndPercentage.text()))
         if self.doGetThumbnail.isChecked():
@@ -2085,6 +2238,22 @@ class settings(QDialog, Ui_Settings):
         update_settings('thumbnail_rows', str(self.thumbnailRows.text()))
         update_settings('thumbnail_cols', str(self.thumbnailCols.text()))
         update_settings('thumbnail_delay', str(self.thumbnailDelay.text()))
+        if self.screenshotToneMapping.isChecked():
+            update_settings('screenshot_tone_mapping', 'True')
+        else:
+            update_settings('screenshot_tone_mapping', '')
+        if self.thumbnailKeyframeOnly.isChecked():
+            update_settings('thumbnail_keyframe_only', 'True')
+        else:
+            update_settings('thumbnail_keyframe_only', '')
+        if self.screenshotAutoCrop.isChecked():
+            update_settings('screenshot_auto_crop', 'True')
+        else:
+            update_settings('screenshot_auto_crop', '')
+        if self.screenshotSeasonSampling.isChecked():
+            update_settings('screenshot_season_sampling', 'True')
+        else:
+            update_settings('screenshot_season_sampling', '')
         if self.autoUploadScreenshot.isChecked():
             update_settings('auto_upload_screenshot', 'True')
         else:
@@ -2199,16 +2368,30 @@ class UploadPictureThread(QThread):
 class MakeTorrentThread(QThread):
     # 创建一个信号，用于在数据处理完毕后与主线程通信
     result_signal = pyqtSignal(bool, str)
+    # 制作进度，每完成约10%发送一次
+    progress_signal = pyqtSignal(str)
 
     def __init__(self, path, torrent_storage_path):
         super().__init__()
         self.path = path
         self.torrent_storage_path = torrent_storage_path
+        self.job = Job(callback=self.report_progress)
+        self.reported_percent = 0
+
+    def report_progress(self, job):
+        if job.total > 0:
+            percent = job.done * 100 // job.total // 10 * 10
+            if percent > self.reported_percent:
+                self.reported_percent = percent
+                self.progress_signal.emit(f'{job.stage}：{percent}%')
+
+    def cancel(self):
+        self.job.cancel()
 
     def run(self):
         try:
             # 这里放置耗时的制作torrent操作
-            make_torrent_success, response = make_torrent(self.path, self.torrent_storage_path)
+            make_torrent_success, response = make_torrent(self.path, self.torrent_storage_path, job=self.job)
 
             # 发送信号
             print('Torrent请求成功，开始等待返回结果')
@@ -2219,6 +2402,49 @@ class MakeTorrentThread(QThread):
             # 这里可以发射一个包含错误信息的信号
 
 
+class GetPictureThread(QThread):
+    # 创建一个信号，用于在截图完毕后与主线程通信：(截图是否成功, 截图路径或错误信息, 缩略图路径（未生成时为空）)
+    result_signal = pyqtSignal(bool, list, str)
+    # 截图进度，每个阶段开始时和每完成约10%发送一次
+    progress_signal = pyqtSignal(str)
+
+    def __init__(self, get_screenshot_function, get_thumbnail_function=None):
+        super().__init__()
+        # 两个函数都只缺少job参数，截图和缩略图共用同一个Job，取消时一起停止
+        self.get_screenshot_function = get_screenshot_function
+        self.get_thumbnail_function = get_thumbnail_function
+        self.job = Job(callback=self.report_progress)
+        self.reported_stage = ''
+        self.reported_percent = 0
+
+    def report_progress(self, job):
+        if job.stage != self.reported_stage:
+            self.reported_stage = job.stage
+            self.reported_percent = 0
+            self.progress_signal.emit(f'{job.stage}：共{job.total}{job.unit}')
+        elif job.total > 0:
+            percent = job.done * 100 // job.total // 10 * 10
+            if percent > self.reported_percent:
+                self.reported_percent = percent
+                self.progress_signal.emit(f'{job.stage}：{percent}%')
+
+    def cancel(self):
+        self.job.cancel()
+
+    def run(self):
+        try:
+            screenshot_success, response = self.get_screenshot_function(job=self.job)
+            thumbnail_path = ''
+            if self.get_thumbnail_function is not None and not self.job.cancelled:
+                get_thumbnail_success, thumbnail = self.get_thumbnail_function(job=self.job)
+                if get_thumbnail_success:
+                    thumbnail_path = thumbnail
+            self.result_signal.emit(screenshot_success, response, thumbnail_path)
+        except Exception as e:
+            print(f'异常发生：{e}')
+            self.result_signal.emit(False, [f'异常发生：{e}'], '')
+
+
 class WaitForRenameThread(QThread):
     # 创建一个信号，用于在数据处理完毕后与主线程通信
     result_signal = pyqtSignal(bool)
@@ -207,6 +207,24 @@ class Ui_Settings(object):
         self.screenshotThreshold.setProperty("value", 0.1)
         self.screenshotThreshold.setObjectName("screenshotThreshold")
         self.horizontalLayout_7.addWidget(self.screenshotThreshold)
+        self.label_34 = QtWidgets.QLabel(parent=self.tab)
+        self.label_34.setObjectName("label_34")
+        self.horizontalLayout_7.addWidget(self.label_34)
+        self.screenshotThresholdPercentile = QtWidgets.QDoubleSpinBox(parent=self.tab)
+        self.screenshotThresholdPercentile.setDecimals(0)
+        self.screenshotThresholdPercentile.setMaximum(100.0)
+        self.screenshotThresholdPercentile.setSingleStep(5.0)
+        self.screenshotThresholdPercentile.setProperty("value", 0.0)
+        self.screenshotThresholdPercentile.setObjectName("screenshotThresholdPercentile")
+        self.horizontalLayout_7.addWidget(self.screenshotThresholdPercentile)
+        self.label_35 = QtWidgets.QLabel(parent=self.tab)
+        self.label_35.setObjectName("label_35")
+        self.horizontalLayout_7.addWidget(self.label_35)
+        self.screenshotDedupDistance = QtWidgets.QSpinBox(parent=self.tab)
+        self.screenshotDedupDistance.setMaximum(64)
+        self.screenshotDedupDistance.setProperty("value", 0)
+        self.screenshotDedupDistance.setObjectName("screenshotDedupDistance")
+        self.horizontalLayout_7.addWidget(self.screenshotDedupDistance)
         self.verticalLayout.addLayout(self.horizontalLayout_7)
         self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_8.setContentsMargins(5, 5, 5, 5)
@@ -287,6 +305,22 @@ class Ui_Settings(object):
         self.thumbnailDelay.setObjectName("thumbnailDelay")
         self.horizontalLayout_11.addWidget(self.thumbnailDelay)
         self.verticalLayout.addLayout(self.horizontalLayout_11)
+        self.horizontalLayout_30 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_30.setContentsMargins(5, 5, 5, 5)
+        self.horizontalLayout_30.setObjectName("horizontalLayout_30")
+        self.screenshotToneMapping = QtWidgets.QCheckBox(parent=self.tab)
+        self.screenshotToneMapping.setObjectName("screenshotToneMapping")
+        self.horizontalLayout_30.addWidget(self.screenshotToneMapping)
+        self.thumbnailKeyframeOnly = QtWidgets.QCheckBox(parent=self.tab)
+        self.thumbnailKeyframeOnly.setObjectName("thumbnailKeyframeOnly")
+        self.horizontalLayout_30.addWidget(self.thumbnailKeyframeOnly)
+        self.screenshotAutoCrop = QtWidgets.QCheckBox(parent=self.tab)
+        self.screenshotAutoCrop.setObjectName("screenshotAutoCrop")
+        self.horizontalLayout_30.addWidget(self.screenshotAutoCrop)
+        self.screenshotSeasonSampling = QtWidgets.QCheckBox(parent=self.tab)
+        self.screenshotSeasonSampling.setObjectName("screenshotSeasonSampling")
+        self.horizontalLayout_30.addWidget(self.screenshotSeasonSampling)
+        self.verticalLayout.addLayout(self.horizontalLayout_30)
         self.horizontalLayout_10 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_10.setContentsMargins(5, 5, 5, 5)
         self.horizontalLayout_10.setObjectName("horizontalLayout_10")
@@ -1044,6 +1078,8 @@ class Ui_Settings(object):
 "    background-color: #3c6f1b;\n"
 "}\n"
 ""))
+        self.label_34.setText(_translate("Settings", "复杂度百分位(大于0时忽略上一项):"))
+        self.label_35.setText(_translate("Settings", "去重距离(0为不去重):"))
         self.label_4.setStyleSheet(_translate("Settings", "QPushButton {\n"
 "    display: inline-block;\n"
 "    padding: 5px 5px;\n"
@@ -1376,6 +1412,10 @@ class Ui_Settings(object):
 "    background-color: #3c6f1b;\n"
 "}\n"
 ""))
+        self.screenshotToneMapping.setText(_translate("Settings", "HDR截图转为SDR"))
+        self.thumbnailKeyframeOnly.setText(_translate("Settings", "缩略图快速模式（仅关键帧）"))
+        self.screenshotAutoCrop.setText(_translate("Settings", "自动裁剪黑边"))
+        self.screenshotSeasonSampling.setText(_translate("Settings", "剧集文件夹截图分配到各集"))
         self.label_10.setStyleSheet(_translate("Settings", "QPushButton {\n"
 "    display: inline-block;\n"
 "    padding: 5px 5px;\n"
@@ -7,6 +7,8 @@ under certain conditions; type `show c' for details.
 The licensing of this program is under the GNU General Public License version 3 (GPLv3) or later.
 For more information on this license, you can visit https://www.gnu.org/licenses/gpl-3.0.html
 """
+from multiprocessing import freeze_support
+
 from src.api.startapi import start_api
 """
 项目仓库地址：https://github.com/bjdbjd/publish-helper
@@ -16,4 +18,5 @@ from src.api.startapi import start_api
 # 作者：bjdbjd ID：bjd
 # 贡献者：Pixel-LH、EasonWong0603、sertion1126、TommyMerlin
 if __name__ == '__main__':
+    freeze_support()  # 打包后的程序使用多进程截图时需要
     start_api()  # API启动
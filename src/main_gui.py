@@ -7,6 +7,8 @@ under certain conditions; type `show c' for details.
 The licensing of this program is under the GNU General Public License version 3 (GPLv3) or later.
 For more information on this license, you can visit https://www.gnu.org/licenses/gpl-3.0.html
 """
+from multiprocessing import freeze_support
+
 from src.gui.startgui import start_gui
 """
 打包编译方式(Windows)：安装Python 3.10，执行pip install pyinstaller，安装“docs/requirements.txt”中的所有相关模块后，在项目根目录（README文件所在目录）下执行下面的代码：
@@ -32,4 +34,5 @@ copy readme.txt dist\
 # 作者：bjdbjd ID：bjd
 # 贡献者：Pixel-LH、EasonWong0603、sertion1126、TommyMerlin
 if __name__ == '__main__':
+    freeze_support()  # 打包后的程序使用多进程截图时需要
     start_gui()  # GUI启动
@@ -0,0 +1,105 @@
+"""Benchmark the MediaInfo text renderer on files with many audio/subtitle tracks and chapters.
+
+Run from the repository root:
+
+    PYTHONPATH=. python tests/benchmark_mediainfo.py [audio_tracks] [subtitle_tracks] [chapters]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from pymediainfo import MediaInfo
+
+from src.core import mediainfo
+from src.core.mediainfo import render_media_info
+
+
+def write_sample(directory, audio_tracks=8, subtitle_tracks=16, chapters=40):
+    """Mux a short mkv with the requested number of audio and subtitle tracks and a chapter menu."""
+    subtitle = os.path.join(directory, "sample.srt")
+    with open(subtitle, "w", encoding="utf-8") as file:
+        file.write("1\n00:00:00,000 --> 00:00:01,000\nSample\n")
+    metadata = os.path.join(directory, "chapters.txt")
+    with open(metadata, "w", encoding="utf-8") as file:
+        file.write(";FFMETADATA1\ntitle=Sample\n")
+        for index in range(chapters):
+            file.write(f"[CHAPTER]\nTIMEBASE=1/1000\nSTART={index * 50}\nEND={index * 50 + 50}\n"
+                       f"title=Chapter {index + 1:02}\n")
+    path = os.path.join(directory, "sample.mkv")
+    command = ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=duration=2:size=320x180:rate=24"]
+    for index in range(audio_tracks):
+        command += ["-f", "lavfi", "-i", f"sine=frequency={220 + index * 110}:duration=2"]
+    command += ["-i", subtitle] * subtitle_tracks + ["-i", metadata]
+    for index in range(1 + audio_tracks + subtitle_tracks):
+        command += ["-map", str(index)]
+    command += ["-map_metadata", str(1 + audio_tracks + subtitle_tracks),
+                "-map_chapters", str(1 + audio_tracks + subtitle_tracks),
+                "-c:v", "mpeg4", "-c:a", "aac", "-c:s", "srt"]
+    for index in range(audio_tracks):
+        command += [f"-metadata:s:a:{index}", f"title=Audio {index + 1}", f"-metadata:s:a:{index}", "language=eng"]
+    for index in range(subtitle_tracks):
+        command += [f"-metadata:s:s:{index}", f"title=Subtitle {index + 1}", f"-metadata:s:s:{index}", "language=chi"]
+    subprocess.run(command + [path], check=True)
+    return path
+
+
+def render_via_json(media_info):
+    """The previous renderer: a JSON round trip, field lists rebuilt per track and string concatenation."""
+    output = ""
+    audio_count, text_count = 1, 1
+    data = json.loads(media_info.to_json())
+    tables = {"General": mediainfo.MEDIA_INFO_GENERAL_FIELDS, "Video": mediainfo.MEDIA_INFO_VIDEO_FIELDS,
+              "Audio": mediainfo.MEDIA_INFO_AUDIO_FIELDS, "Text": mediainfo.MEDIA_INFO_TEXT_FIELDS}
+    for track in data["tracks"]:
+        track_type = track["track_type"]
+        if track_type == "General":
+            output += "General\n"
+        elif track_type == "Video":
+            output += "\nVideo\n"
+        elif track_type == "Audio":
+            output += f"\nAudio #{audio_count}\n"
+            audio_count += 1
+        elif track_type == "Text":
+            output += f"\nText #{text_count}\n"
+            text_count += 1
+        elif track_type == "Menu":
+            output += "\nMenu\n"
+            for key, value in track.items():
+                match = mediainfo.MEDIA_INFO_CHAPTER_PATTERN.match(key)
+                if match:
+                    hours, minutes, seconds_millis = match.groups()
+                    seconds, millis = divmod(int(seconds_millis), 1000)
+                    output += f'{f"{hours}:{minutes}:{seconds:02}.{millis:03}":36}: {value}\n'
+            continue
+        else:
+            continue
+        for key, label in list(tables[track_type]):
+            value = track[key][0] if isinstance(track.get(key), list) else track.get(key)
+            if value is not None:
+                if key == "complete_name":
+                    value = os.path.basename(value)
+                elif mediainfo.MEDIA_INFO_SKIPPED_VALUES.get(key) == value:
+                    continue
+                output += f"{label:36}: {value}\n"
+    return output
+
+
+def main(audio_tracks=8, subtitle_tracks=16, chapters=40, number=200):
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_sample(directory, audio_tracks, subtitle_tracks, chapters)
+        media_info = MediaInfo.parse(path)
+        assert render_media_info(media_info) == render_via_json(media_info)
+        print(f"{len(media_info.tracks)} tracks, {chapters} chapters, "
+              f"{len(render_media_info(media_info))} characters")
+        before = min(timeit.repeat(lambda: render_via_json(media_info), number=number, repeat=5)) / number
+        after = min(timeit.repeat(lambda: render_media_info(media_info), number=number, repeat=5)) / number
+        print(f"JSON round trip: {before * 1e6:.1f} us, field tables: {after * 1e6:.1f} us, "
+              f"{before / after:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
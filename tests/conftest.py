@@ -0,0 +1,13 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+from src.core import media_info_cache
+
+
+@pytest.fixture(autouse=True)
+def media_info_cache_path(tmp_path, monkeypatch):
+    """Keep the MediaInfo parse cache of each test in its own temporary directory instead of temp/."""
+    path = str(tmp_path / "media_info_cache.sqlite3")
+    monkeypatch.setattr(media_info_cache, "MEDIA_INFO_CACHE_PATH", path)
+    return path
@@ -0,0 +1,111 @@
+"""Test source-vs-encode comparison screenshots."""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import comparison
+from src.core.comparison import (
+    comparison_timestamps,
+    format_comparisons,
+    get_comparison,
+    pts_to_frame_number,
+    side_by_side,
+)
+
+
+def write_video(path, size, frames=48):
+    """Write a video whose frame brightness encodes the frame number."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, size)
+    for index in range(frames):
+        writer.write(np.full((size[1], size[0], 3), index * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def videos(tmp_path):
+    """Write a source and a smaller encode of the same frames."""
+    return (write_video(str(tmp_path / "source.avi"), (160, 90)),
+            write_video(str(tmp_path / "encode.avi"), (96, 54)))
+
+
+def decode(image):
+    """Decode an in-memory image."""
+    return cv2.imdecode(np.frombuffer(image[1], np.uint8), cv2.IMREAD_COLOR)
+
+
+class TestAlignment:
+    """Test PTS based frame alignment."""
+
+    def test_timestamps_stay_in_overlap(self):
+        """Test that timestamps are spread over the overlapping range only."""
+        assert comparison_timestamps((0, 10), (2, 12), 2, 0, 1) == [4.0, 8.0]
+        assert comparison_timestamps((0, 10), (10, 20), 2, 0, 1) == []
+
+    def test_frame_numbers_follow_start_time(self):
+        """Test that a later start time and an offset shift the frame number and stay in range."""
+        assert pts_to_frame_number(12.0, 24, 0.0, 1000) == 288
+        assert pts_to_frame_number(12.0, 24, 10.0, 1000) == 48
+        assert pts_to_frame_number(12.0, 24, 10.0, 1000, offset=-2) == 46
+        assert pts_to_frame_number(100.0, 24, 0.0, 1000) == 999
+
+    def test_side_by_side_keeps_aspect_ratio(self):
+        """Test that an encode with a different aspect ratio is scaled to the source height without stretching."""
+        source = np.zeros((90, 160, 3), dtype=np.uint8)
+        encode = np.zeros((60, 80, 3), dtype=np.uint8)
+        encode[:, :40] = 255
+        image = side_by_side(source, encode)
+        assert image.shape == (90, 160 + 120, 3)
+        # The white-to-black edge stays in the middle of the encode half
+        assert image[80, 160 + 55].min() == 255 and image[80, 160 + 65].max() == 0
+
+    def test_format_comparisons(self):
+        """Test that uploaded BBCode is unwrapped into one row per pair."""
+        assert format_comparisons(["[img]https://a/1.png[/img]", "https://a/2.png"]) == \
+               "[comparison=Source, Encode]\nhttps://a/1.png https://a/2.png\n[/comparison]"
+
+
+class TestGetComparison:
+    """Test the comparison generator end to end."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_pairs_show_the_same_frame(self, videos, tmp_path, workers):
+        """Test that each pair holds the same frame at each file's own size."""
+        success, images = get_comparison(videos[0], videos[1], str(tmp_path), 3, 0.1, 0.9,
+                                         comparison_workers=workers, in_memory=True)
+        assert success
+        assert len(images) == 6
+        for source_image, encode_image in zip(images[::2], images[1::2]):
+            source_frame, encode_frame = decode(source_image), decode(encode_image)
+            assert source_frame.shape == (90, 160, 3)
+            assert encode_frame.shape == (54, 96, 3)
+            assert abs(float(source_frame.mean()) - float(encode_frame.mean())) < 3
+
+    def test_keyframe_index_read_once(self, videos, tmp_path, monkeypatch):
+        """Test that each file's keyframe index is read once in the parent, not again in every worker."""
+        calls = tmp_path / "calls.txt"
+
+        def get_keyframe_index(video_path):
+            # Appends to a file so that calls made in forked workers are counted as well
+            with open(calls, "a", encoding="utf-8") as file:
+                file.write(video_path + "\n")
+            return None
+
+        monkeypatch.setattr(comparison, "get_keyframe_index", get_keyframe_index)
+        assert get_comparison(videos[0], videos[1], str(tmp_path), 4, 0.1, 0.9, comparison_workers=4,
+                              in_memory=True)[0]
+        assert sorted(calls.read_text(encoding="utf-8").split()) == sorted(videos)
+
+    def test_side_by_side(self, videos, tmp_path):
+        """Test that the encode is scaled to the source and placed on the right."""
+        success, images = get_comparison(videos[0], videos[1], str(tmp_path), 2, 0.1, 0.9,
+                                         comparison_mode="side_by_side", comparison_workers=1)
+        assert success
+        assert len(images) == 2
+        assert cv2.imread(images[0]).shape == (90, 320, 3)
+
+    def test_unknown_mode(self, videos, tmp_path):
+        """Test that an unknown mode is rejected before decoding."""
+        assert get_comparison(videos[0], videos[1], str(tmp_path), 2, 0.1, 0.9, comparison_mode="grid") == \
+               (False, ["不支持的对比模式：grid"])
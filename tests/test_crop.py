@@ -0,0 +1,90 @@
+"""Test letterbox detection and cropping."""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.crop import apply_crop, detect_crop, luma_profiles, scale_crop
+from src.core.screenshot import get_screenshot, get_thumbnail
+
+
+def letterboxed_frame(rng, height=180, width=320, top=30, bottom=30, left=0, right=0):
+    """Return a noisy frame surrounded by near-black bars."""
+    frame = np.full((height, width, 3), 16, dtype=np.uint8)
+    frame[top:height - bottom, left:width - right] = rng.integers(40, 256, (height - top - bottom,
+                                                                         width - left - right, 3), dtype=np.uint8)
+    return frame
+
+
+@pytest.fixture
+def letterboxed_video(tmp_path):
+    """Write a short 16:9 video with a scope picture inside black bars."""
+    path = str(tmp_path / "scope.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (320, 180))
+    rng = np.random.default_rng(0)
+    for _ in range(96):
+        writer.write(letterboxed_frame(rng))
+    writer.release()
+    return path
+
+
+class TestDetectCrop:
+    """Test the row and column luma analysis."""
+
+    def test_profiles_match_grey_means(self):
+        """Test that the profiles agree with the means of the grey image."""
+        frame = np.random.default_rng(0).integers(0, 256, (90, 160, 3), dtype=np.uint8)
+        rows, columns = luma_profiles(frame, step=1)
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float64)
+        assert np.allclose(rows, grey.mean(axis=1), atol=1)
+        assert np.allclose(columns, grey.mean(axis=0), atol=1)
+
+    def test_letterbox_and_pillarbox(self):
+        """Test that bars on either axis are found and aligned to even pixels."""
+        rng = np.random.default_rng(0)
+        assert detect_crop([letterboxed_frame(rng)]) == (0, 30, 320, 120)
+        assert detect_crop([letterboxed_frame(rng, top=0, bottom=0, left=41, right=39)]) == (42, 0, 238, 180)
+
+    def test_dark_scene_does_not_shrink_crop(self):
+        """Test that a frame which is dark near the bars does not tighten the crop."""
+        rng = np.random.default_rng(0)
+        dark = letterboxed_frame(rng)
+        dark[30:60] = 16
+        assert detect_crop([dark, letterboxed_frame(rng)]) == (0, 30, 320, 120)
+
+    def test_no_crop(self):
+        """Test that full frames, thin edges and all-black samples are left alone."""
+        rng = np.random.default_rng(0)
+        assert detect_crop([letterboxed_frame(rng, top=0, bottom=0)]) is None
+        assert detect_crop([letterboxed_frame(rng, top=1, bottom=0)]) is None
+        assert detect_crop([np.full((180, 320, 3), 16, dtype=np.uint8)]) is None
+        assert detect_crop([]) is None
+
+    def test_scale_and_apply(self):
+        """Test that a crop is scaled to a thumbnail tile and applied as a view."""
+        tile_crop = scale_crop((0, 30, 320, 120), 0.5, 0.5, 160, 90)
+        assert tile_crop == (0, 15, 160, 60)
+        tile = np.zeros((90, 160, 3), dtype=np.uint8)
+        assert apply_crop(tile, tile_crop).shape == (60, 160, 3)
+        assert apply_crop(tile, None) is tile
+
+
+class TestAutoCrop:
+    """Test that screenshots and thumbnails are cropped."""
+
+    def test_screenshots_are_cropped(self, letterboxed_video, tmp_path):
+        """Test that every screenshot holds only the active picture."""
+        success, images = get_screenshot(letterboxed_video, str(tmp_path), 2, 0, 0.1, 0.9, screenshot_seed=1,
+                                         in_memory=True, auto_crop=True)
+        assert success
+        for _, data in images:
+            assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == (120, 320, 3)
+
+    @pytest.mark.parametrize("keyframe_only", [False, True])
+    def test_thumbnail_tiles_are_cropped(self, letterboxed_video, tmp_path, keyframe_only):
+        """Test that thumbnail tiles are sized from the cropped picture."""
+        success, (_, data) = get_thumbnail(letterboxed_video, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True,
+                                           keyframe_only=keyframe_only, auto_crop=True)
+        assert success
+        # 2x2 tiles of 160x60 with a 5 pixel border around each
+        assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == (140, 340, 3)
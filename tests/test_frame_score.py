@@ -0,0 +1,74 @@
+"""Test frame complexity scoring module."""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.frame_score import HISTOGRAM_BINS, decimate_luma, hamming_distances, perceptual_hashes, score_frames
+
+
+class TestFrameScore:
+    """Test batch frame scoring."""
+
+    def test_decimate_luma(self):
+        """Test that frames are decimated to roughly the scoring height."""
+        frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+        luma = decimate_luma(frame)
+        assert luma.ndim == 2
+        assert luma.shape == (270, 480)
+
+    def test_flat_frame_scores_zero(self):
+        """Test that a uniform frame has no complexity."""
+        frame = np.full((360, 640, 3), 128, dtype=np.uint8)
+        scores = score_frames([frame])
+        assert scores["std"][0] == 0
+        assert scores["edge_density"][0] == 0
+        assert scores["entropy"][0] == 0
+        assert scores["complexity"][0] == 0
+
+    def test_batch_scores_match_single(self):
+        """Test that batch scoring gives the same metrics as scoring one by one."""
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (360, 640, 3), dtype=np.uint8) for _ in range(3)]
+        batch = score_frames(frames)
+        for i, frame in enumerate(frames):
+            single = score_frames([frame])
+            for key in batch:
+                assert np.isclose(batch[key][i], single[key][0])
+
+    def test_noise_is_more_complex_than_gradient(self):
+        """Test that detailed frames outrank smooth ones."""
+        rng = np.random.default_rng(0)
+        noise = rng.integers(0, 256, (360, 640, 3), dtype=np.uint8)
+        gradient = np.tile(np.linspace(0, 255, 640, dtype=np.uint8), (360, 1))
+        gradient = np.dstack([gradient] * 3)
+        scores = score_frames([noise, gradient])
+        assert scores["complexity"][0] > scores["complexity"][1]
+        assert scores["entropy"][0] <= np.log2(HISTOGRAM_BINS) + 1e-9
+
+    def test_empty_batch(self):
+        """Test that an empty batch returns empty metrics."""
+        scores = score_frames([])
+        assert all(len(values) == 0 for values in scores.values())
+
+
+class TestPerceptualHash:
+    """Test perceptual hashing of luma planes."""
+
+    @pytest.mark.parametrize("method", ["dhash", "phash"])
+    def test_near_duplicates_are_close(self, method):
+        """Test that a slightly brightened frame hashes close to the original and a new scene does not."""
+        rng = np.random.default_rng(0)
+        scene = cv2.GaussianBlur(rng.integers(0, 256, (270, 480), dtype=np.uint8), (15, 15), 5)
+        brighter = cv2.add(scene, 4)
+        other = cv2.GaussianBlur(rng.integers(0, 256, (270, 480), dtype=np.uint8), (15, 15), 5)
+        distances = hamming_distances(perceptual_hashes([scene, brighter, other], method))
+        assert distances.shape == (3, 3)
+        assert (np.diag(distances) == 0).all()
+        assert distances[0, 1] <= 4
+        assert distances[0, 2] > 16
+
+    def test_unknown_method(self):
+        """Test that an unknown hash method is refused."""
+        with pytest.raises(ValueError):
+            perceptual_hashes([np.zeros((8, 9), dtype=np.uint8)], "ahash")
@@ -0,0 +1,88 @@
+"""Test cancellable, progress-reporting jobs."""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.job import Job, JobCancelled, create_job, get_job
+from src.core.screenshot import get_screenshot, get_thumbnail
+from src.core.tool import make_torrent
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a short test video."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (160, 90))
+    rng = np.random.default_rng(0)
+    for _ in range(48):
+        writer.write(rng.integers(0, 256, (90, 160, 3), dtype=np.uint8))
+    writer.release()
+    return path
+
+
+class TestJob:
+    """Test progress, cancellation and the job registry."""
+
+    def test_progress_and_finish(self):
+        """Test that stages reset progress and every step reaches the callback."""
+        events = []
+        job = Job(callback=lambda j: events.append((j.stage, j.done, j.total)))
+        job.begin("读取候选帧", 2)
+        job.advance()
+        job.advance()
+        job.begin("保存截图", 1)
+        job.update(1)
+        job.finish(True)
+        assert events == [("读取候选帧", 0, 2), ("读取候选帧", 1, 2), ("读取候选帧", 2, 2),
+                          ("保存截图", 0, 1), ("保存截图", 1, 1)]
+        assert job.as_dict()["status"] == "finished"
+
+    def test_cancel_stops_at_next_check(self):
+        """Test that a cancelled job raises on its next step and is recorded as cancelled."""
+        job = Job()
+        job.begin("制作种子", 10, "字节")
+        job.cancel()
+        with pytest.raises(JobCancelled):
+            job.advance()
+        job.finish(True)
+        assert job.status == "cancelled"
+
+    def test_registry(self):
+        """Test that created jobs can be looked up by id and that ids are generated when missing."""
+        job = create_job("abc")
+        assert get_job("abc") is job
+        assert create_job("abc") is not job
+        assert get_job(create_job().id) is not None
+        assert get_job("missing") is None
+
+
+class TestJobIntegration:
+    """Test jobs threaded through screenshots, thumbnails and torrents."""
+
+    def test_screenshot_reports_progress(self, video_path, tmp_path):
+        """Test that screenshots report each stage and end with all frames done."""
+        stages = {}
+        job = Job(callback=lambda j: stages.__setitem__(j.stage, (j.done, j.total)))
+        assert get_screenshot(video_path, str(tmp_path), 2, 0, 0.1, 0.9, screenshot_seed=1, in_memory=True,
+                              job=job)[0]
+        assert stages["读取候选帧"][0] == stages["读取候选帧"][1] > 0
+        assert stages["保存截图"] == (2, 2)
+
+    def test_cancelled_job_stops_work(self, video_path, tmp_path):
+        """Test that a cancelled job makes each task fail with the cancellation message."""
+        job = Job()
+        job.cancel()
+        assert get_screenshot(video_path, str(tmp_path), 2, 0, 0.1, 0.9, in_memory=True,
+                              job=job) == (False, ["截图出错：任务已取消"])
+        assert get_thumbnail(video_path, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True,
+                             job=job) == (False, "任务已取消")
+        assert make_torrent(video_path, str(tmp_path), job=job) == (False, "任务已取消")
+
+    def test_torrent_reports_bytes(self, video_path, tmp_path):
+        """Test that torrent creation reports hashed bytes up to the total size."""
+        job = Job()
+        success, torrent_path = make_torrent(video_path, str(tmp_path / "torrents"), job=job)
+        assert success
+        assert job.unit == "字节"
+        assert job.done == job.total > 0
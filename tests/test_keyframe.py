@@ -0,0 +1,207 @@
+"""Test keyframe index module."""
+
+import io
+import struct
+
+from src.core.keyframe import (
+    KeyframeSeeker,
+    build_keyframe_index,
+    is_sampled_keyframe_index,
+    read_mkv_cues,
+    read_mp4_sync_samples,
+    scan_ts_random_access_points,
+)
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _build_mp4(sync_samples, stts_entries, timescale=24000, with_mdhd=True):
+    hdlr = _box(b"hdlr", b"\x00" * 8 + b"vide" + b"\x00" * 12)
+    mdhd = _box(b"mdhd", b"\x00" * 12 + struct.pack(">I", timescale) + b"\x00" * 8) if with_mdhd else b""
+    stss = _box(
+        b"stss",
+        b"\x00" * 4
+        + struct.pack(">I", len(sync_samples))
+        + struct.pack(f">{len(sync_samples)}I", *sync_samples),
+    )
+    flat = [value for entry in stts_entries for value in entry]
+    stts = _box(
+        b"stts",
+        b"\x00" * 4
+        + struct.pack(">I", len(stts_entries))
+        + struct.pack(f">{len(flat)}I", *flat),
+    )
+    stbl = _box(b"stbl", stts + stss)
+    minf = _box(b"minf", stbl)
+    mdia = _box(b"mdia", mdhd + hdlr + minf)
+    moov = _box(b"moov", _box(b"trak", mdia))
+    return io.BytesIO(_box(b"ftyp", b"isom") + moov)
+
+
+def _ebml(element_id, payload):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + bytes([0x01]) + (len(payload) | (1 << 56)).to_bytes(8, "big")[1:] + payload
+
+
+def _ebml_uint(element_id, value):
+    return _ebml(element_id, value.to_bytes(4, "big"))
+
+
+def _build_mkv(cue_times):
+    """Build a Matroska file with a millisecond timestamp scale, one video track and one cue per time."""
+    info = _ebml(0x1549A966, _ebml_uint(0x2AD7B1, 1000000))
+    tracks = _ebml(0x1654AE6B, _ebml(0xAE, _ebml_uint(0xD7, 1) + _ebml_uint(0x83, 1)))
+    cues = _ebml(0x1C53BB6B, b"".join(
+        _ebml(0xBB, _ebml_uint(0xB3, time) + _ebml(0xB7, _ebml_uint(0xF7, 1))) for time in cue_times))
+    return _ebml(0x1A45DFA3, b"") + _ebml(0x18538067, info + tracks + cues)
+
+
+def _ts_packet(pid, pts, random_access):
+    pes = b"\x00\x00\x01\xe0\x00\x00\x80\x80\x05" + bytes(
+        [
+            0x21 | ((pts >> 29) & 0x0E),
+            (pts >> 22) & 0xFF,
+            ((pts >> 14) & 0xFE) | 0x01,
+            (pts >> 7) & 0xFF,
+            ((pts << 1) & 0xFE) | 0x01,
+        ]
+    )
+    adaptation = bytes([1, 0x40 if random_access else 0x00])
+    header = bytes([0x47, 0x40 | (pid >> 8), pid & 0xFF, 0x30])
+    packet = header + adaptation + pes
+    return packet + b"\xff" * (188 - len(packet))
+
+
+class TestKeyframeIndex:
+    """Test container keyframe index readers."""
+
+    def test_mp4_sync_samples(self):
+        """Test that stss sample numbers are converted to seconds via stts."""
+        file = _build_mp4([1, 49, 97], [(96, 1000), (48, 500)])
+        assert read_mp4_sync_samples(file) == [0.0, 2.0, 4.0]
+
+    def test_mp4_without_mdhd(self):
+        """Test that a video track without a media header yields no index instead of raising."""
+        assert read_mp4_sync_samples(_build_mp4([1, 49], [(96, 1000)], with_mdhd=False)) is None
+
+    def test_mkv_cues(self):
+        """Test that cue times of the video track are converted to seconds."""
+        assert read_mkv_cues(io.BytesIO(_build_mkv([0, 2000, 4500]))) == [0.0, 2.0, 4.5]
+
+    def test_truncated_mkv_cues(self):
+        """Test that a cue point cut off by the end of the file is dropped and the complete ones are kept."""
+        data = _build_mkv([0, 2000, 4500])
+        assert read_mkv_cues(io.BytesIO(data[:-5])) == [0.0, 2.0]
+
+    def test_unexpected_error_falls_back(self, tmp_path, monkeypatch):
+        """Test that any error while reading the index is reported as a missing index rather than raised."""
+        path = tmp_path / "broken.mp4"
+        path.write_bytes(_build_mp4([1], [(24, 1000)]).getvalue())
+
+        def broken_reader(file):
+            raise TypeError("malformed box")
+
+        monkeypatch.setattr("src.core.keyframe.read_mp4_sync_samples", broken_reader)
+        assert build_keyframe_index(str(path)) is None
+
+    def test_ts_random_access_points(self):
+        """Test that random access PES packets are collected relative to the first PTS."""
+        packets = [
+            _ts_packet(0x100, 90000, True),
+            _ts_packet(0x100, 90000 + 3003, False),
+            _ts_packet(0x100, 90000 + 180000, True),
+        ]
+        data = b"".join(packets)
+        index = scan_ts_random_access_points(io.BytesIO(data), len(data))
+        assert index == [0.0, 2.0]
+
+
+class TestKeyframeSeeker:
+    """Test keyframe snapping."""
+
+    def test_snap_to_nearest_keyframe(self):
+        """Test that targets move to the preroll point after the nearest keyframe."""
+        seeker = KeyframeSeeker(None, [0.0, 2.0, 4.0], 24)
+        assert seeker.snap(60) == 48 + 16
+        assert seeker.snap(100) == 96 + 16
+
+    def test_snap_respects_range(self):
+        """Test that snapped targets stay within the requested range."""
+        seeker = KeyframeSeeker(None, [0.0, 2.0, 4.0], 24)
+        assert seeker.snap(70, lower=65) == 112
+        assert seeker.snap(70, lower=65, upper=100) == 70
+
+    def test_snap_all_avoids_duplicates(self):
+        """Test that targets snapping onto the same keyframe keep their own position."""
+        seeker = KeyframeSeeker(None, [0.0, 2.0], 24)
+        assert seeker.snap_all([60, 62]) == [64, 62]
+
+
+class _RecordingCapture:
+    """Minimal capture that records seeks and grabs."""
+
+    def __init__(self):
+        self.position = 0
+        self.seeks = []
+        self.grabs = 0
+
+    def set(self, prop, value):
+        self.position = value
+        self.seeks.append(value)
+        return True
+
+    def grab(self):
+        self.position += 1
+        self.grabs += 1
+        return True
+
+    def read(self):
+        self.position += 1
+        return True, None
+
+
+class TestKeyframeSeekerRead:
+    """Test the grab-versus-seek decision."""
+
+    def test_dense_targets_read_sequentially(self):
+        """Test that targets closer than a seek are reached by grabbing forward."""
+        capture = _RecordingCapture()
+        seeker = KeyframeSeeker(capture, [0.0, 10.0], 24)
+        for frame_number in (20, 40, 60, 80):
+            seeker.read(frame_number)
+        assert capture.seeks == [20]
+        assert capture.grabs == 80 - 20 - 3
+
+    def test_sparse_targets_seek(self):
+        """Test that targets near a keyframe far ahead are reached by seeking."""
+        capture = _RecordingCapture()
+        seeker = KeyframeSeeker(capture, [0.0, 10.0, 20.0], 24)
+        seeker.read(20)
+        seeker.read(240 + 16)
+        seeker.read(480 + 16)
+        assert capture.seeks == [20, 256, 496]
+        assert capture.grabs == 0
+
+    def test_sampled_index_caps_grab_cost(self):
+        """Test that a sparse sampled index does not make an unsnapped target look cheaper to grab than seek."""
+        capture = _RecordingCapture()
+        seeker = KeyframeSeeker(capture, [0.0, 600.0], 24, sampled=True)
+        seeker.read(100)
+        seeker.read(3000)
+        assert capture.seeks == [100, 3000]
+        assert capture.grabs == 0
+        complete = KeyframeSeeker(_RecordingCapture(), [0.0, 600.0], 24)
+        assert complete.seek_cost(3000) > seeker.seek_cost(3000)
+
+    def test_sampled_index_detection(self, tmp_path):
+        """Test that only transport streams larger than the scanned windows have a sampled index."""
+        small = tmp_path / "small.m2ts"
+        small.write_bytes(b"\x00" * 188)
+        assert not is_sampled_keyframe_index(str(small))
+        large = tmp_path / "large.ts"
+        with open(large, "wb") as file:
+            file.truncate(128 * 256 * 1024 + 1)
+        assert is_sampled_keyframe_index(str(large))
+        assert not is_sampled_keyframe_index(str(tmp_path / "clip.mkv"))
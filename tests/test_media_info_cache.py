@@ -0,0 +1,83 @@
+"""Test the persistent MediaInfo parse cache."""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+from pymediainfo import MediaInfo
+
+from src.core import media_info_cache
+from src.core.media_info_cache import MediaInfoCache
+from src.core.mediainfo import get_media_info
+from src.core.rename import get_video_info
+
+
+def write_video(path, frames=24):
+    """Write a short test video."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (160, 90))
+    for index in range(frames):
+        writer.write(np.full((90, 160, 3), index, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """Count the real MediaInfo.parse calls made by the cache."""
+    calls = []
+    parse = MediaInfo.parse
+
+    def counting_parse(filename, **kwargs):
+        calls.append(filename)
+        return parse(filename, **kwargs)
+
+    monkeypatch.setattr(media_info_cache.MediaInfo, "parse", counting_parse)
+    return calls
+
+
+class TestMediaInfoCache:
+    """Test hits, invalidation, bypass and eviction."""
+
+    def test_hit_returns_same_tracks(self, tmp_path, parse_calls):
+        """Test that a second lookup is served from sqlite with identical track data."""
+        video_path = write_video(str(tmp_path / "clip.avi"))
+        cache = MediaInfoCache(str(tmp_path / "cache.sqlite3"))
+        first = cache.parse(video_path)
+        second = cache.parse(video_path)
+        assert len(parse_calls) == 1
+        assert second.to_data() == first.to_data()
+        assert second.video_tracks[0].width == 160
+
+    def test_changed_file_and_bypass_reparse(self, tmp_path, parse_calls):
+        """Test that a rewritten file misses and that bypass always parses again."""
+        video_path = write_video(str(tmp_path / "clip.avi"))
+        cache = MediaInfoCache(str(tmp_path / "cache.sqlite3"))
+        cache.parse(video_path)
+        write_video(video_path, frames=48)
+        os.utime(video_path, ns=(0, 10 ** 9))
+        assert int(cache.parse(video_path).video_tracks[0].frame_count) == 48
+        cache.parse(video_path, bypass=True)
+        assert len(parse_calls) == 3
+
+    def test_eviction_and_disabled(self, tmp_path, parse_calls):
+        """Test that the least recently used entry is dropped and that a size of 0 disables caching."""
+        paths = [write_video(str(tmp_path / f"clip{i}.avi")) for i in range(3)]
+        cache = MediaInfoCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+        for path in paths:
+            cache.parse(path)
+        assert cache.get(paths[0]) is None
+        assert cache.get(paths[2]) is not None
+        disabled = MediaInfoCache(str(tmp_path / "disabled.sqlite3"), max_entries=0)
+        disabled.parse(paths[0])
+        assert disabled.get(paths[0]) is None
+
+    def test_callers_share_cache(self, tmp_path, parse_calls, monkeypatch):
+        """Test that get_media_info and get_video_info parse the file only once between them."""
+        monkeypatch.setattr(media_info_cache, "MEDIA_INFO_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+        video_path = write_video(str(tmp_path / "clip.avi"))
+        assert get_media_info(video_path)[0]
+        assert get_video_info(video_path)[0]
+        assert len(parse_calls) == 1
+        assert get_video_info(video_path, use_cache=False)[0]
+        assert len(parse_calls) == 2
@@ -0,0 +1,89 @@
+"""Test the MediaInfo text report and the fused media analysis."""
+
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+from pymediainfo import MediaInfo
+
+from src.core import media_info_cache
+from src.core.mediainfo import analyze_media, get_media_info, render_media_info
+from src.core.rename import get_video_info
+from tests.benchmark_mediainfo import render_via_json, write_sample
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a short test video."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (160, 90))
+    for index in range(24):
+        writer.write(np.full((90, 160, 3), index, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+class TestRenderMediaInfo:
+    """Test the table-driven report renderer."""
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+    def test_matches_json_renderer(self, tmp_path):
+        """Test that many audio/subtitle tracks and a chapter menu render exactly as the JSON round trip did."""
+        path = write_sample(str(tmp_path), audio_tracks=3, subtitle_tracks=4, chapters=12)
+        media_info = MediaInfo.parse(path)
+        report = render_media_info(media_info)
+        assert report == render_via_json(media_info)
+        assert "Audio #3\n" in report and "Text #4\n" in report
+        assert f"{'00:00:00.550':36}: Chapter 12\n" in report
+
+    def test_complete_name_and_suffix(self, video_path, monkeypatch):
+        """Test that only the file name is shown and the suffix follows the setting."""
+        media_info = MediaInfo.parse(video_path)
+        monkeypatch.setattr("src.core.mediainfo.get_settings", lambda key: "")
+        success, report = get_media_info(video_path, media_info)
+        assert success
+        assert report == render_media_info(media_info)
+        assert report.startswith("General\n")
+        assert f"{'Complete name':36}: clip.avi\n" in report
+
+    def test_complete_name_from_parsed_file(self, video_path, tmp_path, monkeypatch):
+        """Test that the file name comes from the parsed file, not from the path passed in."""
+        link = tmp_path / "link.avi"
+        link.symlink_to(video_path)
+        monkeypatch.setattr("src.core.mediainfo.get_settings", lambda key: "")
+        success, report = get_media_info(str(link), MediaInfo.parse(video_path))
+        assert success
+        assert f"{'Complete name':36}: clip.avi\n" in report
+
+
+class TestAnalyzeMedia:
+    """Test that one parse yields the report, the video info and typed fields."""
+
+    def test_matches_separate_calls(self, video_path, tmp_path, monkeypatch):
+        """Test that the three results equal the existing functions and the file is parsed once."""
+        monkeypatch.setattr(media_info_cache, "MEDIA_INFO_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+        calls = []
+        parse = MediaInfo.parse
+        monkeypatch.setattr(media_info_cache.MediaInfo, "parse",
+                            lambda filename, **kwargs: calls.append(filename) or parse(filename, **kwargs))
+        success, analysis = analyze_media(video_path, use_cache=False)
+        assert success
+        assert len(calls) == 1
+        media_info = MediaInfo.parse(video_path)
+        assert analysis["media_info"] == get_media_info(video_path, media_info)[1]
+        assert analysis["video_info"] == get_video_info(video_path, media_info)[1]
+
+    def test_fields_are_typed(self, video_path):
+        """Test that numeric fields are converted and missing fields are None."""
+        success, analysis = analyze_media(video_path, MediaInfo.parse(video_path))
+        assert success
+        video = analysis["fields"]["video"][0]
+        assert (video["width"], video["height"], video["frame_rate"]) == (160, 90, 24.0)
+        assert video["hdr_format"] is None
+        assert isinstance(analysis["fields"]["general"]["file_size"], int)
+        assert analysis["fields"]["audio"] == []
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing path is reported without parsing."""
+        assert analyze_media(str(tmp_path / "missing.mkv")) == (False, "视频文件路径不存在")
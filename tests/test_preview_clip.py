@@ -0,0 +1,80 @@
+"""Test animated preview clips."""
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.job import Job
+from src.core.preview_clip import decimate_indices, drop_duplicate_frames, get_preview_clip
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a short video that holds each picture for two frames."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (320, 180))
+    rng = np.random.default_rng(0)
+    for _ in range(48):
+        frame = rng.integers(0, 256, (180, 320, 3), dtype=np.uint8)
+        writer.write(frame)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class TestDecimation:
+    """Test frame rate decimation and duplicate merging."""
+
+    def test_indices_keep_total_duration(self):
+        """Test that a non-integer rate ratio spreads frames evenly and keeps the segment length."""
+        indices, durations = decimate_indices(24, 24, 10)
+        assert indices.tolist() == [0, 2, 4, 7, 9, 12, 14, 16, 19, 21]
+        assert durations.sum() == pytest.approx(1000)
+        assert decimate_indices(5, 24, 30)[0].tolist() == [0, 1, 2, 3, 4]
+
+    def test_duplicates_are_merged(self):
+        """Test that repeated frames are dropped and their time moves to the kept frame."""
+        clip = np.stack([np.full((4, 4, 3), value, dtype=np.uint8) for value in (0, 0, 100, 100, 100, 0)])
+        frames, durations = drop_duplicate_frames(clip, np.full(6, 50.0))
+        assert [int(frame[0, 0, 0]) for frame in frames] == [0, 100, 0]
+        assert durations.tolist() == [100.0, 150.0, 50.0]
+
+
+class TestGetPreviewClip:
+    """Test the preview generator end to end."""
+
+    @pytest.mark.parametrize("backend", ["opencv", "ffmpeg"])
+    def test_animated_webp(self, video_path, tmp_path, backend):
+        """Test that the clip is decimated, downscaled and loops as an animated WebP."""
+        success, preview_path = get_preview_clip(video_path, str(tmp_path), 0.25, 2.0, 6, 160,
+                                                 screenshot_backend=backend)
+        assert success
+        with Image.open(preview_path) as image:
+            assert image.format == "WEBP"
+            assert image.size == (160, 90)
+            assert image.n_frames == 12
+
+    def test_byte_budget(self, video_path, tmp_path):
+        """Test that an output over budget is re-encoded smaller or rejected."""
+        success, unlimited = get_preview_clip(video_path, str(tmp_path), preview_max_bytes=0, in_memory=True)
+        assert success
+        success, (name, data) = get_preview_clip(video_path, str(tmp_path), preview_max_bytes=len(unlimited[1]) // 2,
+                                                 in_memory=True)
+        assert success
+        assert name.endswith(".webp")
+        assert len(data) <= len(unlimited[1]) // 2
+        success, message = get_preview_clip(video_path, str(tmp_path), preview_max_bytes=100, in_memory=True)
+        assert not success
+        assert message.startswith("预览超出大小限制")
+
+    def test_gif_and_errors(self, video_path, tmp_path):
+        """Test the GIF output, an unknown format and cancellation."""
+        success, (name, _) = get_preview_clip(video_path, str(tmp_path), preview_format="GIF", in_memory=True)
+        assert success
+        assert name.endswith(".gif")
+        assert get_preview_clip(video_path, str(tmp_path), preview_format="apng") == \
+               (False, "不支持的预览格式：apng")
+        job = Job()
+        job.cancel()
+        assert get_preview_clip(video_path, str(tmp_path), job=job) == (False, "生成预览出错：任务已取消")
@@ -0,0 +1,94 @@
+"""Test screenshot result cache."""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.core.result_cache import ResultCache, make_cache_key
+
+
+def put_entries(cache_path, prefix, count):
+    """Write count entries from a separate process."""
+    cache = ResultCache(cache_path)
+    for index in range(count):
+        cache.put(f"{prefix}{index}", [("a.png", b"data")])
+        cache.get(f"{prefix}0")
+
+
+class TestMakeCacheKey:
+    """Test cache keys."""
+
+    def test_key_depends_on_parameters(self, tmp_path):
+        """Test that different parameters give different keys."""
+        video = tmp_path / "video.mkv"
+        video.write_bytes(b"video")
+        assert make_cache_key("screenshot", str(video), [3, 1]) == make_cache_key("screenshot", str(video), [3, 1])
+        assert make_cache_key("screenshot", str(video), [3, 1]) != make_cache_key("screenshot", str(video), [3, 2])
+        assert make_cache_key("screenshot", str(video), [3]) != make_cache_key("thumbnail", str(video), [3])
+
+    def test_key_changes_when_file_changes(self, tmp_path):
+        """Test that modifying the file invalidates the key."""
+        video = tmp_path / "video.mkv"
+        video.write_bytes(b"video")
+        before = make_cache_key("screenshot", str(video), [])
+        video.write_bytes(b"another video")
+        assert make_cache_key("screenshot", str(video), []) != before
+
+
+class TestResultCache:
+    """Test storing and evicting cached images."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that cached images are copied out under fresh names or returned as bytes."""
+        cache = ResultCache(str(tmp_path / "cache"))
+        source = tmp_path / "a.png"
+        source.write_bytes(b"png data")
+        cache.put("key", [str(source), ("b.jpg", b"jpg data")])
+
+        output = tmp_path / "out"
+        output.mkdir()
+        paths = cache.get("key", str(output))
+        assert [os.path.splitext(path)[1] for path in paths] == [".png", ".jpg"]
+        assert [open(path, "rb").read() for path in paths] == [b"png data", b"jpg data"]
+
+        images = cache.get("key")
+        assert [data for _, data in images] == [b"png data", b"jpg data"]
+        assert cache.get("missing") is None
+
+    def test_info_round_trip(self, tmp_path):
+        """Test that the info stored with the images is returned on a hit."""
+        cache = ResultCache(str(tmp_path / "cache"))
+        cache.put("key", [("a.png", b"png data")], {"crop": [0, 20, 160, 50]})
+        images, info = cache.get("key", with_info=True)
+        assert [data for _, data in images] == [b"png data"]
+        assert info == {"crop": [0, 20, 160, 50]}
+        assert cache.get("missing", with_info=True) is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the oldest unused entry is dropped once the size bound is exceeded."""
+        cache = ResultCache(str(tmp_path / "cache"), max_bytes=20)
+        cache.put("first", [("a.png", b"x" * 8)])
+        cache.put("second", [("a.png", b"x" * 8)])
+        assert cache.get("first") is not None
+        cache.put("third", [("a.png", b"x" * 8)])
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("third") is not None
+        assert not (tmp_path / "cache" / "second").exists()
+
+    def test_disabled(self, tmp_path):
+        """Test that a zero size bound disables the cache."""
+        cache = ResultCache(str(tmp_path / "cache"), max_bytes=0)
+        cache.put("key", [("a.png", b"data")])
+        assert cache.get("key") is None
+
+    def test_concurrent_processes_keep_every_entry(self, tmp_path):
+        """Test that processes writing the same cache do not overwrite each other's index updates."""
+        cache_path = str(tmp_path / "cache")
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            for future in [executor.submit(put_entries, cache_path, prefix, 20) for prefix in "abcd"]:
+                future.result()
+        with open(os.path.join(cache_path, "index.json"), encoding="utf-8") as file:
+            assert len(json.load(file)) == 80
+        assert sorted(os.listdir(cache_path)) == sorted(["index.json", "index.lock"] +
+                                                        [f"{prefix}{index}" for prefix in "abcd" for index in range(20)])
@@ -0,0 +1,415 @@
+"""Test screenshot selection helpers."""
+
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import screenshot
+from src.core.job import Job, JobCancelled
+from src.core.result_cache import ResultCache
+from src.core.screenshot import (
+    adaptive_threshold,
+    detect_rejected_frames,
+    distribute_screenshots,
+    encode_image,
+    get_screenshot,
+    get_season_screenshot,
+    get_thumbnail,
+    open_frame_source,
+    parse_output_specs,
+    run_ffmpeg,
+    sample_candidate_frames,
+    select_best_frames,
+    split_bmp_stream,
+)
+from src.core.video_session import VideoSession
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a short textured test video."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 24, (160, 90))
+    rng = np.random.default_rng(0)
+    for _ in range(96):
+        writer.write(rng.integers(0, 256, (90, 160, 3), dtype=np.uint8))
+    writer.release()
+    return path
+
+
+class TestCandidateSampling:
+    """Test stratified candidate sampling."""
+
+    def test_seed_is_reproducible(self):
+        """Test that the same seed yields the same candidates."""
+        first = sample_candidate_frames(100, 1000, 9, seed=7)
+        second = sample_candidate_frames(100, 1000, 9, seed=7)
+        assert first == second
+
+    def test_candidates_cover_range(self):
+        """Test that each stratum contributes exactly one candidate."""
+        candidates = sample_candidate_frames(0, 900, 9, seed=1)
+        assert len(candidates) == 9
+        assert candidates == sorted(candidates)
+        for i, frame_number in enumerate(candidates):
+            assert i * 100 <= frame_number < (i + 1) * 100
+
+    def test_count_limited_by_range(self):
+        """Test that a short range yields at most one candidate per frame."""
+        assert len(sample_candidate_frames(10, 14, 9, seed=1)) == 4
+
+
+class TestSelectBestFrames:
+    """Test complexity-ranked selection."""
+
+    def test_picks_most_complex(self):
+        """Test that the highest-scoring frames win."""
+        frames = [100, 200, 300, 400]
+        complexity = [10.0, 50.0, 40.0, 60.0]
+        assert select_best_frames(frames, complexity, 2, 30.0, 0) == [200, 400]
+
+    def test_respects_min_interval(self):
+        """Test that frames too close to a chosen frame are skipped."""
+        frames = [100, 110, 300]
+        complexity = [60.0, 59.0, 40.0]
+        assert select_best_frames(frames, complexity, 2, 30.0, 50) == [100, 300]
+
+    def test_fills_below_threshold(self):
+        """Test that the best remaining frames fill in when too few pass the threshold."""
+        frames = [100, 200, 300]
+        complexity = [10.0, 50.0, 20.0]
+        assert select_best_frames(frames, complexity, 2, 30.0, 0) == [200, 300]
+
+    def test_fills_ignoring_interval(self):
+        """Test that the interval is relaxed last."""
+        frames = [100, 105]
+        complexity = [50.0, 40.0]
+        assert select_best_frames(frames, complexity, 2, 30.0, 50) == [100, 105]
+
+    def test_skips_duplicates(self):
+        """Test that a near-identical frame is only used when nothing else is left."""
+        frames = [100, 200, 300]
+        complexity = [60.0, 59.0, 40.0]
+        distances = np.array([[0, 2, 30], [2, 0, 30], [30, 30, 0]])
+        assert select_best_frames(frames, complexity, 2, 30.0, 0, None, distances, 10) == [100, 300]
+        assert select_best_frames(frames, complexity, 3, 30.0, 0, None, distances, 10) == [100, 200, 300]
+        assert select_best_frames(frames, complexity, 2, 30.0, 0, None, distances, 0) == [100, 200]
+
+
+class TestAdaptiveThreshold:
+    """Test the per-video percentile threshold."""
+
+    def test_percentile_of_candidates(self):
+        """Test that the threshold follows the candidate distribution instead of a fixed value."""
+        assert adaptive_threshold([2.0, 4.0, 6.0, 8.0, 10.0], 50) == 6.0
+        assert adaptive_threshold([20.0, 40.0, 60.0, 80.0, 100.0], 50) == 60.0
+
+    def test_rejected_frames_ignored(self):
+        """Test that blank and transition frames do not drag the threshold down."""
+        rejected = np.array([True, False, False, False])
+        assert adaptive_threshold([0.0, 10.0, 20.0, 30.0], 50, rejected) == 20.0
+        assert adaptive_threshold([0.0, 10.0], 50, np.array([True, True])) == 5.0
+        assert adaptive_threshold([], 50) == 0.0
+
+
+class TestRejectedFrames:
+    """Test black-frame and transition rejection."""
+
+    def test_blank_frames_rejected(self):
+        """Test that near-black and near-white frames are flagged."""
+        rng = np.random.default_rng(0)
+        normal = rng.integers(0, 256, (90, 160), dtype=np.uint8)
+        black = np.full((90, 160), 5, dtype=np.uint8)
+        black[43:47, 20:140] = 255  # 黑底字幕
+        white = np.full((90, 160), 250, dtype=np.uint8)
+        rejected, reasons = detect_rejected_frames([normal, black, white], [None, None, None])
+        assert rejected.tolist() == [False, True, True]
+        assert reasons == ['', '黑场', '白场']
+
+    def test_transition_rejected(self):
+        """Test that a large histogram change to the next frame marks a transition."""
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 128, (90, 160), dtype=np.uint8)
+        cut = rng.integers(128, 256, (90, 160), dtype=np.uint8)
+        rejected, reasons = detect_rejected_frames([frame, frame], [frame.copy(), cut])
+        assert rejected.tolist() == [False, True]
+        assert reasons[1] == '转场'
+
+    def test_rejected_used_last(self):
+        """Test that rejected frames are only selected when nothing else is left."""
+        frames = [100, 200, 300]
+        complexity = [90.0, 10.0, 5.0]
+        rejected = [True, False, False]
+        assert select_best_frames(frames, complexity, 2, 30.0, 0, rejected) == [200, 300]
+        assert select_best_frames(frames, complexity, 3, 30.0, 0, rejected) == [100, 200, 300]
+
+
+class TestEncodeImage:
+    """Test direct BGR encoding."""
+
+    def test_formats(self):
+        """Test that each format produces its own file signature and extension."""
+        image = np.zeros((32, 48, 3), dtype=np.uint8)
+        assert encode_image(image, "png")[0] == "png"
+        assert encode_image(image, "png")[1][:4] == b"\x89PNG"
+        assert encode_image(image, "JPEG", quality=80)[1][:2] == b"\xff\xd8"
+        extension, data = encode_image(image, "webp")
+        assert extension == "webp" and data[8:12] == b"WEBP"
+
+    def test_unsupported_format(self, tmp_path):
+        """Test that an unknown format is reported before any decoding."""
+        success, response = get_screenshot("missing.mkv", str(tmp_path), 1, 0, 0.1, 0.9, screenshot_format="bmp")
+        assert not success
+        assert "bmp" in response[0]
+
+
+class TestInMemory:
+    """Test in-memory output without temporary files."""
+
+    def test_screenshot_in_memory(self, video_path, tmp_path):
+        """Test that in-memory screenshots return encoded bytes and write nothing."""
+        output = tmp_path / "pic"
+        success, images = get_screenshot(video_path, str(output), 2, 0, 0.1, 0.9, screenshot_seed=1, in_memory=True)
+        assert success
+        assert len(images) == 2
+        for name, data in images:
+            assert name.endswith(".png")
+            assert data[:4] == b"\x89PNG"
+        assert not output.exists()
+
+    def test_thumbnail_in_memory(self, video_path, tmp_path):
+        """Test that an in-memory thumbnail decodes to the expected sheet size."""
+        output = tmp_path / "pic"
+        success, (name, data) = get_thumbnail(video_path, str(output), 2, 2, 0.1, 0.9, in_memory=True)
+        assert success
+        sheet = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        assert sheet.shape == (2 * (45 + 10), 2 * (80 + 10), 3)
+        assert not output.exists()
+
+    def test_thumbnail_grid_layout(self, video_path, tmp_path):
+        """Test that rows set the tile scale and column count, and cols set the row count."""
+        success, (name, data) = get_thumbnail(video_path, str(tmp_path), 4, 2, 0.1, 0.9, in_memory=True)
+        assert success
+        sheet = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        assert sheet.shape == (2 * (22 + 10), 4 * (40 + 10), 3)
+        assert (sheet[:5] == 255).all()
+
+    def test_thumbnail_keyframe_only(self, video_path, tmp_path):
+        """Test that the OpenCV fast mode reads the same snapped frames as the default mode."""
+        _, (_, default) = get_thumbnail(video_path, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True)
+        _, (_, fast) = get_thumbnail(video_path, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True, keyframe_only=True)
+        assert default == fast
+
+
+class TestResultCache:
+    """Test when screenshots are served from the result cache."""
+
+    def test_cached_only_with_seed(self, video_path, tmp_path, monkeypatch):
+        """Test that screenshots are cached with a seed, and picked fresh every time without one."""
+        cache = ResultCache(str(tmp_path / "cache"))
+        monkeypatch.setattr(screenshot, "get_result_cache", lambda: cache)
+        assert get_screenshot(video_path, "", 1, 0, 0.1, 0.9, in_memory=True, use_cache=True)[0]
+        assert cache._load_index() == {}
+        first = get_screenshot(video_path, "", 1, 0, 0.1, 0.9, screenshot_seed=1, in_memory=True, use_cache=True)
+        assert len(cache._load_index()) == 1
+        second = get_screenshot(video_path, "", 1, 0, 0.1, 0.9, screenshot_seed=1, in_memory=True, use_cache=True)
+        assert [data for _, data in first[1]] == [data for _, data in second[1]]
+
+
+class TestParallelScreenshot:
+    """Test the process-pool extraction path."""
+
+    def test_parallel_matches_serial(self, video_path, tmp_path):
+        """Test that several worker processes return the same frames in the same order as one process."""
+        arguments = (video_path, str(tmp_path), 4, 0, 0.1, 0.9)
+        options = {"accurate_seek": True, "screenshot_seed": 3, "in_memory": True}
+        success, serial = get_screenshot(*arguments, screenshot_workers=1, **options)
+        assert success
+        assert len(serial) == 4
+        success, parallel = get_screenshot(*arguments, screenshot_workers=3, **options)
+        assert success
+        assert [data for _, data in parallel] == [data for _, data in serial]
+
+    def test_pool_shut_down_on_error(self, video_path, tmp_path, monkeypatch):
+        """Test that the worker pool is shut down when selection fails after extraction."""
+        shutdowns = []
+
+        class RecordingPool(ProcessPoolExecutor):
+            def shutdown(self, *args, **kwargs):
+                shutdowns.append(kwargs)
+                super().shutdown(*args, **kwargs)
+
+        def failing_selection(*args, **kwargs):
+            raise RuntimeError("selection failed")
+
+        monkeypatch.setattr(screenshot, "ProcessPoolExecutor", RecordingPool)
+        monkeypatch.setattr(screenshot, "select_best_frames", failing_selection)
+        success, messages = get_screenshot(video_path, str(tmp_path), 2, 0, 0.1, 0.9, screenshot_workers=2,
+                                           in_memory=True)
+        assert not success
+        assert messages == ["截图出错：selection failed"]
+        assert len(shutdowns) == 1
+
+
+class TestOutputSpecs:
+    """Test several output sizes and formats from one decode."""
+
+    def test_parse_output_specs(self):
+        """Test the WIDTHxHEIGHT:format:quality text form."""
+        assert parse_output_specs("") is None
+        assert parse_output_specs("0x0:png, 640x0:jpg:80,x120") == [
+            {"width": 0, "height": 0, "format": "png"},
+            {"width": 640, "height": 0, "format": "jpg", "quality": 80},
+            {"width": 0, "height": 120},
+        ]
+
+    def test_screenshot_variants_share_decode(self, video_path, tmp_path):
+        """Test that every spec gets every frame while the frames are decoded once."""
+        counts = []
+        results = []
+        for output_specs in (None, [{}, {"width": 80, "format": "jpg", "quality": 70}]):
+            with VideoSession(video_path) as session:
+                source = session.frame_source()
+                results.append(get_screenshot(video_path, str(tmp_path), 2, 0, 0.1, 0.9, screenshot_seed=1,
+                                              in_memory=True, session=session, output_specs=output_specs))
+                counts.append((source.seek_count, source.grab_count))
+        (_, single), (success, variants) = results
+        assert success
+        assert counts[0] == counts[1]
+        assert [data for _, data in variants[0]] == [data for _, data in single]
+        for name, data in variants[1]:
+            assert name.endswith(".jpg")
+            assert cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR).shape == (45, 80, 3)
+
+    def test_thumbnail_variants(self, video_path, tmp_path):
+        """Test that the sheet is encoded once per spec and never upscaled."""
+        success, variants = get_thumbnail(video_path, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True,
+                                          output_specs=[{}, {"width": 90, "format": "webp"}, {"width": 1000}])
+        assert success
+        shapes = [cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR).shape for _, data in variants]
+        assert shapes == [(110, 180, 3), (55, 90, 3), (110, 180, 3)]
+        assert variants[1][0].endswith(".webp")
+
+    def test_unsupported_spec_format(self, video_path, tmp_path):
+        """Test that a bad spec format is reported before decoding."""
+        assert get_screenshot(video_path, str(tmp_path), 1, 0, 0.1, 0.9,
+                              output_specs=[{"format": "bmp"}]) == (False, ["不支持的截图格式：bmp"])
+
+
+class TestSeasonScreenshot:
+    """Test screenshots spread across the episodes of a season folder."""
+
+    @pytest.fixture
+    def season_path(self, tmp_path):
+        """Write three episodes whose blue channel identifies the episode."""
+        folder = tmp_path / "season"
+        folder.mkdir()
+        for episode in range(3):
+            writer = cv2.VideoWriter(str(folder / f"Show.S01E{episode + 1:02d}.avi"),
+                                     cv2.VideoWriter_fourcc(*"MJPG"), 24, (160, 90))
+            rng = np.random.default_rng(episode)
+            for _ in range(48):
+                frame = rng.integers(0, 256, (90, 160, 3), dtype=np.uint8)
+                frame[:, :, 0] = episode * 100
+                writer.write(frame)
+            writer.release()
+        return str(folder)
+
+    def test_distribute_screenshots(self):
+        """Test that extra shots are spread over the season rather than packed at the start."""
+        assert distribute_screenshots(5, 3) == [2, 1, 2]
+        assert distribute_screenshots(4, 10) == [0, 1, 0, 1, 0, 0, 1, 0, 1, 0]
+        assert distribute_screenshots(3, 0) == []
+
+    @pytest.mark.parametrize("season_workers", [1, 3])
+    def test_shots_follow_episode_order(self, season_path, tmp_path, season_workers):
+        """Test that every episode contributes and the list is ordered by episode."""
+        success, images = get_season_screenshot(season_path, str(tmp_path), 5, 0, 0.1, 0.9,
+                                                season_workers=season_workers, screenshot_seed=1, in_memory=True)
+        assert success
+        episodes = [round(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)[:, :, 0].mean() / 100)
+                    for _, data in images]
+        assert episodes == [0, 0, 1, 2, 2]
+
+    def test_output_specs_are_merged_per_spec(self, season_path, tmp_path):
+        """Test that each spec holds the shots of every episode."""
+        success, variants = get_season_screenshot(season_path, str(tmp_path), 3, 0, 0.1, 0.9, season_workers=1,
+                                                  in_memory=True, output_specs=[{}, {"width": 80, "format": "jpg"}])
+        assert success
+        assert [len(images) for images in variants] == [3, 3]
+
+    def test_empty_folder(self, tmp_path):
+        """Test that a folder without videos is reported."""
+        assert get_season_screenshot(str(tmp_path), str(tmp_path), 3, 0, 0.1, 0.9) == \
+               (False, ["文件夹中没有视频文件"])
+
+
+class TestFrameSource:
+    """Test the pluggable frame sources."""
+
+    def test_split_bmp_stream(self):
+        """Test that concatenated BMP images are split and decoded in order."""
+        frames = [np.full((4, 6, 3), value, dtype=np.uint8) for value in (10, 200)]
+        data = b"".join(cv2.imencode(".bmp", frame)[1].tobytes() for frame in frames)
+        decoded = split_bmp_stream(data)
+        assert [frame.tolist() for frame in decoded] == [frame.tolist() for frame in frames]
+        assert split_bmp_stream(b"") == []
+
+    def test_unknown_backend(self, video_path):
+        """Test that an unknown backend is refused."""
+        with pytest.raises(ValueError):
+            open_frame_source(video_path, "gstreamer")
+        assert get_screenshot(video_path, "", 1, 0, 0.1, 0.9, screenshot_backend="gstreamer")[0] is False
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+    def test_ffmpeg_matches_opencv(self, video_path):
+        """Test that the ffmpeg backend decodes the same frames and reuses its lookahead."""
+        opencv = open_frame_source(video_path, "opencv")
+        ffmpeg = open_frame_source(video_path, "ffmpeg", fps=opencv.fps, total_frames=opencv.total_frames)
+        for frame_number in (10, 11, 50):
+            assert np.array_equal(opencv.read(frame_number)[1], ffmpeg.read(frame_number)[1])
+        assert (ffmpeg.seek_count, ffmpeg.grab_count) == (2, 1)
+        opencv.close()
+        ffmpeg.close()
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+    def test_ffmpeg_keyframe_thumbnail(self, video_path, tmp_path):
+        """Test that ffmpeg keyframe tiles are scaled to the regular tile size."""
+        success, (_, data) = get_thumbnail(video_path, str(tmp_path), 4, 2, 0.1, 0.9, in_memory=True,
+                                           screenshot_backend="ffmpeg", keyframe_only=True)
+        assert success
+        sheet = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        assert sheet.shape == (2 * (22 + 10), 4 * (40 + 10), 3)
+
+    def test_run_ffmpeg_timeout_and_cancel(self):
+        """Test that a stalled process is killed after the timeout and when the job is cancelled."""
+        command = [sys.executable, "-c", "import time; time.sleep(30)"]
+        started = time.monotonic()
+        stdout, _ = run_ffmpeg(command, timeout=0.5)
+        assert stdout == b"" and time.monotonic() - started < 10
+        job = Job()
+        job.cancel()
+        with pytest.raises(JobCancelled):
+            run_ffmpeg(command, job)
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None or os.name == "nt", reason="needs ffmpeg and a POSIX shell")
+    def test_ffmpeg_segment_cancel(self, video_path, tmp_path):
+        """Test that cancelling the job kills an ffmpeg segment read that produces no output."""
+        stall = tmp_path / "stall.sh"
+        stall.write_text("#!/bin/sh\nexec sleep 30\n")
+        stall.chmod(0o755)
+        source = open_frame_source(video_path, "ffmpeg")
+        source.executable = str(stall)
+        source.job = Job()
+        threading.Timer(0.3, source.job.cancel).start()
+        started = time.monotonic()
+        with pytest.raises(JobCancelled):
+            list(source.read_segment(0, 5))
+        assert time.monotonic() - started < 10
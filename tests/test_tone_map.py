@@ -0,0 +1,44 @@
+"""Test HDR to SDR tone mapping."""
+
+import numpy as np
+
+from src.core.tone_map import ToneMapper, hdr_transfer, pq_eotf, pq_inverse_eotf
+
+
+class TestHdrTransfer:
+    """Test transfer detection from the HDR format."""
+
+    def test_transfers(self):
+        """Test that HLG is recognised and other HDR formats fall back to PQ."""
+        assert hdr_transfer("") is None
+        assert hdr_transfer("HDR10") == "pq"
+        assert hdr_transfer("DV") == "pq"
+        assert hdr_transfer("HLG") == "hlg"
+
+
+class TestToneMapper:
+    """Test the lookup-table tone mapper."""
+
+    def test_pq_round_trip(self):
+        """Test that the PQ curve and its inverse agree."""
+        nits = np.array([0.1, 100.0, 1000.0])
+        assert np.allclose(pq_eotf(pq_inverse_eotf(nits)), nits, rtol=1e-6)
+
+    def test_grey_ramp_is_monotonic(self):
+        """Test that brighter PQ input never maps to darker SDR output."""
+        ramp = np.repeat(np.arange(256, dtype=np.uint8), 3).reshape(1, 256, 3)
+        output = ToneMapper("pq")(ramp)
+        assert output.dtype == np.uint8
+        assert output.shape == ramp.shape
+        assert (np.diff(output[0, :, 1].astype(int)) >= 0).all()
+        assert output[0, 0].tolist() == [0, 0, 0]
+        assert output[0, 255].tolist() == [255, 255, 255]
+
+    def test_reference_white_matches(self):
+        """Test that PQ 203 nit and HLG 75% both land near the top of SDR."""
+        pq_white = np.full((1, 1, 3), round(float(pq_inverse_eotf(203.0)) * 255), dtype=np.uint8)
+        hlg_white = np.full((1, 1, 3), round(0.75 * 255), dtype=np.uint8)
+        pq_output = int(ToneMapper("pq")(pq_white)[0, 0, 0])
+        hlg_output = int(ToneMapper("hlg")(hlg_white)[0, 0, 0])
+        assert 200 < pq_output < 255
+        assert abs(pq_output - hlg_output) <= 2
@@ -0,0 +1,91 @@
+"""Test the per-job video session."""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import screenshot
+from src.core.result_cache import ResultCache
+from src.core.screenshot import get_screenshot, get_thumbnail
+from src.core.video_session import VideoSession
+
+
+@pytest.fixture
+def video_folder(tmp_path):
+    """Write a short test video into its own folder."""
+    folder = tmp_path / "movie"
+    folder.mkdir()
+    writer = cv2.VideoWriter(str(folder / "clip.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 24, (160, 90))
+    rng = np.random.default_rng(0)
+    for _ in range(48):
+        writer.write(rng.integers(0, 256, (90, 160, 3), dtype=np.uint8))
+    writer.release()
+    return folder
+
+
+class TestVideoSession:
+    """Test path resolution and shared resources."""
+
+    def test_check_matches_path_lookup(self, video_folder, tmp_path):
+        """Test that the resolved path has the check_path_and_find_video shape."""
+        with VideoSession(str(video_folder)) as session:
+            assert session.check() == (2, str(video_folder) + "/clip.avi")
+        assert VideoSession(str(tmp_path / "missing")).check()[0] == 0
+
+    def test_stages_share_one_source(self, video_folder, tmp_path):
+        """Test that screenshot and thumbnail reuse the session source and leave it open."""
+        with VideoSession(str(video_folder)) as session:
+            source = session.frame_source()
+            assert get_screenshot(session.video_path, str(tmp_path), 1, 0, 0.1, 0.9, screenshot_seed=1,
+                                  in_memory=True, session=session)[0]
+            assert get_thumbnail(session.video_path, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True,
+                                 session=session)[0]
+            assert session.frame_source() is source
+            assert source.capture.isOpened()
+        assert not source.capture.isOpened()
+
+    def test_relocate_keeps_media_info_for_renamed_file(self, video_folder):
+        """Test that renaming keeps the parsed MediaInfo while a different file drops it."""
+        session = VideoSession(str(video_folder))
+        media_info = session.media_info
+        os.rename(video_folder / "clip.avi", video_folder / "renamed.avi")
+        assert session.relocate(str(video_folder)) == (2, str(video_folder) + "/renamed.avi")
+        assert session.media_info is media_info
+        assert media_info.general_tracks[0].complete_name == str(video_folder) + "/renamed.avi"
+
+        (video_folder / "renamed.avi").write_bytes(b"not the same file")
+        session.relocate(str(video_folder))
+        assert session._media_info is None
+
+    def test_close_releases_source_and_keeps_media_info(self, video_folder):
+        """Test that closing before a rename releases the capture but keeps the parsed MediaInfo."""
+        session = VideoSession(str(video_folder))
+        media_info = session.media_info
+        source = session.frame_source()
+        session.close()
+        assert not source.capture.isOpened()
+        os.rename(video_folder / "clip.avi", video_folder / "renamed.avi")
+        session.relocate(str(video_folder))
+        assert session.media_info is media_info
+
+    @pytest.mark.parametrize("kind", ["screenshot", "thumbnail"])
+    def test_cache_hit_reuses_crop_without_decoding(self, kind, video_folder, tmp_path, monkeypatch):
+        """Test that a result cache hit restores the crop from the cache instead of opening the video."""
+        cache = ResultCache(str(tmp_path / "cache"))
+        monkeypatch.setattr(screenshot, "get_result_cache", lambda: cache)
+
+        def run(session):
+            if kind == "screenshot":
+                return get_screenshot(session.video_path, str(tmp_path), 1, 0, 0.1, 0.9, screenshot_seed=1,
+                                      in_memory=True, use_cache=True, auto_crop=True, session=session)
+            return get_thumbnail(session.video_path, str(tmp_path), 2, 2, 0.1, 0.9, in_memory=True, use_cache=True,
+                                 auto_crop=True, session=session)
+
+        with VideoSession(str(video_folder)) as session:
+            assert run(session)[0]
+        with VideoSession(str(video_folder)) as session:
+            assert run(session)[0]
+            assert session.crop() is None
+            assert session._sources == {}